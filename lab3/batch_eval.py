@@ -0,0 +1,169 @@
+# MIT 6.034 Lab 3: Games
+
+# Batched leaf evaluation with NumPy.  Instead of scoring each leaf board as
+# the search reaches it, a depth-limited search can collect the whole frontier
+# first, encode it as one array of boards, and score every board at once with
+# whole-array operations.
+#
+# This is not faster than minimax_search with heuristic_connectfour (about
+# twice as slow on BOARD_UHOH at depths 3 and 4): each frontier board is
+# encoded from scratch, which takes several times as long as
+# heuristic_connectfour, since that only reads the chain counts that the board
+# keeps up to date as pieces are added.  Batching can only pay off for a
+# heuristic that has to look at the whole board.
+#
+# Requires NumPy (pip install numpy).  The rest of lab3 doesn't, so the import
+# below is guarded, and the functions here raise ImportError without it.
+
+try :
+    import numpy as np
+except ImportError :
+    np = None
+
+from game_api import ConnectFourBoard
+from lab3 import INF, line_to_path
+
+HEURISTIC_WEIGHTS = [5, 10, 25, 50]  # the weights used by heuristic_connectfour
+
+# (row step, column step) for horizontal, vertical and both diagonal chains
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+def require_numpy() :
+    if np is None :
+        raise ImportError("batch_eval requires NumPy; install it with "
+                          "'pip install numpy'.")
+
+def encode_board(board) :
+    "Returns a ConnectFourBoard as a (num_rows, num_cols) array of 0, 1 and 2."
+    require_numpy()
+    return np.array([[piece or 0 for piece in row] for row in board.board_array],
+                    dtype=np.int8)
+
+def encode_boards(boards) :
+    "Returns a list of ConnectFourBoards as an (n, num_rows, num_cols) array."
+    require_numpy()
+    encoded = np.zeros((len(boards), ConnectFourBoard.num_rows,
+                        ConnectFourBoard.num_cols), dtype=np.int8)
+    for i, board in enumerate(boards) :
+        encoded[i] = encode_board(board)
+    return encoded
+
+def shift(masks, dr, dc) :
+    """Returns masks (an (n, rows, cols) array) moved by dr rows and dc
+    columns, so that result[:, r, c] is masks[:, r - dr, c - dc], with False
+    where that is off the board."""
+    n, rows, cols = masks.shape
+    result = np.zeros_like(masks)
+    result[:, max(dr, 0):rows + min(dr, 0), max(dc, 0):cols + min(dc, 0)] = \
+        masks[:, max(-dr, 0):rows + min(-dr, 0), max(-dc, 0):cols + min(-dc, 0)]
+    return result
+
+def batch_chain_counts(encoded) :
+    """Returns an (n, 3, 5) array of chain counts for a stack of encoded boards:
+    result[i, p] is the list that boards[i].get_chain_counts()[p] would return
+    for piece type p (1 or 2), that is, the number of maximal chains of each
+    length from 1 to 4 or more (index 0 and row 0 are always 0)."""
+    require_numpy()
+    n, rows, cols = encoded.shape
+    counts = np.zeros((n, 3, 5), dtype=np.int64)
+    for piece in (1, 2) :
+        masks = encoded == piece
+        # Singletons: pieces with no neighbour of the same type.
+        has_twin = np.zeros_like(masks)
+        for dr in (-1, 0, 1) :
+            for dc in (-1, 0, 1) :
+                if (dr, dc) != (0, 0) :
+                    has_twin |= shift(masks, dr, dc)
+        counts[:, piece, 1] = (masks & ~has_twin).sum(axis=(1, 2))
+        # Chains of two or more: at each cell where a chain starts (the cell
+        # before it isn't this piece), check how far the chain runs.
+        for dr, dc in DIRECTIONS :
+            run = masks & ~shift(masks, dr, dc)
+            at_least = [None, None]  # at_least[k]: number of chains of k or more
+            for length in (2, 3, 4) :
+                run = run & shift(masks, -(length - 1) * dr, -(length - 1) * dc)
+                at_least.append(run.sum(axis=(1, 2)))
+            counts[:, piece, 2] += at_least[2] - at_least[3]
+            counts[:, piece, 3] += at_least[3] - at_least[4]
+            counts[:, piece, 4] += at_least[4]
+    return counts
+
+def batch_heuristic_connectfour(encoded, maximize) :
+    """Scores a stack of encoded boards as heuristic_connectfour would.
+    maximize is a boolean or an array of n booleans (is the current player the
+    maximizer).  Returns an array of n scores."""
+    require_numpy()
+    counts = batch_chain_counts(encoded)
+    weights = np.array([i * HEURISTIC_WEIGHTS[i] for i in range(4)] + [0])
+    score = counts[:, 2] @ weights - counts[:, 1] @ weights
+    return np.where(maximize, 1 - score, score)
+
+
+def collect_frontier(state, depth_limit, maximize, encode_fn, boards, flags) :
+    """Makes and undoes moves on state down to depth_limit, appending each
+    unfinished board at depth_limit, encoded with encode_fn, to boards and
+    whether the maximizer is to move there to flags, in the order
+    minimax_in_place would evaluate them.  (The boards must be encoded as they
+    are found, since making moves changes the snapshot in place.)"""
+    moves = state.legal_moves()
+    if not moves :
+        return
+    if depth_limit == 0 :
+        boards.append(encode_fn(state.snapshot))
+        flags.append(maximize)
+        return
+    for move in moves :
+        state.make_move(move)
+        collect_frontier(state, depth_limit - 1, not maximize, encode_fn,
+                         boards, flags)
+        state.undo_move()
+
+def minimax_with_scores(state, depth_limit, maximize, scores) :
+    """Like minimax_in_place, but takes the heuristic scores of the frontier
+    boards, in order, from the iterator scores."""
+    moves = state.legal_moves()
+    if not moves :
+        return (None, state.endgame_score_fn(state.snapshot, maximize), 1)
+    if depth_limit == 0 :
+        return (None, next(scores), 1)
+    best_line = best_score = None
+    evals = 0
+    for move in moves :
+        state.make_move(move)
+        line, score, child_evals = minimax_with_scores(state, depth_limit - 1,
+                                                       not maximize, scores)
+        state.undo_move()
+        evals += child_evals
+        if (best_line is None
+            or (score > best_score if maximize else score < best_score)) :
+            best_line, best_score = (move, line), score
+    return (best_line, best_score, evals)
+
+def minimax_search_batched(state, batch_heuristic_fn=batch_heuristic_connectfour,
+                           depth_limit=INF, maximize=True, encode_fn=encode_board) :
+    """Performs minimax search like minimax_search, but scores all the boards
+    at depth_limit with one call to batch_heuristic_fn(boards, flags), where
+    boards stacks the boards encoded with encode_fn, and flags is an array
+    saying whether the maximizer is to move on each board.  Same return type as dfs_maximizing, and the same result as
+    minimax_search with the corresponding heuristic."""
+    require_numpy()
+    position = state.copy_for_moves()
+    boards, flags = [], []
+    if depth_limit != INF :
+        collect_frontier(position, depth_limit, maximize, encode_fn, boards,
+                         flags)
+    scores = []
+    if boards :
+        scores = batch_heuristic_fn(np.stack(boards), np.array(flags)).tolist()
+    line, score, evals = minimax_with_scores(position, depth_limit, maximize,
+                                             iter(scores))
+    return (line_to_path(state, line), score, evals)
+
+
+# Uncomment the lines below to compare minimax_search_batched with
+# minimax_search on "BOARD_UHOH" with depth_limit=3:
+
+# from lab3 import state_UHOH, minimax_search, heuristic_connectfour
+# print(minimax_search_batched(state_UHOH, depth_limit=3)[1:])
+# print(minimax_search(state_UHOH, heuristic_connectfour, 3)[1:])
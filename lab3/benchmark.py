@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+# MIT 6.034 Lab 3: Games
+
+# Benchmarks the game searches in lab3.py on the boards in boards.py and on
+# random mid-game positions, at several depths.  For each search it reports
+# the wall time, the number of nodes visited and nodes per second, the number
+# of static evaluations, the effective branching factor and the peak memory,
+# and can write the results as JSON to compare versions of the code.
+#
+# Run from your lab3 directory, for example:
+#     python3 benchmark.py --depths 1 2 3 4 --random 5 --output results.json
+
+import argparse
+import json
+import platform
+import random
+import sys
+import tracemalloc
+from time import perf_counter, strftime
+import boards
+from game_api import AbstractGameState, ConnectFourBoard
+from lab3 import (is_game_over_connectfour, next_boards_connectfour,
+                  endgame_score_connectfour_faster, heuristic_connectfour,
+                  minimax_search, minimax_search_alphabeta,
+                  progressive_deepening)
+
+SEARCHES = {
+    'minimax_search' :
+        lambda state, depth : minimax_search(state, heuristic_connectfour, depth),
+    'minimax_search_alphabeta' :
+        lambda state, depth : minimax_search_alphabeta(
+            state, heuristic_fn=heuristic_connectfour, depth_limit=depth),
+    'progressive_deepening' :
+        lambda state, depth : progressive_deepening(state, heuristic_connectfour, depth),
+}
+
+
+class NodeCounter :
+    """An is_game_over_fn that counts its calls.  The searches ask whether the
+    game is over once for each node they visit, and once more for each move
+    of the path they return, while building it (see path_length)."""
+
+    def __init__(self) :
+        self.count = 0
+
+    def __call__(self, board) :
+        self.count += 1
+        return is_game_over_connectfour(board)
+
+
+def make_state(board, counter) :
+    return AbstractGameState(snapshot = board,
+                             is_game_over_fn = counter,
+                             generate_next_states_fn = next_boards_connectfour,
+                             endgame_score_fn = endgame_score_connectfour_faster,
+                             in_place_moves = True)
+
+def named_boards() :
+    "Returns (name, board) for each unfinished ConnectFourBoard in boards.py."
+    return [(name, board) for name, board in sorted(vars(boards).items())
+            if isinstance(board, ConnectFourBoard)
+            and not is_game_over_connectfour(board)]
+
+def random_boards(count, num_pieces, seed) :
+    """Returns count (name, board) pairs for unfinished boards reached by
+    num_pieces random moves from the empty board."""
+    rng = random.Random(seed)
+    result = []
+    while len(result) < count :
+        board = ConnectFourBoard()
+        for _ in range(num_pieces) :
+            board = board.add_piece(rng.choice(board.legal_moves()))
+            if is_game_over_connectfour(board) :
+                break
+        else :
+            result.append(('random_%i' % len(result), board))
+    return result
+
+def effective_branching_factor(nodes, depth) :
+    """Returns the branching factor b of a uniform tree of the given depth
+    with as many nodes as were visited: nodes = 1 + b + b**2 + ... + b**depth."""
+    if depth == 0 or nodes <= depth + 1 :
+        return 1.0 if depth else 0.0
+    low, high = 1.0, float(nodes)
+    for _ in range(100) :
+        b = (low + high) / 2
+        if sum(b ** i for i in range(depth + 1)) < nodes :
+            low = b
+        else :
+            high = b
+    return (low + high) / 2
+
+def path_length(path) :
+    """Returns the number of moves in a path returned by a search, which is
+    the number of extra calls NodeCounter counted while it was built."""
+    return len(path) - 1
+
+def run_search(search_name, board, depth, measure_memory=True) :
+    """Runs one search on board and returns a dictionary of measurements.
+    Peak memory is measured in a second run, since tracing allocations slows
+    the search down."""
+    search = SEARCHES[search_name]
+    counter = NodeCounter()
+    state = make_state(board, counter)
+    start = perf_counter()
+    result = search(state, depth)
+    seconds = perf_counter() - start
+    if search_name == 'progressive_deepening' :
+        evals = result.total_evaluations
+        score = result.get_value()[1]
+        paths = [value[0] for value in result.history]
+    else :
+        evals = result[2]
+        score = result[1]
+        paths = [result[0]]
+    nodes = counter.count - sum(map(path_length, paths))
+    measurement = {
+        'search' : search_name,
+        'depth' : depth,
+        'score' : score,
+        'seconds' : seconds,
+        'nodes' : nodes,
+        'nodes_per_second' : nodes / seconds if seconds else None,
+        'evaluations' : evals,
+        'effective_branching_factor' : effective_branching_factor(nodes, depth),
+        'peak_memory_bytes' : None,
+    }
+    if measure_memory :
+        state = make_state(board, NodeCounter())
+        tracemalloc.start()
+        search(state, depth)
+        measurement['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return measurement
+
+def run_benchmarks(positions, searches, depths, measure_memory=True,
+                   verbose=False) :
+    """Runs each search at each depth on each (name, board) position.
+    Returns a list of measurement dictionaries."""
+    results = []
+    for position_name, board in positions :
+        for search_name in searches :
+            for depth in depths :
+                measurement = run_search(search_name, board, depth, measure_memory)
+                measurement['position'] = position_name
+                measurement['pieces'] = board.count_pieces()
+                results.append(measurement)
+                if verbose :
+                    print_measurement(measurement)
+    return results
+
+def print_measurement(m) :
+    memory = ('%9.1f KiB' % (m['peak_memory_bytes'] / 1024.0)
+              if m['peak_memory_bytes'] is not None else '%13s' % '-')
+    print('%-26s %-25s %2i %9.4fs %9i nodes %10.0f nodes/s %8i evals  EBF %5.2f %s'
+          % (m['position'], m['search'], m['depth'], m['seconds'], m['nodes'],
+             m['nodes_per_second'] or 0, m['evaluations'],
+             m['effective_branching_factor'], memory))
+    sys.stdout.flush()
+
+def main(argv=None) :
+    parser = argparse.ArgumentParser(description='Benchmark the lab3 game searches.')
+    parser.add_argument('--searches', nargs='+', choices=sorted(SEARCHES),
+                        default=sorted(SEARCHES), help='searches to run')
+    parser.add_argument('--depths', nargs='+', type=int, default=[1, 2, 3, 4],
+                        help='depth limits to search to')
+    parser.add_argument('--random', type=int, default=3, metavar='N',
+                        help='number of random mid-game positions')
+    parser.add_argument('--pieces', type=int, default=12,
+                        help='number of pieces on the random positions')
+    parser.add_argument('--seed', type=int, default=6034,
+                        help='random seed for the random positions')
+    parser.add_argument('--no-boards', action='store_true',
+                        help="don't search the boards in boards.py")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="don't measure peak memory (halves the run time)")
+    parser.add_argument('--output', metavar='FILE',
+                        help='write the results to FILE as JSON')
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON instead of a table')
+    args = parser.parse_args(argv)
+
+    positions = [] if args.no_boards else named_boards()
+    positions += random_boards(args.random, args.pieces, args.seed)
+    results = run_benchmarks(positions, args.searches, args.depths,
+                             not args.no_memory, verbose=not args.json)
+    report = {
+        'date' : strftime('%Y-%m-%dT%H:%M:%S'),
+        'python' : platform.python_version(),
+        'platform' : platform.platform(),
+        'arguments' : vars(args),
+        'results' : results,
+    }
+    if args.output :
+        with open(args.output, 'w') as f :
+            json.dump(report, f, indent=2)
+    if args.json :
+        print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__' :
+    main()
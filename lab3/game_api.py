@@ -1,6 +1,7 @@
 # MIT 6.034 Lab 3: Games
 
-from copy import deepcopy
+import random
+from copy import copy, deepcopy
 from functools import reduce
 
 def always_zero(state, maximize=True):
@@ -12,13 +13,17 @@ class AbstractGameState :
                  snapshot,
                  is_game_over_fn,
                  generate_next_states_fn,
-                 endgame_score_fn) :
+                 endgame_score_fn,
+                 in_place_moves=False) :
 
         self.snapshot = snapshot
         self.starting_state = snapshot
         self.is_game_over_fn = is_game_over_fn
         self.generate_next_states_fn = generate_next_states_fn
         self.endgame_score_fn = endgame_score_fn
+        self.in_place_moves = in_place_moves
+        self.previous_snapshots = []
+        self.clear_cache()
 
     def __str__(self) :
         return "\n<AbstractGameState representing:\n" + self.snapshot.__str__() + "\n>"
@@ -29,16 +34,43 @@ class AbstractGameState :
 
     def wrap(self, snapshot) :
         return AbstractGameState(snapshot, self.is_game_over_fn,
-                                 self.generate_next_states_fn, self.endgame_score_fn)
+                                 self.generate_next_states_fn, self.endgame_score_fn,
+                                 self.in_place_moves)
 
     def get_snapshot(self):
         return self.snapshot
 
+    # The children, game-over flag and endgame scores of the current snapshot
+    # are computed once and cached.  The children are cached as snapshots and
+    # wrapped into new states when asked for, so that a state doesn't keep
+    # alive the states below it (and everything they cached) after a search.
+    # Snapshots must not be changed except through make_move and undo_move
+    # (or call clear_cache afterwards).
+
+    def clear_cache(self) :
+        "Forgets the cached children, game-over flag and endgame scores."
+        self.next_snapshots_cache = None
+        self.game_over_cache = None
+        self.endgame_score_cache = {}
+        return self
+
     def is_game_over(self) :
-        return len(self.generate_next_states()) == 0 or self.is_game_over_fn(self.snapshot)
+        if self.game_over_cache is None :
+            if self.supports_make_move() :
+                self.game_over_cache = len(self.legal_moves()) == 0
+            else :
+                self.game_over_cache = (len(self.next_snapshots()) == 0
+                                        or bool(self.is_game_over_fn(self.snapshot)))
+        return self.game_over_cache
+
+    def next_snapshots(self) :
+        "Returns the cached list of the snapshots of the children; don't modify it."
+        if self.next_snapshots_cache is None :
+            self.next_snapshots_cache = list(self.generate_next_states_fn(self.snapshot))
+        return self.next_snapshots_cache
 
     def generate_next_states(self) :
-        return list(map(self.wrap, self.generate_next_states_fn(self.snapshot)))
+        return list(map(self.wrap, self.next_snapshots()))
 
     def describe_previous_move(self) :
         return self.snapshot.describe_previous_move()
@@ -47,20 +79,103 @@ class AbstractGameState :
         # only for leaf nodes
         if not self.is_game_over() :
             raise ValueError("Only endgame states have endgame score defined.")
-        return self.endgame_score_fn(self.snapshot, is_current_player_maximizer)
+        if is_current_player_maximizer not in self.endgame_score_cache :
+            self.endgame_score_cache[is_current_player_maximizer] = \
+                self.endgame_score_fn(self.snapshot, is_current_player_maximizer)
+        return self.endgame_score_cache[is_current_player_maximizer]
 
     def restart(self) :
         self.snapshot = self.starting_state
+        self.previous_snapshots = []
+        self.clear_cache()
+        return self
+
+    # In-place moves.  If the state was made with in_place_moves=True, its
+    # snapshot (like a ConnectFourBoard) has legal_moves, make_move and
+    # undo_move methods, which change it in place.  They must list and make
+    # the same moves, in the same order, as generate_next_states_fn, which is
+    # then not called by make_move.  Otherwise, a move is the index of a child
+    # in generate_next_states, and making it replaces the snapshot.  Either
+    # way, make_move changes this state (and, for in-place snapshots, the
+    # snapshot object itself), so make moves on copy_for_moves() if you need
+    # to keep the original.
+
+    def supports_make_move(self) :
+        "Returns True if the snapshot makes and undoes moves in place."
+        return self.in_place_moves
+
+    def legal_moves(self) :
+        "Returns a list of the moves that can be made, or [] if the game is over."
+        if self.is_game_over_fn(self.snapshot) :
+            return []
+        if self.supports_make_move() :
+            return self.snapshot.legal_moves()
+        return list(range(len(self.next_snapshots())))
+
+    def make_move(self, move) :
+        "Makes the move, changing this state.  Returns this state."
+        if self.supports_make_move() :
+            self.snapshot.make_move(move)
+            self.previous_snapshots.append(None)
+        else :
+            # Keep the children with the parent, so that undoing the move
+            # doesn't generate them again for the next move.
+            children = self.next_snapshots()
+            self.previous_snapshots.append((self.snapshot, children))
+            self.snapshot = children[move]
+        self.clear_cache()
+        return self
+
+    def undo_move(self) :
+        "Undoes the most recent make_move.  Returns this state."
+        if not self.previous_snapshots :
+            raise IndexError("No moves to undo.")
+        previous = self.previous_snapshots.pop()
+        self.clear_cache()
+        if previous is None :
+            self.snapshot.undo_move()
+        else :
+            self.snapshot, self.next_snapshots_cache = previous
         return self
 
+    def copy_for_moves(self) :
+        """Returns a new state to make moves on, without changing this one.
+        Only copies the snapshot if moves change it in place."""
+        if self.supports_make_move() :
+            return self.wrap(self.snapshot.copy())
+        return self.wrap(self.snapshot)
+
+    def next_state(self, move) :
+        """Returns the state that results from the move, as a new state,
+        without changing this one."""
+        return self.generate_next_states()[self.legal_moves().index(move)]
+
     def copy(self):
         return deepcopy(self)
 
 
+def zobrist_keys(num_rows, num_cols, rng) :
+    """Returns a random 64-bit key for every (row, col, piece), as nested
+    lists indexed [row][col][piece]."""
+    return [[[rng.getrandbits(64) for piece in range(3)]
+             for c in range(num_cols)]
+            for r in range(num_rows)]
+
 class ConnectFourBoard :
     num_rows = 6  # board height
     num_cols = 7  # board width
 
+    # A board's Zobrist hash is the XOR of piece_keys[row][col][piece] over
+    # its pieces, so adding or removing a piece changes it with one XOR.
+    piece_keys = zobrist_keys(num_rows, num_cols, random.Random(6034))
+
+    # The chain counts and the Zobrist hash are cached, and add_piece,
+    # make_move and undo_move update them along with the board.  The caches
+    # describe cached_array, a copy of board_array as it was when they were
+    # last computed or updated; if board_array has been changed any other way
+    # (directly), it no longer equals cached_array, and the caches are
+    # recomputed the next time they are needed.
+
     def __init__(self, board_array=None, players=['Player One','Player Two'],
                  whose_turn=None) :
         """A board array is a list of rows. The pieces are either 0 (no player), 1, or 2."""
@@ -70,6 +185,11 @@ class ConnectFourBoard :
             board_array = [[0 for c in range(ConnectFourBoard.num_cols)] for r in range(ConnectFourBoard.num_rows)]
         self.board_array = [ [x if x is not 0 else None for x in row] for row in board_array]
         self.prev_move_string = 'none'
+        self.prev_move_col = None
+        self.chain_counts = None
+        self.zobrist_hash = None
+        self.cached_array = None
+        self.move_stack = []
         self.players = players[:]
         self.whose_turn = whose_turn if whose_turn in players else players[0]
         if self.whose_turn != self.players[0] :
@@ -132,15 +252,76 @@ class ConnectFourBoard :
 
         player = player or self.whose_turn
         piece_type = self.__piece_type__(player)
-        new_board = self.copy()
-        height = 1 + new_board.get_column_height(col_number)
-        new_board.board_array[-height][col_number] = piece_type
+        old_counts = self.get_chain_counts()
+        # Copy only what the new board changes, not the undo stack (with the
+        # chain counts saved in it) of an in-place board.
+        new_board = copy(self)
+        new_board.board_array = [row[:] for row in self.board_array]
+        new_board.players = self.players[:]
+        new_board.move_stack = []
+        row = self.num_rows - 1 - new_board.get_column_height(col_number)
+        new_board.board_array[row][col_number] = piece_type
+        new_board.cached_array = [r[:] for r in new_board.board_array]
+        if self.zobrist_hash is not None :
+            new_board.zobrist_hash = (self.zobrist_hash
+                                      ^ self.piece_keys[row][col_number][piece_type])
+        new_board.chain_counts = self.__updated_chain_counts__(
+            old_counts, self.__chain_counts_near__(col_number, row),
+            new_board.__chain_counts_near__(col_number, row))
         new_board.prev_move_string = ("Put " + str(player)
                                       + "'s piece in col " + str(col_number))
+        new_board.prev_move_col = col_number
         # adding a piece causes the current player to swap
         new_board.set_current_player_name(new_board.players[1])
         return new_board
 
+    def legal_moves(self) :
+        "Return a list of the columns that are not full."
+        return [col for col in range(self.num_cols)
+                if self.board_array[0][col] is None]
+
+    def make_move(self, col_number) :
+        """Adds a piece belonging to the current player to the given column,
+        modifying this board (unlike add_piece).  Returns this board."""
+        if self.is_column_full(col_number) :
+            raise IndexError("Can't add piece to full column "+str(col_number)+".")
+        if self.move_stack :
+            piece_type = 3 - self.move_stack[-1][2]
+        else :
+            piece_type = self.__piece_type__()
+        old_counts = self.get_chain_counts()
+        row = self.num_rows - 1 - self.get_column_height(col_number)
+        before = self.__chain_counts_near__(col_number, row)
+        self.board_array[row][col_number] = piece_type
+        self.cached_array[row][col_number] = piece_type
+        if self.zobrist_hash is not None :
+            self.zobrist_hash ^= self.piece_keys[row][col_number][piece_type]
+        self.chain_counts = self.__updated_chain_counts__(
+            old_counts, before, self.__chain_counts_near__(col_number, row))
+        self.move_stack.append((col_number, row, piece_type, old_counts,
+                                self.prev_move_string, self.prev_move_col))
+        self.prev_move_string = ("Put " + str(self.whose_turn)
+                                 + "'s piece in col " + str(col_number))
+        self.prev_move_col = col_number
+        self.players.reverse()
+        self.whose_turn = self.players[0]
+        return self
+
+    def undo_move(self) :
+        """Takes back the most recent make_move, modifying this board.
+        Returns this board."""
+        if not self.move_stack :
+            raise IndexError("No moves to undo.")
+        (col, row, piece_type, self.chain_counts,
+         self.prev_move_string, self.prev_move_col) = self.move_stack.pop()
+        self.board_array[row][col] = None
+        self.cached_array[row][col] = None
+        if self.zobrist_hash is not None :
+            self.zobrist_hash ^= self.piece_keys[row][col][piece_type]
+        self.players.reverse()
+        self.whose_turn = self.players[0]
+        return self
+
     def describe_previous_move(self) :
         "Returns a string describing the most recent move leading to current state"
         return self.prev_move_string
@@ -148,6 +329,86 @@ class ConnectFourBoard :
     def copy(self) :
         return deepcopy(self)
 
+    def get_chain_counts(self) :
+        """Return a dictionary sending each piece type (1 or 2) to a list whose
+        i-th element is the number of chains of length i belonging to that
+        piece type, as found by get_all_chains.  The last element counts all
+        chains of length 4 or more.  The counts are computed once and then
+        updated incrementally by add_piece, make_move and undo_move (see
+        cached_array); don't modify the result."""
+        self.__check_caches__()
+        if self.chain_counts is None :
+            counts = {1: [0] * 5, 2: [0] * 5}
+            for chain in self.get_all_chains() :
+                counts[chain[0]][min(len(chain), 4)] += 1
+            self.chain_counts = counts
+        return self.chain_counts
+
+    def get_zobrist_hash(self) :
+        """Return the XOR of piece_keys[row][col][piece] over the pieces on the
+        board.  Like the chain counts, the hash is computed once and then
+        updated incrementally by add_piece, make_move and undo_move."""
+        self.__check_caches__()
+        if self.zobrist_hash is None :
+            h = 0
+            for r, row in enumerate(self.board_array) :
+                for c, piece in enumerate(row) :
+                    if piece :
+                        h ^= self.piece_keys[r][c][piece]
+            self.zobrist_hash = h
+        return self.zobrist_hash
+
+    def __check_caches__(self) :
+        "Forgets the cached chain counts and hash if board_array was changed directly."
+        if self.cached_array != self.board_array :
+            self.chain_counts = None
+            self.zobrist_hash = None
+            self.cached_array = [row[:] for row in self.board_array]
+
+    def __chain_counts_near__(self, col, row) :
+        """Return chain counts (like get_chain_counts) for only the chains that
+        could be affected by a piece at (col, row): chains on the four lines
+        through it, and singletons among it and its neighbors."""
+        counts = {1: [0] * 5, 2: [0] * 5}
+        for dx, dy in [(1, 0), (0, 1), (1, 1), (1, -1)] :
+            c, r = col, row
+            while 0 <= c - dx < self.num_cols and 0 <= r - dy < self.num_rows :
+                c, r = c - dx, r - dy
+            run_piece, run_length = None, 0
+            while 0 <= c < self.num_cols and 0 <= r < self.num_rows :
+                piece = self.board_array[r][c]
+                if piece is not None and piece == run_piece :
+                    run_length += 1
+                else :
+                    if run_length > 1 :
+                        counts[run_piece][min(run_length, 4)] += 1
+                    run_piece, run_length = piece, 1
+                c, r = c + dx, r + dy
+            if run_piece is not None and run_length > 1 :
+                counts[run_piece][min(run_length, 4)] += 1
+        for x in range(max(col - 1, 0), min(col + 2, self.num_cols)) :
+            for y in range(max(row - 1, 0), min(row + 2, self.num_rows)) :
+                piece = self.board_array[y][x]
+                if piece is not None and not self.__has_twin__(x, y) :
+                    counts[piece][1] += 1
+        return counts
+
+    def __has_twin__(self, col, row) :
+        "Return True if the piece at (col, row) has a neighbor of the same type."
+        piece = self.board_array[row][col]
+        for x in range(max(col - 1, 0), min(col + 2, self.num_cols)) :
+            for y in range(max(row - 1, 0), min(row + 2, self.num_rows)) :
+                if (x, y) != (col, row) and self.board_array[y][x] == piece :
+                    return True
+        return False
+
+    def __updated_chain_counts__(self, old_counts, before, after) :
+        """Given a board's chain counts, and the counts near a square before
+        and after a piece is put there, return the new chain counts."""
+        return dict((piece, [old_counts[piece][i] - before[piece][i] + after[piece][i]
+                             for i in range(5)])
+                    for piece in (1, 2))
+
     def __get_line__(self, col, row, dx, dy) :
         """Return the list of pieces you get starting at (col, row) and
         incrementing by dx,dy until you run out of board."""
@@ -3,7 +3,10 @@
 
 from game_api import *
 from boards import *
+from time import monotonic
 from toytree import GAME1
+from transposition import TranspositionTable, EXACT, LOWERBOUND, UPPERBOUND
+from move_ordering import MoveOrdering
 
 INF = float('inf')
 
@@ -12,10 +15,14 @@ INF = float('inf')
 #### Part 1: Utility Functions #################################################
 
 def is_game_over_connectfour(board):
-    for c in board.get_all_chains():
-        if len(c) >= 4:
-            return True
-    return board.count_pieces() >= board.num_rows * board.num_cols
+    # The board keeps count of its chains by length (the last entry counts
+    # chains of length 4 or more), so this doesn't need to scan for chains.
+    counts = board.get_chain_counts()
+    if counts[1][4] or counts[2][4]:
+        return True
+    # A full board has a full top row; only count pieces if it does.
+    return (not board.legal_moves()
+            and board.count_pieces() >= board.num_rows * board.num_cols)
 
 def next_boards_connectfour(board):
     """Returns a list of ConnectFourBoard objects that could result from the
@@ -50,56 +57,84 @@ def heuristic_connectfour(board, is_current_player_maximizer):
     """Given a non-endgame board, returns a heuristic score with
     abs(score) < 1000, where higher numbers indicate that the board is better
     for the maximizer."""
-    cur_player = board.count_pieces() % 2
-    p1 = board.get_all_chains(cur_player)
-    p2 = board.get_all_chains(1 - cur_player)
-    p1_tot = p2_tot = 0
+    # Chains of each length score i * scores[i] (chains of length 4 or more
+    # score nothing).  The board keeps its chain counts up to date as pieces
+    # are added, so this doesn't need to look at the whole board.
+    # (get_all_chains(count_pieces() % 2) always picks out piece type 2,
+    # and get_all_chains(1 - count_pieces() % 2) piece type 1.)
+    counts = board.get_chain_counts()
     scores = [5, 10, 25, 50]
-    for c in p1:
-        for i in range(4):
-            if len(c) == i:
-                p1_tot += i * scores[i]
-    for c in p2:
-        for i in range(4):
-            if len(c) == i:
-                p2_tot += i * scores[i]
+    p1_tot = p2_tot = 0
+    for i in range(4):
+        p1_tot += i * scores[i] * counts[2][i]
+        p2_tot += i * scores[i] * counts[1][i]
     score = p1_tot - p2_tot
     return (1-score) if is_current_player_maximizer else score
 
+def heuristic_connectfour_for_mover(board, is_current_player_maximizer):
+    """Like heuristic_connectfour, but oriented by whose turn it is: with
+    is_current_player_maximizer False, the score is for the player who has
+    just moved, and with True, for the player to move.  (This is the kind of
+    heuristic that MonteCarloTreeSearch's rollouts need.)"""
+    # heuristic_connectfour(board, False) scores the board for piece type 2,
+    # which is the player who has just moved when an even number of pieces
+    # have been played.
+    score = heuristic_connectfour(board, False)
+    if board.count_pieces() % 2:
+        score = -score
+    return -score if is_current_player_maximizer else score
+
 # Now we can create AbstractGameState objects for Connect Four, using some of
 # the functions you implemented above.  You can use the following examples to
-# test your dfs and minimax implementations in Part 2.
+# test your dfs and minimax implementations in Part 2.  (in_place_moves=True
+# lets the searches make and undo moves on the board instead of creating a
+# new board for every child; see game_api.py.)
 
 # This AbstractGameState represents a new ConnectFourBoard, before the game has started:
 state_starting_connectfour = AbstractGameState(snapshot = ConnectFourBoard(),
                                  is_game_over_fn = is_game_over_connectfour,
                                  generate_next_states_fn = next_boards_connectfour,
-                                 endgame_score_fn = endgame_score_connectfour_faster)
+                                 endgame_score_fn = endgame_score_connectfour_faster,
+                                 in_place_moves = True)
 
 # This AbstractGameState represents the ConnectFourBoard "NEARLY_OVER" from boards.py:
 state_NEARLY_OVER = AbstractGameState(snapshot = NEARLY_OVER,
                                  is_game_over_fn = is_game_over_connectfour,
                                  generate_next_states_fn = next_boards_connectfour,
-                                 endgame_score_fn = endgame_score_connectfour_faster)
+                                 endgame_score_fn = endgame_score_connectfour_faster,
+                                 in_place_moves = True)
 
 # This AbstractGameState represents the ConnectFourBoard "BOARD_UHOH" from boards.py:
 state_UHOH = AbstractGameState(snapshot = BOARD_UHOH,
                                  is_game_over_fn = is_game_over_connectfour,
                                  generate_next_states_fn = next_boards_connectfour,
-                                 endgame_score_fn = endgame_score_connectfour_faster)
+                                 endgame_score_fn = endgame_score_connectfour_faster,
+                                 in_place_moves = True)
 
 
 #### Part 2: Searching a Game Tree #############################################
 
 # Note: Functions in Part 2 use the AbstractGameState API, not ConnectFourBoard.
-def expand(state, path, allpaths):
-    new_path = path[:]
-    new_path.append(state)
-    if state.is_game_over():
-        allpaths.append(new_path)
-        return True
-    for child in state.generate_next_states():
-        expand(child, new_path, allpaths)
+def dfs_in_place(state, moves, best):
+    """Depth-first search that makes and undoes moves on state, keeping only
+    the moves from the root to the current state (moves) and the best leaf
+    found so far (best, a list [moves to the leaf, score, evaluations]).  The
+    first leaf with the highest score wins, as in a left-to-right search."""
+    legal_moves = state.legal_moves()
+    if not legal_moves:
+        score = state.endgame_score_fn(state.snapshot, True)
+        best[2] += 1
+        if best[1] is None or score > best[1]:
+            best[0], best[1] = moves[:], score
+        return
+    for move in legal_moves:
+        moves.append(move)
+        state.make_move(move)
+        try:
+            dfs_in_place(state, moves, best)
+        finally:
+            state.undo_move()
+            moves.pop()
 
 def dfs_maximizing(state) :
     """Performs depth-first search to find path with highest endgame score.
@@ -107,20 +142,12 @@ def dfs_maximizing(state) :
      0. the best path (a list of AbstractGameState objects),
      1. the score of the leaf node (a number), and
      2. the number of static evaluations performed (a number)"""
-    all_paths = list()
-    expand(state, list(), all_paths)
-
-    evals = 0
-    path_scores = list()
-    for p in all_paths:
-        path_scores.append(p[-1].get_endgame_score(is_current_player_maximizer=True))
-        evals += 1 #len(path) - 1
-
-    best_path_sel = path_scores.index(max(path_scores))
-    best_path = all_paths[best_path_sel]
-    best_score = max(path_scores)
-
-    return (best_path, best_score, evals)
+    best = [None, None, 0]
+    dfs_in_place(state.copy_for_moves(), [], best)
+    best_path = [state]
+    for move in best[0]:
+        best_path.append(best_path[-1].next_state(move))
+    return (best_path, best[1], best[2])
 
 
 # Uncomment the line below to try your dfs_maximizing on an
@@ -128,9 +155,46 @@ def dfs_maximizing(state) :
 
 # pretty_print_dfs_type(dfs_maximizing(GAME1))
     
+def line_to_path(state, line):
+    """Given the starting state and a line of moves as returned by the in-place
+    searches (nested (move, rest_of_line) pairs, ending in None), returns the
+    list of states along the line, starting with state."""
+    path = [state]
+    while line is not None:
+        move, line = line
+        state = state.next_state(move)
+        path.append(state)
+    return path
+
+def minimax_in_place(state, heuristic_fn, depth_limit, maximize):
+    """Minimax search that makes and undoes moves on state instead of creating
+    child states.  Returns a tuple containing the line of best moves (see
+    line_to_path), the score and the number of static evaluations."""
+    moves = state.legal_moves()
+    if not moves:
+        return (None, state.endgame_score_fn(state.snapshot, maximize), 1)
+    if depth_limit == 0:
+        return (None, heuristic_fn(state.snapshot, maximize), 1)
+    best_line = best_score = None
+    evals = 0
+    for move in moves:
+        state.make_move(move)
+        line, score, child_evals = minimax_in_place(state, heuristic_fn,
+                                                    depth_limit - 1, not maximize)
+        state.undo_move()
+        evals += child_evals
+        if (best_line is None
+            or (score > best_score if maximize else score < best_score)):
+            best_line, best_score = (move, line), score
+    return (best_line, best_score, evals)
+
 def minimax_endgame_search(state, maximize=True) :
     """Performs minimax search, searching all leaf nodes and statically
     evaluating all endgame scores.  Same return type as dfs_maximizing."""
+    if state.supports_make_move():
+        line, score, evals = minimax_in_place(state.copy_for_moves(), always_zero, INF,
+                                              maximize)
+        return (line_to_path(state, line), score, evals)
     results = list()
     if state.is_game_over():
         return ([state], state.get_endgame_score(maximize), 1)
@@ -155,6 +219,10 @@ def minimax_endgame_search(state, maximize=True) :
 
 def minimax_search(state, heuristic_fn=always_zero, depth_limit=INF, maximize=True) :
     """Performs standard minimax search. Same return type as dfs_maximizing."""
+    if state.supports_make_move():
+        line, score, evals = minimax_in_place(state.copy_for_moves(), heuristic_fn,
+                                              depth_limit, maximize)
+        return (line_to_path(state, line), score, evals)
     results = list()
     if state.is_game_over():
         return ([state], state.get_endgame_score(maximize), 1)
@@ -180,9 +248,21 @@ def minimax_search(state, heuristic_fn=always_zero, depth_limit=INF, maximize=Tr
 
 
 def minimax_search_alphabeta(state, alpha=-INF, beta=INF, heuristic_fn=always_zero,
-                             depth_limit=INF, maximize=True):
+                             depth_limit=INF, maximize=True, table=None,
+                             ordering=None, deadline=None):
     """"Performs minimax with alpha-beta pruning. Same return type 
-    as dfs_maximizing."""
+    as dfs_maximizing. If a TranspositionTable is given, positions that have
+    already been searched deeply enough are looked up instead of searched.
+    If a MoveOrdering is given, children are searched in the order it
+    suggests instead of the order they are generated in.  If a deadline
+    (a time.monotonic() value) is given, raises SearchTimeout once it passes."""
+    if (table is not None or ordering is not None or deadline is not None
+        or state.supports_make_move()):
+        line, score, evals = alphabeta_in_place(state.copy_for_moves(), alpha, beta,
+                                                heuristic_fn, depth_limit,
+                                                maximize, table, ordering,
+                                                deadline=deadline)
+        return (line_to_path(state, line), score, evals)
     if state.is_game_over():
         return ([state], state.get_endgame_score(maximize), 1)
     if depth_limit == 0:
@@ -217,6 +297,74 @@ def minimax_search_alphabeta(state, alpha=-INF, beta=INF, heuristic_fn=always_ze
     return ([state] + bestresult[0], bestresult[1], evals)
 
 
+class SearchTimeout(Exception):
+    "Raised by a search that runs past its deadline."
+    pass
+
+def alphabeta_in_place(state, alpha, beta, heuristic_fn, depth_limit,
+                       maximize, table=None, ordering=None, ply=0,
+                       on_pv=True, deadline=None):
+    """Alpha-beta search that makes and undoes moves on state instead of
+    creating child states, with an optional transposition table, move
+    ordering and deadline.  Stores the result and best move for each position
+    in the table, and searches the stored best move first when the position
+    comes up again; the table is only used to order moves, so that the best
+    line is always built by the search itself.  Searches moves in the order
+    given by the MoveOrdering, and tells it about cutoffs.  Raises
+    SearchTimeout if the deadline passes.  Same return type as
+    minimax_in_place."""
+    if deadline is not None and monotonic() > deadline:
+        raise SearchTimeout()
+    moves = state.legal_moves()
+    if not moves:
+        return (None, state.endgame_score_fn(state.snapshot, maximize), 1)
+    if depth_limit == 0:
+        return (None, heuristic_fn(state.snapshot, maximize), 1)
+    key = table.key(state, maximize) if table is not None else None
+    table_move = None
+    if key is not None:
+        entry = table.probe(key)
+        if entry is not None:
+            table_move = entry.best_move
+    if ordering is not None:
+        moves = ordering.order(state, moves, ply, on_pv, table_move)
+        pv_move = ordering.pv_move(ply, on_pv)
+    else:
+        pv_move = None
+    original_alpha, original_beta = alpha, beta
+    best_line = best_score = best_move = None
+    evals = 0
+    for move in moves:
+        state.make_move(move)
+        try:
+            line, score, child_evals = alphabeta_in_place(
+                state, alpha, beta, heuristic_fn, depth_limit - 1, not maximize,
+                table, ordering, ply + 1, on_pv and move == pv_move, deadline)
+        finally:
+            state.undo_move()
+        evals += child_evals
+        if (best_move is None
+            or (score > best_score if maximize else score < best_score)):
+            best_line, best_score, best_move = (move, line), score, move
+        if maximize:
+            alpha = max(alpha, score)
+        else:
+            beta = min(beta, score)
+        if alpha >= beta:
+            if ordering is not None:
+                ordering.record_cutoff(move, ply, depth_limit)
+            break
+    if key is not None:
+        if best_score <= original_alpha:
+            bound = UPPERBOUND
+        elif best_score >= original_beta:
+            bound = LOWERBOUND
+        else:
+            bound = EXACT
+        table.store(key, depth_limit, best_score, bound, best_move)
+    return (best_line, best_score, evals)
+
+
 # Uncomment the line below to try minimax_search_alphabeta with "BOARD_UHOH" and
 # depth_limit=4. Compare with the number of evaluations from minimax_search for
 # different values of depth_limit.
@@ -225,15 +373,33 @@ def minimax_search_alphabeta(state, alpha=-INF, beta=INF, heuristic_fn=always_ze
 
 
 def progressive_deepening(state, heuristic_fn=always_zero, depth_limit=INF,
-                          maximize=True) :
+                          maximize=True, table=None, report_table=False,
+                          ordering=None) :
     """Runs minimax with alpha-beta pruning. At each level, updates anytime_value
-    with the tuple returned from minimax_search_alphabeta. Returns anytime_value."""
+    with the tuple returned from minimax_search_alphabeta. Returns anytime_value.
+    If a TranspositionTable is given, it is shared by all levels; if
+    report_table is True, prints the table's hit rate after each level.
+    If a MoveOrdering is given, each level first searches the principal
+    variation found by the level before."""
     depth = 0
     anytime_value = AnytimeValue()
+    if table is not None:
+        table.new_search()
+    if ordering is not None:
+        ordering.new_search()
     while depth < depth_limit:
+        if report_table and table is not None:
+            probes, hits = table.probes, table.hits
         anytime_value.set_value(minimax_search_alphabeta(state, -INF, INF, heuristic_fn,
-                             depth+1, maximize=True))
+                             depth+1, maximize=True, table=table, ordering=ordering))
         depth += 1
+        if ordering is not None:
+            ordering.set_principal_variation(anytime_value.get_value()[0])
+        if report_table and table is not None:
+            probes, hits = table.probes - probes, table.hits - hits
+            print('Depth %i: %i probes, %i hits (%.1f%%), %i entries'
+                  % (depth, probes, hits, 100.0*hits/probes if probes else 0.0,
+                     len(table)))
     return anytime_value
 
 
@@ -244,6 +410,86 @@ def progressive_deepening(state, heuristic_fn=always_zero, depth_limit=INF,
 # progressive_deepening(state_UHOH, heuristic_fn=heuristic_connectfour, depth_limit=4).pretty_print()
 
 
+# Uncomment the line below to try progressive_deepening with a transposition
+# table shared across the levels, printing the table's hit rate at each level:
+
+# progressive_deepening(state_UHOH, heuristic_fn=heuristic_connectfour, depth_limit=4, table=TranspositionTable(), report_table=True).pretty_print()
+
+
+def progressive_deepening_timed(state, heuristic_fn=always_zero, time_limit=1000,
+                                depth_limit=INF, maximize=True, table=None,
+                                ordering=None) :
+    """Runs progressive deepening for at most time_limit milliseconds (and at
+    most depth_limit levels), updating anytime_value after every level that
+    finishes in time.  The level that is still running when time is up is
+    abandoned.  The first level is always finished, so that there is a move to
+    make.  Stops early if a level is decided without reaching the depth limit
+    anywhere, since deeper levels would give the same answer. Returns
+    anytime_value."""
+    deadline = monotonic() + time_limit / 1000.0
+    anytime_value = AnytimeValue()
+    if table is not None:
+        table.new_search()
+    if ordering is not None:
+        ordering.new_search()
+    reached_depth_limit = [True]
+    def watched_heuristic_fn(snapshot, maximize):
+        reached_depth_limit[0] = True
+        return heuristic_fn(snapshot, maximize)
+    depth = 0
+    while depth < depth_limit and reached_depth_limit[0]:
+        reached_depth_limit[0] = False
+        try:
+            line, score, evals = alphabeta_in_place(
+                state.copy_for_moves(), -INF, INF, watched_heuristic_fn, depth+1,
+                maximize, table, ordering, deadline=deadline if depth else None)
+        except SearchTimeout:
+            break
+        value = (line_to_path(state, line), score, evals)
+        anytime_value.set_value(value)
+        depth += 1
+        if ordering is not None:
+            ordering.set_principal_variation(value[0])
+    return anytime_value
+
+
+# Uncomment the line below to try progressive_deepening_timed with "BOARD_UHOH"
+# and a budget of 500 milliseconds:
+
+# progressive_deepening_timed(state_UHOH, heuristic_fn=heuristic_connectfour, time_limit=500, table=TranspositionTable(), ordering=MoveOrdering()).pretty_print()
+
+
+def compare_move_ordering(states=None, heuristic_fn=heuristic_connectfour,
+                          depth_limit=4, ordering_fn=MoveOrdering):
+    """Runs progressive_deepening on each state with the default move order and
+    with the move ordering returned by ordering_fn(), and prints how many
+    static evaluations the ordering saved.  Returns a list of (plain evals,
+    ordered evals) pairs, one per state."""
+    if states is None:
+        states = [state_UHOH, state_starting_connectfour]
+    counts = list()
+    for state in states:
+        plain = progressive_deepening(state, heuristic_fn, depth_limit)
+        ordered = progressive_deepening(state, heuristic_fn, depth_limit,
+                                        ordering=ordering_fn())
+        if plain.get_value()[1] != ordered.get_value()[1]:
+            raise ValueError("Move ordering changed the minimax score from "
+                             + str(plain.get_value()[1]) + " to "
+                             + str(ordered.get_value()[1]) + ".")
+        before, after = plain.total_evaluations, ordered.total_evaluations
+        print('%i -> %i static evaluations (saved %i, %.1f%%)'
+              % (before, after, before - after,
+                 100.0 * (before - after) / before if before else 0.0))
+        counts.append((before, after))
+    return counts
+
+
+# Uncomment the line below to see how many static evaluations move ordering
+# saves on "BOARD_UHOH" and the starting board, with depth_limit=4:
+
+# compare_move_ordering(depth_limit=4)
+
+
 # Progressive deepening is NOT optional. However, you may find that 
 #  the tests for progressive deepening take a long time. If you would
 #  like to temporarily bypass them, set this variable False. You will,
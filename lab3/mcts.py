@@ -0,0 +1,262 @@
+# MIT 6.034 Lab 3: Games
+
+# Monte Carlo tree search (UCT) over AbstractGameStates.  Instead of searching
+# every move to a fixed depth, MCTS plays many random games ("rollouts") from
+# the current state, and grows a search tree towards the moves that win most
+# often, balancing the moves that look best against moves that have been tried
+# only a few times.
+#
+# By default only the sign of an endgame score matters: each rollout is a win,
+# a draw or a loss for the player to move at the root.  Rollouts can be guided by a
+# heuristic that scores boards for the player who has just moved, and the
+# search tree can be kept from one move to the next.
+
+import random
+from math import log, sqrt
+from time import monotonic
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_ITERATIONS = 1000
+
+
+class Node :
+    """A node in the search tree.  wins and visits count the rollouts through
+    this node, from the point of view of the player who made move."""
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, move=None, parent=None) :
+        self.move = move
+        self.parent = parent
+        self.children = {}
+        self.untried = None  # moves not yet expanded, once the node is visited
+        self.visits = 0
+        self.wins = 0.0
+
+    def uct_child(self, exploration) :
+        "Returns the child with the highest upper confidence bound."
+        log_visits = log(self.visits)
+        def ucb(child) :
+            return (child.wins / child.visits
+                    + exploration * sqrt(log_visits / child.visits))
+        return max(self.children.values(), key=ucb)
+
+    def most_visited_child(self) :
+        return max(self.children.values(), key=lambda child: child.visits)
+
+    def __str__(self) :
+        return ("<Node for move %s with %i/%i wins and %i children>"
+                % (self.move, self.wins, self.visits, len(self.children)))
+    __repr__ = __str__
+
+
+def reward(score) :
+    "Converts an endgame score to a win (1), draw (0.5) or loss (0)."
+    return 1.0 if score > 0 else 0.0 if score < 0 else 0.5
+
+
+class MonteCarloTreeSearch :
+    """Chooses moves by Monte Carlo tree search with the UCT selection rule.
+
+    exploration is the UCT exploration constant.  If heuristic_fn is given,
+    rollouts play the move that heuristic_fn likes best for the player to move
+    (except for a random move with probability epsilon) instead of a random
+    move.  heuristic_fn(snapshot, False) must score the snapshot for the
+    player who has just moved, whichever player that is, as
+    heuristic_connectfour_for_mover does.  (heuristic_connectfour itself
+    scores every board for the same piece type, so rollouts guided by it
+    would favour that player.)
+
+    If reuse_tree is True, the statistics for a state reached from the last
+    searched state (by up to two moves) are kept.  With num_workers > 1, each
+    search is run in that many processes on separate trees, whose root
+    statistics are added up (root parallelization); the tree is not reused.
+    The heuristic and the state's functions must then be picklable.
+
+    reward_fn converts the maximizer's endgame score to a reward between 0
+    and 1; the default counts wins, draws and losses."""
+
+    def __init__(self, exploration=sqrt(2), heuristic_fn=None, epsilon=0.5,
+                 reuse_tree=True, num_workers=1, seed=None, reward_fn=reward) :
+        self.exploration = exploration
+        self.heuristic_fn = heuristic_fn
+        self.epsilon = epsilon
+        self.reward_fn = reward_fn
+        self.reuse_tree = reuse_tree
+        self.num_workers = num_workers
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.root = None
+        self.root_state = None
+        self.iterations = 0
+
+    def reset(self) :
+        "Forgets the search tree."
+        self.root = None
+        self.root_state = None
+        return self
+
+    def search(self, state, iterations=None, time_limit=None) :
+        """Searches from state for the given number of iterations, or for
+        time_limit milliseconds, or whichever ends first if both are given
+        (DEFAULT_ITERATIONS if neither is).  Returns the best move: a move of
+        state.legal_moves(), for use with state.next_state."""
+        if not state.legal_moves() :
+            raise ValueError("Can't search from a state where the game is over.")
+        if iterations is None and time_limit is None :
+            iterations = DEFAULT_ITERATIONS
+        if self.num_workers > 1 :
+            return self.search_parallel(state, iterations, time_limit)
+        root = self.find_subtree(state) if self.reuse_tree else None
+        self.root = root or Node()
+        self.root_state = state
+        self.iterations = 0
+        deadline = None if time_limit is None else monotonic() + time_limit / 1000.0
+        position = state.copy_for_moves()
+        while ((iterations is None or self.iterations < iterations)
+               and (deadline is None or monotonic() < deadline)) :
+            self.run_iteration(position)
+            self.iterations += 1
+        return self.root.most_visited_child().move
+
+    def choose_next_state(self, state, iterations=None, time_limit=None) :
+        "Like search, but returns the state that the best move leads to."
+        return state.next_state(self.search(state, iterations, time_limit))
+
+    def run_iteration(self, position) :
+        """Selects a path down the tree, expands one node, plays a rollout to
+        the end of the game and records its result, making moves on position
+        and undoing them all before returning."""
+        node = self.root
+        depth = 0
+        while node.untried == [] and node.children :
+            node = node.uct_child(self.exploration)
+            position.make_move(node.move)
+            depth += 1
+        if node.untried is None :
+            node.untried = position.legal_moves()
+            self.random.shuffle(node.untried)
+        if node.untried :
+            move = node.untried.pop()
+            child = Node(move, node)
+            node.children[move] = child
+            node = child
+            position.make_move(move)
+            depth += 1
+        plies = self.rollout(position)
+        # the root player is the maximizer, and is to move at even depths
+        score = self.reward_fn(position.endgame_score_fn(position.snapshot,
+                                                 (depth + plies) % 2 == 0))
+        for _ in range(depth + plies) :
+            position.undo_move()
+        while node is not None :
+            node.visits += 1
+            # node.move was made by the root player if depth is odd
+            node.wins += score if depth % 2 == 1 else 1 - score
+            node = node.parent
+            depth -= 1
+
+    def rollout(self, position) :
+        "Plays moves on position until the game ends.  Returns the number of moves."
+        plies = 0
+        moves = position.legal_moves()
+        while moves :
+            if self.heuristic_fn is None or self.random.random() < self.epsilon :
+                move = self.random.choice(moves)
+            else :
+                move = self.heuristic_move(position, moves)
+            position.make_move(move)
+            plies += 1
+            moves = position.legal_moves()
+        return plies
+
+    def heuristic_move(self, position, moves) :
+        """Returns the move that heuristic_fn scores highest for the player to
+        move, breaking ties at random."""
+        best_moves, best_score = [], None
+        for move in moves :
+            position.make_move(move)
+            # the player to move now is the maximizer's opponent
+            if position.legal_moves() :
+                score = self.heuristic_fn(position.snapshot, False)
+            else :
+                score = position.endgame_score_fn(position.snapshot, False)
+            position.undo_move()
+            if best_score is None or score > best_score :
+                best_moves, best_score = [move], score
+            elif score == best_score :
+                best_moves.append(move)
+        return self.random.choice(best_moves)
+
+    def find_subtree(self, state) :
+        """Returns the node for state if it is the last searched state or is
+        reached from it in one or two moves, detached from its parent;
+        otherwise None."""
+        if (self.root is None
+            or type(self.root_state.snapshot) is not type(state.snapshot)) :
+            return None
+        level = [(self.root, self.root_state)]
+        for _ in range(3) :
+            next_level = []
+            for node, node_state in level :
+                if node_state == state :
+                    node.parent = None
+                    node.move = None
+                    return node
+                for move, child in node.children.items() :
+                    next_level.append((child, node_state.next_state(move)))
+            level = next_level
+        return None
+
+    def search_parallel(self, state, iterations, time_limit) :
+        """Runs num_workers independent searches in separate processes and
+        returns the move with the most visits over all of them."""
+        seeds = [self.random.getrandbits(32) for _ in range(self.num_workers)]
+        with ProcessPoolExecutor(max_workers=self.num_workers) as pool :
+            futures = [pool.submit(search_worker, state, self.exploration,
+                                   self.heuristic_fn, self.epsilon, seed,
+                                   self.reward_fn, iterations, time_limit)
+                       for seed in seeds]
+            results = [future.result() for future in futures]
+        self.root = Node()
+        self.root_state = state
+        self.iterations = 0
+        for root_stats, worker_iterations in results :
+            self.iterations += worker_iterations
+            for move, (visits, wins) in root_stats.items() :
+                child = self.root.children.setdefault(move, Node(move, self.root))
+                child.visits += visits
+                child.wins += wins
+        self.root.visits = sum(child.visits for child in self.root.children.values())
+        self.root.untried = []
+        return self.root.most_visited_child().move
+
+    def get_statistics(self) :
+        """Returns a dictionary sending each move searched from the last
+        searched state to its (visits, wins)."""
+        if self.root is None :
+            return {}
+        return {move : (child.visits, child.wins)
+                for move, child in self.root.children.items()}
+
+    def __str__(self) :
+        return ("<MonteCarloTreeSearch with exploration %s, %i iterations in last search>"
+                % (self.exploration, self.iterations))
+    __repr__ = __str__
+
+
+def search_worker(state, exploration, heuristic_fn, epsilon, seed, reward_fn,
+                  iterations, time_limit) :
+    """Runs one search in a worker process.  Returns the root statistics and
+    the number of iterations."""
+    mcts = MonteCarloTreeSearch(exploration, heuristic_fn, epsilon,
+                                reuse_tree=False, seed=seed, reward_fn=reward_fn)
+    mcts.search(state, iterations, time_limit)
+    return mcts.get_statistics(), mcts.iterations
+
+
+# Uncomment the lines below to choose a move for "BOARD_UHOH" with 2000
+# iterations of MCTS, with rollouts guided by the Connect Four heuristic:
+
+# from lab3 import state_UHOH, heuristic_connectfour_for_mover
+# mcts = MonteCarloTreeSearch(heuristic_fn=heuristic_connectfour_for_mover)
+# print(mcts.search(state_UHOH, iterations=2000), mcts.get_statistics())
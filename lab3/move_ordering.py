@@ -0,0 +1,92 @@
+# MIT 6.034 Lab 3: Games
+
+# Move ordering for alpha-beta search.  Alpha-beta prunes the most when the
+# best move is searched first, so this tries, in order: the move stored in the
+# transposition table, the previous iteration's principal variation, killer
+# moves (moves that caused a cutoff at the same ply), and then the remaining
+# moves by history score, with centre columns first for Connect Four.
+#
+# Moves are those of AbstractGameState.legal_moves: columns for Connect Four,
+# child indexes for other games.
+
+from game_api import is_class_instance
+
+INF = float('inf')
+
+
+def path_moves(path) :
+    """Given a list of AbstractGameStates, each a child of the one before,
+    returns the list of moves leading from each state to the next."""
+    moves = []
+    for parent, child in zip(path, path[1:]) :
+        index = parent.generate_next_states().index(child)
+        moves.append(parent.legal_moves()[index])
+    return moves
+
+
+class MoveOrdering :
+    """Orders the moves at a node for alpha-beta search, and learns from the
+    cutoffs that happen during the search."""
+
+    def __init__(self, use_pv=True, use_killers=True, use_history=True,
+                 centre_first=True, num_killers=2) :
+        self.use_pv = use_pv
+        self.use_killers = use_killers
+        self.use_history = use_history
+        self.centre_first = centre_first
+        self.num_killers = num_killers
+        self.new_search()
+
+    def new_search(self) :
+        "Forgets the principal variation, killer moves and history scores."
+        self.principal_variation = []
+        self.killers = {}
+        self.history = {}
+        return self
+
+    def set_principal_variation(self, path) :
+        """Records the moves along path (a list of AbstractGameStates starting
+        at the root), to be tried first in the next iteration."""
+        self.principal_variation = path_moves(path)
+        return self
+
+    def pv_move(self, ply, on_pv) :
+        "Returns the principal-variation move at this ply, if still on the PV."
+        if self.use_pv and on_pv and ply < len(self.principal_variation) :
+            return self.principal_variation[ply]
+        return None
+
+    def order(self, state, moves, ply=0, on_pv=False, table_move=None) :
+        """Returns the list of moves (legal moves of state) in the order they
+        should be searched.  table_move is the best move stored in the
+        transposition table, if any."""
+        pv = self.pv_move(ply, on_pv)
+        killers = self.killers.get(ply, []) if self.use_killers else []
+        centre = None
+        if (self.centre_first
+            and is_class_instance(state.get_snapshot(), 'ConnectFourBoard')) :
+            centre = state.get_snapshot().num_cols // 2
+        def priority(move) :
+            return (move == table_move,
+                    move == pv,
+                    move in killers and len(killers) - killers.index(move),
+                    self.history.get(move, 0) if self.use_history else 0,
+                    -abs(move - centre) if centre is not None else 0)
+        return sorted(moves, key=priority, reverse=True)
+
+    def record_cutoff(self, move, ply, depth_limit) :
+        "Records that the move caused a beta (or alpha) cutoff at this ply."
+        if self.use_killers :
+            killers = self.killers.setdefault(ply, [])
+            if move in killers :
+                killers.remove(move)
+            killers.insert(0, move)
+            del killers[self.num_killers:]
+        if self.use_history :
+            weight = depth_limit * depth_limit if depth_limit != INF else 1
+            self.history[move] = self.history.get(move, 0) + weight
+
+    def __str__(self) :
+        return ("<MoveOrdering with PV %s, %i killer plies, %i history moves>"
+                % (self.principal_variation, len(self.killers), len(self.history)))
+    __repr__ = __str__
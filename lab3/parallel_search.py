@@ -0,0 +1,191 @@
+# MIT 6.034 Lab 3: Games
+
+# Parallel alpha-beta search that splits the root moves across processes.
+# The first child ("eldest brother") is searched serially to get a good bound;
+# the remaining children are then searched in parallel, each starting from the
+# best bound found so far by any worker.
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from game_api import always_zero
+from lab3 import minimax_search_alphabeta, INF
+
+# The best exact root score found so far, shared by the worker processes
+# (alpha if the root maximizes, beta if it minimizes).  Once the root is cut
+# off, the main process sets it to the cutoff score, and the workers that are
+# still searching notice and stop.
+shared_bound = None
+
+def init_worker(bound) :
+    global shared_bound
+    shared_bound = bound
+
+class SearchCutOff(Exception) :
+    "Raised in a worker whose search is no longer needed."
+    pass
+
+def is_cut_off(maximize, alpha, beta) :
+    "Returns True if the shared bound shows that the root has been cut off."
+    if shared_bound is None :
+        return False
+    return shared_bound.value >= beta if maximize else shared_bound.value <= alpha
+
+class CutOffCheck :
+    """Wraps a state's is_game_over_fn, which the search calls at every node,
+    so that every 256 calls it checks whether the root has been cut off and
+    raises SearchCutOff if it has."""
+
+    def __init__(self, is_game_over_fn, maximize, alpha, beta) :
+        self.is_game_over_fn = is_game_over_fn
+        self.maximize = maximize
+        self.alpha = alpha
+        self.beta = beta
+        self.calls = 0
+
+    def __call__(self, snapshot) :
+        self.calls += 1
+        if not self.calls & 255 and is_cut_off(self.maximize, self.alpha, self.beta) :
+            raise SearchCutOff()
+        return self.is_game_over_fn(snapshot)
+
+def search_root_child(child, heuristic_fn, depth_limit, maximize, alpha, beta) :
+    """Searches one child of the root in a worker process, tightening the
+    window with the shared bound first and publishing the child's score
+    afterwards if it is exact and improves on the shared bound.  Raises
+    SearchCutOff if the root is cut off before the search is done.  Returns
+    the search result and the window it was searched with."""
+    if shared_bound is not None :
+        with shared_bound.get_lock() :
+            if maximize :
+                alpha = max(alpha, shared_bound.value)
+            else :
+                beta = min(beta, shared_bound.value)
+    if is_cut_off(maximize, alpha, beta) :
+        raise SearchCutOff()
+    is_game_over_fn = child.is_game_over_fn
+    child.is_game_over_fn = CutOffCheck(is_game_over_fn, maximize, alpha, beta)
+    result = minimax_search_alphabeta(child, alpha, beta, heuristic_fn,
+                                      depth_limit - 1, not maximize)
+    # the states on the path were made from child, and share its function
+    for path_state in result[0] :
+        path_state.is_game_over_fn = is_game_over_fn
+    if shared_bound is not None and alpha < result[1] < beta :
+        with shared_bound.get_lock() :
+            if maximize and result[1] > shared_bound.value :
+                shared_bound.value = result[1]
+            elif not maximize and result[1] < shared_bound.value :
+                shared_bound.value = result[1]
+    return result, alpha, beta
+
+
+def minimax_search_alphabeta_parallel(state, alpha=-INF, beta=INF,
+                                      heuristic_fn=always_zero, depth_limit=INF,
+                                      maximize=True, max_workers=None,
+                                      num_eldest=1) :
+    """Performs minimax with alpha-beta pruning, searching the children of the
+    root in parallel in up to max_workers processes after the first
+    num_eldest children have been searched serially.  Same return type as
+    dfs_maximizing.
+
+    Returns the same best move and score as minimax_search_alphabeta whenever
+    the score lies strictly between alpha and beta (always true for the
+    default window); the number of evaluations depends on the order in which
+    workers finish.  The heuristic and the state's functions must be
+    picklable, i.e. defined at the top level of a module."""
+    if state.is_game_over() or depth_limit == 0 :
+        return minimax_search_alphabeta(state, alpha, beta, heuristic_fn,
+                                        depth_limit, maximize)
+    children = state.generate_next_states()
+    # windows[i] is the (alpha, beta) window that children[i] was searched with
+    results = [None] * len(children)
+    windows = [None] * len(children)
+    best = alpha if maximize else beta
+
+    def record(index, result, window) :
+        nonlocal best
+        results[index] = result
+        windows[index] = window
+        if maximize :
+            best = max(best, result[1])
+        else :
+            best = min(best, result[1])
+
+    for index in range(min(num_eldest, len(children))) :
+        window = (best, beta) if maximize else (alpha, best)
+        record(index, minimax_search_alphabeta(children[index], window[0],
+                                               window[1], heuristic_fn,
+                                               depth_limit - 1, not maximize),
+               window)
+        if (best >= beta) if maximize else (best <= alpha) :
+            return finish(state, children, results, windows, heuristic_fn,
+                          depth_limit, maximize, alpha, beta)
+
+    remaining = [i for i in range(len(children)) if results[i] is None]
+    if remaining :
+        bound = multiprocessing.Value('d', best)
+        workers = min(max_workers or multiprocessing.cpu_count(), len(remaining))
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                   initargs=(bound,))
+        cut_off = False
+        try :
+            futures = {}
+            for index in remaining :
+                window = (best, beta) if maximize else (alpha, best)
+                futures[pool.submit(search_root_child, children[index],
+                                    heuristic_fn, depth_limit, maximize,
+                                    *window)] = index
+            for future in as_completed(futures) :
+                result, child_alpha, child_beta = future.result()
+                record(futures[future], result, (child_alpha, child_beta))
+                if (best >= beta) if maximize else (best <= alpha) :
+                    # Tell the running workers to stop, and don't wait for them.
+                    with bound.get_lock() :
+                        bound.value = best
+                    cut_off = True
+                    break
+        finally :
+            pool.shutdown(wait=not cut_off, cancel_futures=cut_off)
+    return finish(state, children, results, windows, heuristic_fn,
+                  depth_limit, maximize, alpha, beta)
+
+def finish(state, children, results, windows, heuristic_fn, depth_limit,
+           maximize, alpha, beta) :
+    """Picks the child that the serial search would pick: the first child
+    whose exact score equals the best score.  Children searched with a
+    tighter window than the serial search would have used only returned a
+    bound; any earlier child whose bound ties with the best score is searched
+    again with the full window to see whether it really is as good."""
+    searched = [i for i in range(len(children)) if results[i] is not None]
+    evals = sum(results[i][2] for i in searched)
+    score = (max if maximize else min)(results[i][1] for i in searched)
+    def is_exact(i) :
+        return windows[i][0] < results[i][1] < windows[i][1]
+    exact = [i for i in searched if is_exact(i) and results[i][1] == score]
+    if not exact :
+        # The score is outside the root window; all we have is a bound.
+        chosen = [results[i] for i in searched if results[i][1] == score][0]
+        return ([state] + chosen[0], chosen[1], evals)
+    chosen_index = exact[0]
+    for i in searched :
+        if i >= chosen_index :
+            break
+        if is_exact(i) or results[i][1] != score :
+            continue
+        result = minimax_search_alphabeta(children[i], alpha, beta, heuristic_fn,
+                                          depth_limit - 1, not maximize)
+        evals += result[2]
+        if result[1] == score :
+            results[i] = result
+            chosen_index = i
+            break
+    chosen = results[chosen_index]
+    return ([state] + chosen[0], chosen[1], evals)
+
+
+# Uncomment the lines below to compare the parallel and serial searches on the
+# starting board.  (On Windows and macOS, code that starts worker processes
+# must be run under "if __name__ == '__main__':".)
+
+# from lab3 import state_starting_connectfour, heuristic_connectfour
+# print(minimax_search_alphabeta_parallel(state_starting_connectfour, heuristic_fn=heuristic_connectfour, depth_limit=6)[1:])
+# print(minimax_search_alphabeta(state_starting_connectfour, heuristic_fn=heuristic_connectfour, depth_limit=6)[1:])
@@ -9,6 +9,9 @@
 from game_api import *
 from boards import *
 from lab3 import *
+from solver import Solver, SolverTimeout, best_move_board
+from mcts import MonteCarloTreeSearch
+from time import monotonic
 
 TESTING = False
 QUIT = ['q', 'Q', 'quit', 'Quit', 'QUIT']
@@ -22,7 +25,8 @@ def new_state(snap=None):
         snapshot=board,
         is_game_over_fn=is_game_over_connectfour,
         generate_next_states_fn=next_boards_connectfour,
-        endgame_score_fn=endgame_score_connectfour_faster)
+        endgame_score_fn=endgame_score_connectfour_faster,
+        in_place_moves=True)
     return state_starting_connectfour
 
 
@@ -33,8 +37,12 @@ def start_game():
         player_name = 'Hunter'
         player_goes_first = True
         depth_limit = 4
+        time_limit = None
+        solver = None
+        mcts = None
     else:
-        player_name, player_goes_first, depth_limit = say_hi()
+        (player_name, player_goes_first, depth_limit, time_limit, solver,
+         mcts) = say_hi()
     players_move = player_goes_first
     cont = True
     while cont:
@@ -43,7 +51,7 @@ def start_game():
             print_board_state(state)
             state, cont = player_turn(state)
         else:
-            state = ai_turn(state, depth_limit)
+            state = ai_turn(state, depth_limit, time_limit, solver, mcts)
 
         # If the player wants to exit
         if cont is False:
@@ -95,9 +103,32 @@ def print_ai_move(state):
     print('\nAI move:', description)
 
 
-def ai_turn(state, depth_limit):
-    alphabeta_ret = minimax_search_alphabeta(
-        state, -INF, INF, heuristic_connectfour, depth_limit)
+def ai_turn(state, depth_limit, time_limit=None, solver=None, mcts=None):
+    # With a solver (which needs a time limit), play perfectly if the position
+    # can be solved in time; otherwise fall back to searching for the time
+    # that is left.  Without an opening book the solver rarely finishes before
+    # about 18 stones have been played, so early moves come from the fallback.
+    if solver is not None and time_limit is not None:
+        deadline = monotonic() + time_limit / 1000
+        try:
+            col = best_move_board(state.snapshot, solver, deadline)
+        except SolverTimeout:
+            time_limit = max(1000 * (deadline - monotonic()), 1)
+        else:
+            new_state = state.next_state(col)
+            print_ai_move(new_state)
+            return new_state
+    if mcts is not None:
+        new_state = mcts.choose_next_state(state, time_limit=time_limit)
+        print_ai_move(new_state)
+        return new_state
+    if time_limit is None:
+        alphabeta_ret = minimax_search_alphabeta(
+            state, -INF, INF, heuristic_connectfour, depth_limit)
+    else:
+        alphabeta_ret = progressive_deepening_timed(
+            state, heuristic_connectfour, time_limit, depth_limit,
+            table=TranspositionTable(), ordering=MoveOrdering()).get_value()
     new_state = alphabeta_ret[0][1]
     print_ai_move(new_state)
     return new_state
@@ -171,10 +202,48 @@ def say_hi():
         if depth_limit is None or depth_limit < 1:
             depth_limit = None
             print("Oops, please give an integer value >= 1.")
+    print("\nHow many milliseconds may the bot think per move?")
+    print("(With a time limit, the bot searches deeper and deeper until time")
+    print(" runs out, up to the depth limit. Press enter for no time limit.)")
+    time_limit = None
+    while True:
+        inp = input(">>> ")
+        if inp == '':
+            break
+        try:
+            time_limit = int(inp)
+        except:
+            pass
+        if time_limit is not None and time_limit >= 1:
+            break
+        time_limit = None
+        print("Oops, please give an integer value >= 1, or press enter.")
+    solver = None
+    if time_limit is not None:
+        print("\nShould the bot play perfectly when it can solve the position in time?")
+        while True:
+            inp = input(">>> ")
+            if inp in YES:
+                solver = Solver()
+                break
+            elif inp in NO:
+                break
+            print("Oops, please type either 'yes' or 'no'.")
+    print("\nShould the bot use Monte Carlo tree search instead of alpha-beta search?")
+    print("(It plays out many quick games to pick its moves, ignoring the depth limit.)")
+    mcts = None
+    while True:
+        inp = input(">>> ")
+        if inp in YES:
+            mcts = MonteCarloTreeSearch(heuristic_fn=heuristic_connectfour_for_mover)
+            break
+        elif inp in NO:
+            break
+        print("Oops, please type either 'yes' or 'no'.")
     print("\nCool. Type 'q' at any point to quit (or <Ctrl-c>)")
     print("Let's play Connect 4!")
     print("\n\n")
-    return name, first, depth_limit
+    return name, first, depth_limit, time_limit, solver, mcts
 
 
 if __name__ == '__main__':
@@ -0,0 +1,418 @@
+# MIT 6.034 Lab 3: Games
+
+# A perfect-play Connect Four solver.  Positions are stored as bitboards;
+# the solver uses negamax with alpha-beta pruning, a null-window (binary)
+# search for the exact score, a transposition table, and optionally an opening
+# book of precomputed scores.
+#
+# Scores follow the usual convention for solved Connect Four: 0 is a draw,
+# a positive score means the player to move can win, and a negative score
+# means they will lose.  The magnitude is larger for faster wins: winning
+# with your k-th stone scores (num_cols * num_rows + 2 - k) // 2.
+
+import struct
+from array import array
+from bisect import bisect_left
+from time import monotonic
+from game_api import ConnectFourBoard
+
+WIDTH = ConnectFourBoard.num_cols
+HEIGHT = ConnectFourBoard.num_rows
+SIZE = WIDTH * HEIGHT
+MIN_SCORE = -(SIZE // 2) + 3
+MAX_SCORE = (SIZE + 1) // 2 - 3
+
+# Each column uses HEIGHT + 1 bits, bottom row first; the extra bit on top of
+# each column is always 0, so that shifting finds alignments without wrapping.
+def column_mask(col) :
+    return ((1 << HEIGHT) - 1) << (col * (HEIGHT + 1))
+
+def bottom_mask_col(col) :
+    return 1 << (col * (HEIGHT + 1))
+
+def top_mask_col(col) :
+    return 1 << (HEIGHT - 1 + col * (HEIGHT + 1))
+
+BOTTOM_MASK = sum(bottom_mask_col(col) for col in range(WIDTH))
+BOARD_MASK = BOTTOM_MASK * ((1 << HEIGHT) - 1)
+COLUMN_MASKS = [column_mask(col) for col in range(WIDTH)]
+# Columns to try first: centre columns take part in more alignments.
+COLUMN_ORDER = sorted(range(WIDTH), key=lambda col: abs(col - WIDTH // 2))
+
+# Without a book, the solver is only fast late in a game: it usually takes
+# well under a second once about 18 stones have been played, but positions
+# with a dozen or fewer stones (such as BOARD_UHOH) can take minutes or more.
+# No book comes with the lab, because even the smallest one built from
+# Position() needs the empty board solved.  To use one, build it offline with
+# build_opening_book(max_moves, path) and pass OpeningBook.load(path) to
+# Solver.
+
+
+def popcount(x) :
+    return bin(x).count('1')
+
+def winning_positions(position, mask) :
+    """Returns a bitmap of the empty squares where the player whose stones
+    are in position would complete an alignment of four."""
+    # vertical
+    r = (position << 1) & (position << 2) & (position << 3)
+    for shift in (HEIGHT + 1, HEIGHT, HEIGHT + 2) : # horizontal, both diagonals
+        p = (position << shift) & (position << 2 * shift)
+        r |= p & (position << 3 * shift)
+        r |= p & (position >> shift)
+        p = (position >> shift) & (position >> 2 * shift)
+        r |= p & (position << shift)
+        r |= p & (position >> 3 * shift)
+    return r & (BOARD_MASK ^ mask)
+
+def has_alignment(position) :
+    "Returns True if the stones in position include four in a row."
+    for shift in (1, HEIGHT + 1, HEIGHT, HEIGHT + 2) :
+        pairs = position & (position >> shift)
+        if pairs & (pairs >> 2 * shift) :
+            return True
+    return False
+
+def mirror(bits) :
+    "Returns the bitmap reflected left-to-right."
+    result = 0
+    for col in range(WIDTH) :
+        result |= ((bits >> (col * (HEIGHT + 1))) & COLUMN_MASKS[0]) \
+                  << ((WIDTH - 1 - col) * (HEIGHT + 1))
+    return result
+
+
+class SolverTimeout(Exception) :
+    "Raised when the solver runs past its deadline."
+    pass
+
+
+class Position :
+    """A Connect Four position as bitboards: the stones of the player to move,
+    all stones, and the number of moves played."""
+
+    __slots__ = ('current', 'mask', 'moves')
+
+    def __init__(self, current=0, mask=0, moves=0) :
+        self.current = current
+        self.mask = mask
+        self.moves = moves
+
+    @staticmethod
+    def from_board(board) :
+        """Returns the Position for a ConnectFourBoard.  Raises ValueError if
+        the game on the board is already over."""
+        to_move = board.__piece_type__()
+        current = mask = moves = 0
+        for r, row in enumerate(board.board_array) :
+            for c, piece in enumerate(row) :
+                if piece is not None :
+                    bit = 1 << (c * (HEIGHT + 1) + (HEIGHT - 1 - r))
+                    mask |= bit
+                    moves += 1
+                    if piece == to_move :
+                        current |= bit
+        position = Position(current, mask, moves)
+        if has_alignment(current) or has_alignment(mask ^ current) or moves == SIZE :
+            raise ValueError("Can't solve a board whose game is already over.")
+        return position
+
+    def copy(self) :
+        return Position(self.current, self.mask, self.moves)
+
+    def can_play(self, col) :
+        return (self.mask & top_mask_col(col)) == 0
+
+    def play_col(self, col) :
+        self.play((self.mask + bottom_mask_col(col)) & COLUMN_MASKS[col])
+
+    def play(self, move) :
+        "Plays a move given as a single-bit bitmap."
+        self.current ^= self.mask
+        self.mask |= move
+        self.moves += 1
+
+    def possible(self) :
+        "Returns a bitmap of the squares where a stone can be played."
+        return (self.mask + BOTTOM_MASK) & BOARD_MASK
+
+    def can_win_next(self) :
+        return bool(winning_positions(self.current, self.mask) & self.possible())
+
+    def is_winning_col(self, col) :
+        return bool(winning_positions(self.current, self.mask)
+                    & self.possible() & COLUMN_MASKS[col])
+
+    def possible_non_losing_moves(self) :
+        """Returns a bitmap of the moves that don't let the opponent win
+        immediately, assuming the player to move can't win immediately."""
+        possible = self.possible()
+        opponent_win = winning_positions(self.current ^ self.mask, self.mask)
+        forced = possible & opponent_win
+        if forced :
+            if forced & (forced - 1) :
+                return 0 # the opponent has two winning moves
+            possible = forced
+        return possible & ~(opponent_win >> 1)
+
+    def move_score(self, move) :
+        "Returns the number of winning squares the player would have after move."
+        return popcount(winning_positions(self.current | move, self.mask))
+
+    def key(self) :
+        return self.current + self.mask
+
+    def canonical_key(self) :
+        "Returns the smaller of the keys of this position and its mirror image."
+        return min(self.key(), mirror(self.current) + mirror(self.mask))
+
+
+class OpeningBook :
+    """Exact scores for positions near the start of the game, keyed by
+    canonical (mirror-symmetric) position key.
+
+    On disk, a book is a header (magic, version, width, height, maximum number
+    of moves, number of entries) followed by the sorted keys as little-endian
+    unsigned 64-bit integers and then the scores as signed bytes, so each
+    position takes 9 bytes."""
+
+    MAGIC = b'C4BK'
+    VERSION = 1
+    HEADER = struct.Struct('<4sBBBBI')
+
+    def __init__(self, keys=None, scores=None, max_moves=0) :
+        self.keys = keys if keys is not None else array('Q')
+        self.scores = scores if scores is not None else array('b')
+        self.max_moves = max_moves
+
+    def get(self, position) :
+        "Returns the position's score, or None if it isn't in the book."
+        if position.moves > self.max_moves :
+            return None
+        key = position.canonical_key()
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key :
+            return self.scores[i]
+        return None
+
+    def save(self, path) :
+        with open(path, 'wb') as f :
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, WIDTH, HEIGHT,
+                                     self.max_moves, len(self.keys)))
+            keys = array('Q', self.keys)
+            if struct.pack('=H', 1) != struct.pack('<H', 1) :
+                keys.byteswap()
+            f.write(keys.tobytes())
+            f.write(self.scores.tobytes())
+
+    @classmethod
+    def load(cls, path) :
+        with open(path, 'rb') as f :
+            data = f.read()
+        magic, version, width, height, max_moves, count = \
+            cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.VERSION :
+            raise ValueError(str(path) + " is not a Connect Four opening book.")
+        if (width, height) != (WIDTH, HEIGHT) :
+            raise ValueError("Opening book is for a %ix%i board, not %ix%i."
+                             % (width, height, WIDTH, HEIGHT))
+        start = cls.HEADER.size
+        keys = array('Q')
+        keys.frombytes(data[start:start + 8 * count])
+        if struct.pack('=H', 1) != struct.pack('<H', 1) :
+            keys.byteswap()
+        scores = array('b')
+        scores.frombytes(data[start + 8 * count:start + 9 * count])
+        return cls(keys, scores, max_moves)
+
+    def __len__(self) :
+        return len(self.keys)
+
+    def __str__(self) :
+        return ("<OpeningBook with %i positions of up to %i moves>"
+                % (len(self), self.max_moves))
+    __repr__ = __str__
+
+
+class Solver :
+    """Finds exact scores of Connect Four positions, looking them up in book
+    (if given) where it can.  The transposition table is kept between calls and cleared
+    when it grows past table_size."""
+
+    def __init__(self, book=None, table_size=2**20) :
+        self.book = book
+        self.table_size = table_size
+        self.table = {}
+        self.node_count = 0
+        self.deadline = None
+
+    def reset(self) :
+        self.table.clear()
+        self.node_count = 0
+
+    def negamax(self, position, alpha, beta) :
+        """Returns the score of position if it lies strictly between alpha
+        and beta; otherwise an upper bound <= alpha or lower bound >= beta.
+        Assumes the player to move can't win immediately."""
+        self.node_count += 1
+        if (self.deadline is not None and not self.node_count & 1023
+            and monotonic() > self.deadline) :
+            raise SolverTimeout()
+        moves = position.moves
+        non_losing = position.possible_non_losing_moves()
+        if not non_losing :
+            return -((SIZE - moves) // 2)
+        if moves >= SIZE - 2 :
+            return 0
+        lowest = -((SIZE - 2 - moves) // 2)
+        if alpha < lowest :
+            alpha = lowest
+            if alpha >= beta :
+                return alpha
+        highest = (SIZE - 1 - moves) // 2
+        key = position.key()
+        stored = self.table.get(key)
+        if stored is not None :
+            if stored > MAX_SCORE - MIN_SCORE + 1 : # lower bound
+                lowest = stored + 2 * MIN_SCORE - MAX_SCORE - 2
+                if alpha < lowest :
+                    alpha = lowest
+                    if alpha >= beta :
+                        return alpha
+            else : # upper bound
+                highest = stored + MIN_SCORE - 1
+        if beta > highest :
+            beta = highest
+            if alpha >= beta :
+                return beta
+        if self.book is not None :
+            score = self.book.get(position)
+            if score is not None :
+                return score
+        candidates = []
+        for col in COLUMN_ORDER :
+            move = non_losing & COLUMN_MASKS[col]
+            if move :
+                candidates.append((position.move_score(move), len(candidates), move))
+        candidates.sort(reverse=True)
+        current, mask = position.current, position.mask
+        for _, _, move in candidates :
+            position.current, position.mask = current ^ mask, mask | move
+            position.moves = moves + 1
+            score = -self.negamax(position, -beta, -alpha)
+            position.current, position.mask, position.moves = current, mask, moves
+            if score >= beta :
+                self.store(key, score + MAX_SCORE - 2 * MIN_SCORE + 2)
+                return score
+            if score > alpha :
+                alpha = score
+        self.store(key, alpha - MIN_SCORE + 1)
+        return alpha
+
+    def store(self, key, value) :
+        if len(self.table) >= self.table_size :
+            self.table.clear()
+        self.table[key] = value
+
+    def solve(self, position, weak=False, deadline=None) :
+        """Returns the exact score of the position (or, if weak is True, just
+        its sign).  Raises SolverTimeout if the deadline (a time.monotonic()
+        value) passes first."""
+        if position.can_win_next() :
+            return (SIZE + 1 - position.moves) // 2 if not weak else 1
+        lowest = -((SIZE - position.moves) // 2)
+        highest = (SIZE + 1 - position.moves) // 2
+        if weak :
+            lowest, highest = -1, 1
+        self.deadline = deadline
+        position = position.copy()
+        try :
+            while lowest < highest : # iteratively narrow the window
+                middle = lowest + (highest - lowest) // 2
+                if middle <= 0 and int(lowest / 2) < middle :
+                    middle = int(lowest / 2)
+                elif middle >= 0 and int(highest / 2) > middle :
+                    middle = int(highest / 2)
+                score = self.negamax(position, middle, middle + 1)
+                if score <= middle :
+                    highest = score
+                else :
+                    lowest = score
+        finally :
+            self.deadline = None
+        return lowest
+
+    def score_moves(self, position, deadline=None) :
+        """Returns a dictionary sending each playable column to the score of
+        the position after playing it, from the point of view of the player
+        who is to move now."""
+        scores = {}
+        for col in range(WIDTH) :
+            if position.can_play(col) :
+                if position.is_winning_col(col) :
+                    scores[col] = (SIZE + 1 - position.moves) // 2
+                else :
+                    child = position.copy()
+                    child.play_col(col)
+                    scores[col] = -self.solve(child, deadline=deadline)
+        return scores
+
+    def best_move(self, position, deadline=None) :
+        "Returns the column of a best move, preferring columns near the centre."
+        scores = self.score_moves(position, deadline)
+        return max(COLUMN_ORDER, key=lambda col: scores.get(col, -SIZE))
+
+
+def solve_board(board, solver=None) :
+    "Returns the exact score of a ConnectFourBoard for the player to move."
+    return (solver or Solver()).solve(Position.from_board(board))
+
+def best_move_board(board, solver=None, deadline=None) :
+    "Returns the column of a best move on a ConnectFourBoard."
+    return (solver or Solver()).best_move(Position.from_board(board), deadline)
+
+
+def build_opening_book(max_moves, path=None, solver=None, verbose=False,
+                       start=None) :
+    """Solves every position (up to mirror symmetry) that can arise in the
+    first max_moves moves of a game, and returns them as an OpeningBook,
+    saving it to path if given.  If a list of Positions start is given, only
+    the positions reachable from them are solved, so that a book can cover
+    chosen openings more deeply.  This takes a long time for more than a few
+    moves; run it once, offline."""
+    solver = solver or Solver()
+    entries = {}
+    frontier = [Position()] if start is None else list(start)
+    for moves in range(max_moves + 1) :
+        next_frontier = {}
+        for position in frontier :
+            if position.moves != moves :
+                next_frontier[position.canonical_key()] = position
+                continue
+            key = position.canonical_key()
+            if key in entries :
+                continue
+            entries[key] = solver.solve(position)
+            if moves < max_moves :
+                for col in range(WIDTH) :
+                    if position.can_play(col) and not position.is_winning_col(col) :
+                        child = position.copy()
+                        child.play_col(col)
+                        next_frontier[child.canonical_key()] = child
+        if verbose :
+            print('%i moves: %i positions solved' % (moves, len(entries)))
+        frontier = list(next_frontier.values())
+    keys = sorted(entries)
+    book = OpeningBook(array('Q', keys), array('b', [entries[k] for k in keys]),
+                       max_moves)
+    if path is not None :
+        book.save(path)
+    return book
+
+
+# Uncomment the lines below to solve the ConnectFourBoard "BOARD_PARTIAL" from
+# boards.py, and to find a best move for the player to move (a second or two
+# each; an early position such as BOARD_UHOH would take far longer):
+
+# from boards import BOARD_PARTIAL
+# print(solve_board(BOARD_PARTIAL), best_move_board(BOARD_PARTIAL))
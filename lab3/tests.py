@@ -5,7 +5,11 @@ from game_api import *
 from boards import *
 from lab3 import (next_boards_connectfour, is_game_over_connectfour,
                   endgame_score_connectfour, endgame_score_connectfour_faster,
-                  minimax_search)
+                  minimax_search, heuristic_connectfour, state_UHOH)
+from transposition import TranspositionTable
+from mcts import MonteCarloTreeSearch
+from parallel_search import minimax_search_alphabeta_parallel
+from batch_eval import np, encode_boards, batch_heuristic_connectfour
 INF = float('inf')
 lab_number = 3
 
@@ -76,6 +80,21 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           testanswer = is_game_over_connectfour_5_testanswer,
           expected_val = "True",
           name = 'is_game_over_connectfour')
+#board changed directly (not with add_piece or make_move) after its chains
+#were counted, to a vertical chain of 4 -> True
+def is_game_over_connectfour_6_getargs() :  #TEST 7
+    board = ConnectFourBoard()
+    is_game_over_connectfour(board)
+    for row in range(2, 6) :
+        board.board_array[row][3] = 1
+    return [board]
+def is_game_over_connectfour_6_testanswer(val, original_val = None) :
+    return val == True
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = is_game_over_connectfour_6_getargs,
+          testanswer = is_game_over_connectfour_6_testanswer,
+          expected_val = "True",
+          name = 'is_game_over_connectfour')
 
 ## next_boards_connectfour
 
@@ -91,7 +110,7 @@ next_boards_BOARD_EMPTY = [BOARD_EMPTY_move0, BOARD_EMPTY_move1,
                            BOARD_EMPTY_move2, BOARD_EMPTY_move3,
                            BOARD_EMPTY_move4, BOARD_EMPTY_move5,
                            BOARD_EMPTY_move6]
-def next_boards_connectfour_0_getargs() :  #TEST 7
+def next_boards_connectfour_0_getargs() :  #TEST 8
     return [BOARD_EMPTY]
 def next_boards_connectfour_0_testanswer(val, original_val = None) :
     return compare_list_of_boards_by_array(val, next_boards_BOARD_EMPTY)
@@ -107,7 +126,7 @@ next_boards_BOARD_PARTIAL = [BOARD_PARTIAL_move0, BOARD_PARTIAL_move1,
                              BOARD_PARTIAL_move2, BOARD_PARTIAL_move3,
                              BOARD_PARTIAL_move4, BOARD_PARTIAL_move5,
                              BOARD_PARTIAL_move6]
-def next_boards_connectfour_1_getargs() :  #TEST 8
+def next_boards_connectfour_1_getargs() :  #TEST 9
     return [BOARD_PARTIAL]
 def next_boards_connectfour_1_testanswer(val, original_val = None) :
     return compare_list_of_boards_by_array(val, next_boards_BOARD_PARTIAL)
@@ -120,7 +139,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 
 #board with columns 1, 2, 3, 4, 6 full -> [0, 5]
 next_boards_NEARLY_OVER = [NEARLY_OVER_move0, NEARLY_OVER_move5]
-def next_boards_connectfour_2_getargs() :  #TEST 9
+def next_boards_connectfour_2_getargs() :  #TEST 10
     return [NEARLY_OVER]
 def next_boards_connectfour_2_testanswer(val, original_val = None) :
     return compare_list_of_boards_by_array(val, next_boards_NEARLY_OVER)
@@ -132,7 +151,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'next_boards_connectfour')
 
 #board with all columns full -> []
-def next_boards_connectfour_3_getargs() :  #TEST 10
+def next_boards_connectfour_3_getargs() :  #TEST 11
     return [BOARD_FULL_TIED]
 def next_boards_connectfour_3_testanswer(val, original_val = None) :
     return val == []
@@ -143,7 +162,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'next_boards_connectfour')
 
 #board with some space, with chain len 4 -> []
-def next_boards_connectfour_4_getargs() :  #TEST 11
+def next_boards_connectfour_4_getargs() :  #TEST 12
     return [PLAYER_TWO2_WON]
 def next_boards_connectfour_4_testanswer(val, original_val = None) :
     return val == []
@@ -155,7 +174,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 
 #board with one space open in col 3 -> [3]
 #This tests that other ConnectFourBoard attributes are correct, in addition to board_array
-def next_boards_connectfour_5_getargs() :  #TEST 12
+def next_boards_connectfour_5_getargs() :  #TEST 13
     return [BOARD_FULL_TIED_minus3]
 def next_boards_connectfour_5_testanswer(val, original_val = None) :
     return val == [BOARD_FULL_TIED_minus3.add_piece(3)]
@@ -169,7 +188,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 ## endgame_score_connectfour
 
 #MAX wins -> return 1000
-def endgame_score_connectfour_MAX_getargs() :  #TEST 13
+def endgame_score_connectfour_MAX_getargs() :  #TEST 14
     return [PLAYER_2_ALICE_DOMINATED, False]
 def endgame_score_connectfour_MAX_testanswer(val, original_val = None) :
     return val == 1000
@@ -180,7 +199,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'endgame_score_connectfour')
 
 #MIN wins -> return -1000
-def endgame_score_connectfour_MIN_getargs() :  #TEST 14
+def endgame_score_connectfour_MIN_getargs() :  #TEST 15
     return [PLAYER_ONE1_WON, True]
 def endgame_score_connectfour_MIN_testanswer(val, original_val = None) :
     return val == -1000
@@ -191,7 +210,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'endgame_score_connectfour')
 
 #tie -> return 0
-def endgame_score_connectfour_MIN_getargs() :  #TEST 15
+def endgame_score_connectfour_MIN_getargs() :  #TEST 16
     return [BOARD_FULL_TIED, True]
 def endgame_score_connectfour_MIN_testanswer(val, original_val = None) :
     return val == 0
@@ -205,7 +224,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 ## endgame_score_connectfour_faster
 
 #compare wins with fewer pieces on board (higher abs score) vs more pieces (lower abs score)
-def endgame_score_connectfour_faster_MIN_getargs() :  #TEST 16
+def endgame_score_connectfour_faster_MIN_getargs() :  #TEST 17
     return [[BOARD_ONEFISH_WON_FAST, True],  # stronger win for MIN (fewer total pieces on board)
             [BOARD_REDFISH_WON_LESS_FAST, True]]  # weaker win for MIN (more total pieces on board)
 def endgame_score_connectfour_faster_MIN_testanswer(val, original_val = None) :
@@ -218,7 +237,7 @@ make_test(type = 'MULTIFUNCTION',
                           +"than the second, and each <= -1000)"),
           name = 'endgame_score_connectfour_faster')
 
-def endgame_score_connectfour_faster_MAX_getargs() :  #TEST 17
+def endgame_score_connectfour_faster_MAX_getargs() :  #TEST 18
     return [[PLAYER_TWO1_WON, False],  # stronger win for MAX (fewer total pieces on board)
             [PLAYER_2_ALICE_DOMINATED, False]]  # weaker win for MAX (more total pieces on board)
 def endgame_score_connectfour_faster_MAX_testanswer(val, original_val = None) :
@@ -235,7 +254,7 @@ make_test(type = 'MULTIFUNCTION',
 ## heuristic_connectfour
 
 # >0 if MAX's turn and MAX winning, val < 1000
-def heuristic_connectfour_0_getargs() :  #TEST 18
+def heuristic_connectfour_0_getargs() :  #TEST 19
     return [BOARD_1_WINNING_BARELY, True]
 def heuristic_connectfour_0_testanswer(val, original_val = None) :
     return isinstance(val, (int, float)) and val > 0 and val < 1000
@@ -246,7 +265,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'heuristic_connectfour')
 
 # >0 if MIN's turn and MAX winning, val < 1000
-def heuristic_connectfour_1_getargs() :  #TEST 19
+def heuristic_connectfour_1_getargs() :  #TEST 20
     return [BOARD_2_WINNING_DEFINITELY, False]
 def heuristic_connectfour_1_testanswer(val, original_val = None) :
     return isinstance(val, (int, float)) and val > 0 and val < 1000
@@ -257,7 +276,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'heuristic_connectfour')
 
 # <0 if MIN's turn and MIN winning, val > -1000
-def heuristic_connectfour_2_getargs() :  #TEST 20
+def heuristic_connectfour_2_getargs() :  #TEST 21
     return [BOARD_1_WINNING_BARELY, False]
 def heuristic_connectfour_2_testanswer(val, original_val = None) :
     return isinstance(val, (int, float)) and val < 0 and val > -1000
@@ -268,7 +287,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'heuristic_connectfour')
 
 # <0 if MAX's turn and MIN winning, val > -1000
-def heuristic_connectfour_3_getargs() :  #TEST 21
+def heuristic_connectfour_3_getargs() :  #TEST 22
     return [BOARD_2_WINNING_LESS_PIECES, True]
 def heuristic_connectfour_3_testanswer(val, original_val = None) :
     return isinstance(val, (int, float)) and val < 0 and val > -1000
@@ -279,7 +298,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'heuristic_connectfour')
 
 # larger score if MAX is winning by more
-def heuristic_connectfour_4_getargs() :  #TEST 22
+def heuristic_connectfour_4_getargs() :  #TEST 23
     return [[BOARD_2_WINNING_DEFINITELY, True],  # MIN winning by a lot
             [BOARD_1_WINNING_BARELY, False],     # MIN winning, barely
             [BOARD_1_WINNING_BARELY, True],      # MAX winning, barely
@@ -298,9 +317,62 @@ make_test(type = 'MULTIFUNCTION',
           name = 'heuristic_connectfour')
 
 
+## heuristic_connectfour_for_mover
+
+# >0 if the player who just moved is winning, whichever piece type they have
+def heuristic_connectfour_for_mover_0_getargs() :  #TEST 24
+    return [[BOARD_UHOH, False],                 # odd: piece type 1 just moved
+            [BOARD_2_WINNING_DEFINITELY, False], # even: piece type 2 just moved
+            [BOARD_1_WINNING_BARELY, False],     # piece type 2 just moved, losing
+            [BOARD_UHOH, True]]
+def heuristic_connectfour_for_mover_0_testanswer(val, original_val = None) :
+    return (val[0] > 0 and val[1] > 0 and val[2] < 0 and val[3] < 0
+            and all([abs(v) < 1000 for v in val]))
+make_test(type = 'MULTIFUNCTION',
+          getargs = heuristic_connectfour_for_mover_0_getargs,
+          testanswer = heuristic_connectfour_for_mover_0_testanswer,
+          expected_val = ("list of four heuristic scores: positive, positive, "
+                          + "negative, negative"),
+          name = 'heuristic_connectfour_for_mover')
+
+# MCTS rollouts guided by the heuristic take an immediate win, for either piece type
+BOARD_UHOH_PIECE_1_WINS = ConnectFourBoard(board_array =
+                                  ( ( 0,0,0,0,0,0,0 ),
+                                    ( 0,0,0,0,0,0,0 ),
+                                    ( 0,0,0,0,0,0,0 ),
+                                    ( 0,0,0,0,0,0,0 ),
+                                    ( 0,0,0,2,0,0,0 ),
+                                    ( 2,0,2,1,0,1,1 ),
+                                    ))
+BOARD_UHOH_PIECE_2_WINS = ConnectFourBoard(board_array =
+                                  ( ( 0,0,0,0,0,0,0 ),
+                                    ( 0,0,0,0,0,0,0 ),
+                                    ( 0,0,0,0,0,0,0 ),
+                                    ( 0,0,0,0,0,0,0 ),
+                                    ( 0,1,0,1,0,0,0 ),
+                                    ( 0,1,1,2,0,2,2 ),
+                                    ))
+heuristic_connectfour_for_mover_1_getargs = "heuristic_connectfour_for_mover"
+def heuristic_connectfour_for_mover_1_testanswer(val, original_val = None) :  #TEST 25
+    moves = []
+    for board in [BOARD_UHOH_PIECE_1_WINS, BOARD_UHOH_PIECE_2_WINS] :
+        position = AbstractGameState(board, is_game_over_connectfour,
+                                     next_boards_connectfour,
+                                     endgame_score_connectfour_faster,
+                                     in_place_moves = True).copy_for_moves()
+        mcts = MonteCarloTreeSearch(heuristic_fn = val, epsilon = 0, seed = 6034)
+        moves.append(mcts.heuristic_move(position, position.legal_moves()))
+    return moves == [4, 4]
+make_test(type = 'VALUE',
+          getargs = heuristic_connectfour_for_mover_1_getargs,
+          testanswer = heuristic_connectfour_for_mover_1_testanswer,
+          expected_val = "rollout moves [4, 4], the winning move on each board",
+          name = heuristic_connectfour_for_mover_1_getargs)
+
+
 ## dfs_maximizing
 
-def dfs_0_getargs() :  #TEST 23
+def dfs_0_getargs() :  #TEST 26
     return [GAME1]
 def dfs_0_testanswer(val, original_val = None) :
     return  (is_dfs_return_type(val) and move_sequence(GAME1, [2,3]) == val[0]
@@ -314,7 +386,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 
 
 # MINIMAX ENDGAME SEARCH
-def minimax_endgame_0_getargs() :  #TEST 24
+def minimax_endgame_0_getargs() :  #TEST 27
     return [GAME1, True]
 
 def minimax_endgame_0_testanswer(val, original_val = None) :
@@ -327,7 +399,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           expected_val = "List of (best_path, leaf_score, evaluation_count) corresponding to minimax score when the first player is the maximizer.",
           name = 'minimax_endgame_search')
 
-def minimax_endgame_1_getargs() :  #TEST 25
+def minimax_endgame_1_getargs() :  #TEST 28
     return [GAME1, False]
 
 def minimax_endgame_1_testanswer(val, original_val = None) :
@@ -340,7 +412,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           expected_val = "List of (best_path, leaf_score, evaluation_count) corresponding to minimax score when the first player is the minimizer.",
           name = 'minimax_endgame_search')
 
-def minimax_endgame_2_getargs() :  #TEST 26
+def minimax_endgame_2_getargs() :  #TEST 29
     GAME = AbstractGameState(NEARLY_OVER, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour)
     return [GAME, True]
 
@@ -362,7 +434,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 # LIMITED DEPTH SEARCH
 
 # This test with depth_limit=INF is just to check use of the argument 'maximize'
-def minimax_1_getargs() :  #TEST 27
+def minimax_1_getargs() :  #TEST 30
     GAME = AbstractGameState(NEARLY_OVER, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour)
     return [GAME, always_zero, INF, True]
 
@@ -381,7 +453,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'minimax_search')
 
 
-def minimax_2_getargs() :  #TEST 28
+def minimax_2_getargs() :  #TEST 31
     return [GAME_STATIC_ALL_LEVELS, always_zero, 2, True]
 
 def minimax_2_testanswer(val, original_val = None) :
@@ -395,7 +467,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'minimax_search')
 
 
-def minimax_3_getargs() :  #TEST 29
+def minimax_3_getargs() :  #TEST 32
     GAME = AbstractGameState(BOARD_UHOH, is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour)
     valuate = lambda board, player : len(sum(board.get_all_chains(player),[]))
     return [GAME, lambda board,maximize: [-1,1][maximize] * (valuate(board,True) - valuate(board, False)), 2, True]
@@ -415,7 +487,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'minimax_search')
 
 
-def minimax_4_getargs() :  #TEST 30
+def minimax_4_getargs() :  #TEST 33
     GAME = AbstractGameState(BOARD_EMPTY.add_piece(3).add_piece(3), is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour)
     valuate = lambda board, player : len(sum(board.get_all_chains(player),[]))
     density = lambda board, player : sum([abs(index-3)
@@ -440,10 +512,33 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'minimax_search')
 
 
+# The searches must use the game's own generate_next_states_fn, even when the
+# snapshot (a ConnectFourBoard here) can make moves in place.
+def first_board_only(board) :
+    return next_boards_connectfour(board)[:1]
+
+def minimax_5_getargs() :  #TEST 34
+    GAME = AbstractGameState(BOARD_EMPTY, is_game_over_connectfour, first_board_only, endgame_score_connectfour)
+    return [GAME, always_zero, 2, True]
+
+def minimax_5_testanswer(val, original_val = None) :
+    GAME = AbstractGameState(BOARD_EMPTY, is_game_over_connectfour, first_board_only, endgame_score_connectfour)
+    return (is_dfs_return_type(val) and move_sequence(GAME, [0,0]) == val[0]
+            and (val[1],val[2]) == (0,1))
+
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = minimax_5_getargs,
+          testanswer = minimax_5_testanswer,
+          expected_val = ("List of (best_path, leaf_score, evaluation_count) "
+                          +"searching only the states returned by the game's "
+                          +"generate_next_states_fn."),
+          name = 'minimax_search')
+
+
 ## minimax_search_alphabeta
 
 #  A two-move game.
-def alphabeta_0_getargs() :  #TEST 31
+def alphabeta_0_getargs() :  #TEST 35
     return [GAME1, -INF, INF, lambda x,y:0, INF, True]
 
 def alphabeta_0_testanswer(val, original_val = None) :
@@ -457,7 +552,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'minimax_search_alphabeta')
 
 
-def alphabeta_1_getargs() :  #TEST 32
+def alphabeta_1_getargs() :  #TEST 36
     return [GAME1, -INF, INF, lambda x,y:0, INF, False]
 
 def alphabeta_1_testanswer(val, original_val = None) :
@@ -474,7 +569,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 
 
 
-def alphabeta_2_getargs() :  #TEST 33
+def alphabeta_2_getargs() :  #TEST 37
     return [GAME_EQUALITY_PRUNING, -INF, INF, lambda x,y:0, INF, True]
 
 def alphabeta_2_testanswer(val, original_val = None) :
@@ -492,7 +587,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 
 
 # A test for when the correct move is not just the first available move
-def alphabeta_3_getargs() :  #TEST 34
+def alphabeta_3_getargs() :  #TEST 38
     return [GAME_EQUALITY_PRUNING, -INF, INF, lambda x,y:0, INF, False]
 
 def alphabeta_3_testanswer(val, original_val = None) :
@@ -520,7 +615,7 @@ PRUNING_GAME = AbstractGameState(PRUNING_TREE,
                           toytree_generate_next_states,
                           toytree_endgame_score_fn)
 
-def alphabeta_4_getargs() :  #TEST 35
+def alphabeta_4_getargs() :  #TEST 39
     return [PRUNING_GAME, -INF, INF, toytree_heuristic_fn, INF, True]
 
 def alphabeta_4_testanswer(val, original_val = None) :
@@ -538,6 +633,44 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'minimax_search_alphabeta')
 
 
+# Depth-limited search of an array-backed tree, using the random scores of
+# the internal nodes at the depth limit
+ARRAY_GAME = wrapper_array_toytree(random_array_toy_tree(3, 4, seed=6034))
+
+def alphabeta_4a_getargs() :  #TEST 40
+    return [ARRAY_GAME, -INF, INF, arraytree_heuristic_fn, 2, True]
+
+def alphabeta_4a_testanswer(val, original_val = None) :
+    return (is_dfs_return_type(val)
+            and [state.snapshot.index for state in val[0]] == [0, 2, 7]
+            and (val[1],val[2]) == (84,8))
+
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_4a_getargs,
+          testanswer = alphabeta_4a_testanswer,
+          expected_val = ("((list of three AbstractGameState instances), 84, 8) "
+                          +"(searching a random ArrayToyTree to depth 2)"),
+          name = 'minimax_search_alphabeta')
+
+# The parallel search must find the same best path and score.
+def alphabeta_4b_getargs() :  #TEST 41
+    return [state_UHOH, -INF, INF, heuristic_connectfour, 3, True]
+
+def alphabeta_4b_testanswer(val, original_val = None) :
+    parallel = minimax_search_alphabeta_parallel(state_UHOH, -INF, INF,
+                                                 heuristic_connectfour, 3, True,
+                                                 max_workers=2)
+    return (is_dfs_return_type(val)
+            and val[0] == parallel[0] and val[1] == parallel[1])
+
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_4b_getargs,
+          testanswer = alphabeta_4b_testanswer,
+          expected_val = ("List of (best_path, leaf_score, evaluation_count) "
+                          +"with the same best_path and leaf_score as "
+                          +"minimax_search_alphabeta_parallel finds for state_UHOH"),
+          name = 'minimax_search_alphabeta')
+
 PRUNING_TREE_NEG = ToyTree()
 PRUNING_TREE_NEG.sub('A',-10).sub()
 PRUNING_TREE_NEG.down().right().sub('B',-20).sub()
@@ -549,7 +682,7 @@ PRUNING_GAME_NEG = AbstractGameState(PRUNING_TREE_NEG,
                           toytree_generate_next_states,
                           toytree_endgame_score_fn)
 
-def alphabeta_5_getargs() :  #TEST 36
+def alphabeta_5_getargs() :  #TEST 42
     return [PRUNING_GAME_NEG, -INF, INF, toytree_heuristic_fn, INF, False]
 
 def alphabeta_5_testanswer(val, original_val = None) :
@@ -576,7 +709,7 @@ NEGATE_GAME = AbstractGameState(NEGATE_TREE,
                           toytree_generate_next_states,
                           NEGATE_GAME_endgame_score_fn)
 
-def alphabeta_6_getargs() :  #TEST 37
+def alphabeta_6_getargs() :  #TEST 43
     return [NEGATE_GAME, -INF, INF, toytree_heuristic_fn, INF, True]
 
 def alphabeta_6_testanswer(val, original_val = None) :
@@ -605,7 +738,7 @@ NONZERO_GAME = AbstractGameState(NONZERO_TREE,
                           toytree_generate_next_states,
                           toytree_endgame_score_fn)
 
-def alphabeta_7_getargs() :  #TEST 38
+def alphabeta_7_getargs() :  #TEST 44
     return [NONZERO_GAME, -INF, INF,
             lambda x,y: x.children[0].score if x.children else x.score, 1, True]
 
@@ -622,9 +755,74 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'minimax_search_alphabeta')
 
 
+# As minimax_5, with a transposition table (which searches by making moves)
+def alphabeta_8_getargs() :  #TEST 45
+    GAME = AbstractGameState(BOARD_EMPTY, is_game_over_connectfour, first_board_only, endgame_score_connectfour)
+    return [GAME, -INF, INF, always_zero, 2, True, TranspositionTable()]
+
+def alphabeta_8_testanswer(val, original_val = None) :
+    GAME = AbstractGameState(BOARD_EMPTY, is_game_over_connectfour, first_board_only, endgame_score_connectfour)
+    return (is_dfs_return_type(val) and move_sequence(GAME, [0,0]) == val[0]
+            and (val[1],val[2]) == (0,1))
+
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_8_getargs,
+          testanswer = alphabeta_8_testanswer,
+          expected_val = ("List of (best_path, leaf_score, evaluation_count) "
+                          +"searching only the states returned by the game's "
+                          +"generate_next_states_fn."),
+          name = 'minimax_search_alphabeta')
+
+
+# With the generic make_move (a move is an index into the children), each
+# state's children should be generated only once, not again for every move.
+generate_calls = [0]
+def counting_next_boards(board) :
+    generate_calls[0] += 1
+    return next_boards_connectfour(board)
+
+def alphabeta_9_getargs() :  #TEST 46
+    generate_calls[0] = 0
+    GAME = AbstractGameState(BOARD_EMPTY, is_game_over_connectfour, counting_next_boards, endgame_score_connectfour)
+    return [GAME, -INF, INF, always_zero, 2, True, TranspositionTable()]
+
+def alphabeta_9_testanswer(val, original_val = None) :
+    # once for the root, each of its 7 children and each evaluated leaf, plus
+    # once per move when rebuilding the returned path
+    return (is_dfs_return_type(val) and (val[1],val[2]) == (0,13)
+            and generate_calls[0] <= 1 + 7 + val[2] + len(val[0]) - 1)
+
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_9_getargs,
+          testanswer = alphabeta_9_testanswer,
+          expected_val = ("List of (best_path, leaf_score, evaluation_count), "
+                          +"generating the children of each state only once."),
+          name = 'minimax_search_alphabeta')
+
+
+# With a transposition table, the returned path must still end in a leaf
+# whose score is the returned score.
+def alphabeta_10_getargs() :  #TEST 47
+    return [state_UHOH, -INF, INF, heuristic_connectfour, 4, True, TranspositionTable()]
+
+def alphabeta_10_testanswer(val, original_val = None) :
+    if not is_dfs_return_type(val) or len(val[0]) != 5 :
+        return False
+    return (val[1] == -29
+            and heuristic_connectfour(val[0][-1].snapshot, True) == val[1])
+
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = alphabeta_10_getargs,
+          testanswer = alphabeta_10_testanswer,
+          expected_val = ("List of (best_path, leaf_score, evaluation_count) "
+                          +"with a best_path of five states, whose last state "
+                          +"has the heuristic score -29"),
+          name = 'minimax_search_alphabeta')
+
+
 ## progressive_deepening
 
-def progressive_0_getargs() :  #TEST 39
+def progressive_0_getargs() :  #TEST 48
     return [GAME_STATIC_ALL_LEVELS, toytree_heuristic_fn, 3, True]
 
 def progressive_0_testanswer(val, original_val = None) :
@@ -644,7 +842,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 
 
 
-def progressive_1_getargs() :  #TEST 40
+def progressive_1_getargs() :  #TEST 49
 
     GAME = AbstractGameState(BOARD_EMPTY.add_piece(3).add_piece(3), is_game_over_connectfour, next_boards_connectfour, endgame_score_connectfour)
     valuate = lambda board, player : len(sum(board.get_all_chains(player),[]))
@@ -676,7 +874,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 #### PART 3: Multiple Choice ##################################
 
 ANSWER_1_getargs = "ANSWER_1"
-def ANSWER_1_testanswer(val, original_val = None):  #TEST 41
+def ANSWER_1_testanswer(val, original_val = None):  #TEST 50
     """Minimax without the alpha-beta optimization never prunes any nodes.
     All nodes must be examined."""
     if val == '':
@@ -689,7 +887,7 @@ make_test(type = 'VALUE',
           name = ANSWER_1_getargs)
 
 ANSWER_2_getargs = "ANSWER_2"
-def ANSWER_2_testanswer(val, original_val = None):  #TEST 42
+def ANSWER_2_testanswer(val, original_val = None):  #TEST 51
     """With monotonically decreasing leaves, running minimax with
     alpha-beta will eventually prune the last two leaves of the 
     tree (the two leaves belonging to the right-most branch).
@@ -706,7 +904,7 @@ make_test(type = 'VALUE',
           name = ANSWER_2_getargs)
 
 ANSWER_3_getargs = "ANSWER_3"
-def ANSWER_3_testanswer(val, original_val = None):  #TEST 43
+def ANSWER_3_testanswer(val, original_val = None):  #TEST 52
     """
     (1) If no leaves were pruneable in the tree, swapping two children could
     definitely help. For example, what would happen if it's MAX's turn and the
@@ -731,7 +929,7 @@ make_test(type = 'VALUE',
           name = ANSWER_3_getargs)
 
 ANSWER_4_getargs = "ANSWER_4"
-def ANSWER_4_testanswer(val, original_val = None):  #TEST 44
+def ANSWER_4_testanswer(val, original_val = None):  #TEST 53
     """
     (1) This idea won't improve anything, and in fact will actually just make
     your algorithm run n times slower. You're running the same *deterministic*
@@ -767,3 +965,26 @@ make_test(type = 'VALUE',
           testanswer = ANSWER_4_testanswer,
           expected_val = "correct value of ANSWER_4 ('1', '2', '3', '4', or '5')",
           name = ANSWER_4_getargs)
+
+
+## batch_heuristic_connectfour (only tested if NumPy is installed)
+
+HEURISTIC_BOARDS = [BOARD_UHOH, BOARD_FULL_TIED_minus3, NEARLY_OVER,
+                    BOARD_PARTIAL, BOARD_EMPTY, BOARD_1_WINNING_BARELY,
+                    BOARD_2_WINNING_DEFINITELY, BOARD_2_WINNING_LESS_PIECES,
+                    BOARD_PARTIAL_move2, BOARD_EMPTY_move3]
+def batch_heuristic_connectfour_0_getargs() :  #TEST 54
+    return [[board, maximize] for board in HEURISTIC_BOARDS
+            for maximize in (True, False)]
+def batch_heuristic_connectfour_0_testanswer(val, original_val = None) :
+    args = batch_heuristic_connectfour_0_getargs()
+    batch = batch_heuristic_connectfour(encode_boards([a[0] for a in args]),
+                                        np.array([a[1] for a in args]))
+    return val == batch.tolist()
+if np is not None :
+    make_test(type = 'MULTIFUNCTION',
+              getargs = batch_heuristic_connectfour_0_getargs,
+              testanswer = batch_heuristic_connectfour_0_testanswer,
+              expected_val = ("list of heuristic scores equal to the ones "
+                              +"batch_heuristic_connectfour gives for the same boards"),
+              name = 'heuristic_connectfour')
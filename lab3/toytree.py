@@ -2,6 +2,8 @@
 
 from game_api import *
 from copy import deepcopy
+from array import array
+import random
 
 class ToyTree :
     def __init__(self, label=None, score=None) :
@@ -179,3 +181,269 @@ GAME_EQUALITY_PRUNING = AbstractGameState(tree6,
                          toytree_generate_next_states,
                          toytree_endgame_score_fn)
 
+
+
+# Array-backed game trees.  An ArrayTree keeps every node's score, parent,
+# first child, next sibling and so on in parallel arrays indexed by node
+# number, so that trees with millions of nodes don't need millions of
+# objects.  An ArrayToyTree is a small cursor pointing at one node of an
+# ArrayTree; it navigates like a ToyTree and can also make and undo moves in
+# place (see AbstractGameState.make_move), so searches over it don't create a
+# new object for each node they visit.
+
+NO_NODE = -1
+
+class ArrayTree :
+    """Storage for an array-backed tree.  Node 0 is the root.  Scores are
+    stored in an array of the given typecode ('q' for integers, 'd' for
+    floats), with no_score standing for a node without a score."""
+
+    def __init__(self, typecode='q', no_score=None) :
+        self.scores = array(typecode)
+        self.no_score = (no_score if no_score is not None
+                         else float('nan') if typecode in 'fd' else -2**63)
+        self.parent = array('i')
+        self.first_child = array('i')
+        self.last_child = array('i')
+        self.next_sibling = array('i')
+        self.sibling_index = array('i')
+        self.num_children = array('i')
+        self.labels = {}  # only for the nodes that have labels
+
+    def __len__(self) :
+        return len(self.parent)
+
+    def add_node(self, parent=NO_NODE, label=None, score=None) :
+        "Adds a node as the last child of parent.  Returns its index."
+        index = len(self.parent)
+        self.scores.append(self.no_score if score is None else score)
+        self.parent.append(parent)
+        self.first_child.append(NO_NODE)
+        self.last_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        self.num_children.append(0)
+        if label is not None :
+            self.labels[index] = label
+        if parent == NO_NODE :
+            self.sibling_index.append(0)
+            return index
+        self.sibling_index.append(self.num_children[parent])
+        if self.last_child[parent] == NO_NODE :
+            self.first_child[parent] = index
+        else :
+            self.next_sibling[self.last_child[parent]] = index
+        self.last_child[parent] = index
+        self.num_children[parent] += 1
+        return index
+
+    def get_score(self, index) :
+        score = self.scores[index]
+        if score == self.no_score or score != score : # score != score for nan
+            return None
+        return score
+
+    def set_score(self, index, score) :
+        self.scores[index] = self.no_score if score is None else score
+
+    def child(self, index, n) :
+        "Returns the index of the n-th child of the node."
+        child = self.first_child[index]
+        for _ in range(n) :
+            child = self.next_sibling[child]
+        return child
+
+    def children(self, index) :
+        "Returns the list of indexes of the children of the node."
+        result = []
+        child = self.first_child[index]
+        while child != NO_NODE :
+            result.append(child)
+            child = self.next_sibling[child]
+        return result
+
+
+class ArrayToyTree :
+    """A cursor at one node of an ArrayTree, with the same navigation methods
+    as ToyTree.  ArrayToyTree(label, score) makes a new one-node tree.
+    Cursors are cheap: copy() shares the tree, and down, up and right return
+    new cursors, so changing scores or adding children through one cursor
+    changes the tree for all of them."""
+
+    def __init__(self, label=None, score=None, tree=None, index=0) :
+        if tree is None :
+            tree = ArrayTree()
+            tree.add_node(NO_NODE, label, score)
+        self.tree = tree
+        self.index = index
+        self.move_stack = []
+
+    @property
+    def score(self) :
+        return self.tree.get_score(self.index)
+
+    @property
+    def label(self) :
+        return self.tree.labels.get(self.index)
+
+    @property
+    def sibling_index(self) :
+        if self.tree.parent[self.index] == NO_NODE :
+            return None
+        return self.tree.sibling_index[self.index]
+
+    @property
+    def children(self) :
+        return self.get_children()
+
+    def at(self, index) :
+        return ArrayToyTree(tree=self.tree, index=index)
+
+    def __eq__(self, other) :
+        return (is_class_instance(other, 'ArrayToyTree')
+                and self.tree is other.tree and self.index == other.index)
+
+    def __str__(self, tab=0) :
+        ret = ""
+        for x in self.get_children() :
+            ret += x.__str__(tab+1)
+        score = self.score
+        ret = ("-" * 3 * tab) + (" " * (tab > 0) ) +  (self.label or "node") + ("("+str(score)+")" if score is not None else "") + "\n" + ret
+        return ret
+
+    def copy(self) :
+        "Returns a new cursor at the same node of the same tree."
+        cursor = self.at(self.index)
+        cursor.move_stack = self.move_stack[:]
+        return cursor
+
+    def describe_previous_move(self) :
+        sibling_index = self.sibling_index
+        return "Took branch "+str(sibling_index) if sibling_index is not None else "[none]"
+
+    def get_score(self) :
+        return self.score
+
+    def set_score(self, score) :
+        self.tree.set_score(self.index, score)
+        return self
+
+    def get_children(self) :
+        return [self.at(child) for child in self.tree.children(self.index)]
+
+    def sub(self, label=None, value=None) :
+        "Adds a child with the given label and score."
+        self.tree.add_node(self.index, label, value)
+        return self
+
+    def append(self, child) :
+        """Adds a copy of the subtree under child (an ArrayToyTree or a
+        ToyTree) as the last child of this node."""
+        stack = [(self.index, child)]
+        while stack :
+            parent, node = stack.pop()
+            index = self.tree.add_node(parent, node.label, node.score)
+            # push in reverse so that children are added in order
+            stack.extend((index, c) for c in reversed(node.children))
+        return self
+
+    def is_leaf(self) :
+        return self.tree.first_child[self.index] == NO_NODE
+
+
+    # moving around
+    def down(self) :
+        """Visit the first child."""
+        if self.tree.first_child[self.index] == NO_NODE :
+            raise IndexError("A leaf has no children.")
+        return self.at(self.tree.first_child[self.index])
+
+    def up(self) :
+        """Visit parent."""
+        if self.tree.parent[self.index] == NO_NODE :
+            raise IndexError("The root has no parent.")
+        return self.at(self.tree.parent[self.index])
+
+    def right(self) :
+        """Visit sibling."""
+        assert self.tree.next_sibling[self.index] != NO_NODE
+        return self.at(self.tree.next_sibling[self.index])
+
+    def top(self) :
+        """Visit root."""
+        return self.at(0)
+
+
+    # in-place moves; a move is the index of a child
+    def legal_moves(self) :
+        return list(range(self.tree.num_children[self.index]))
+
+    def make_move(self, move) :
+        self.move_stack.append(self.index)
+        self.index = self.tree.child(self.index, move)
+        return self
+
+    def undo_move(self) :
+        self.index = self.move_stack.pop()
+        return self
+
+
+def create_array_toy_tree(name_to_score, nested_list) :
+    """Like create_toy_tree, but creates an ArrayToyTree (at the root)."""
+    label, sublists = nested_list
+    root = ArrayToyTree(label, name_to_score.get(label, 0))
+    stack = [(0, sublist) for sublist in reversed(sublists)]
+    while stack :
+        parent, (label, sublists) = stack.pop()
+        index = root.tree.add_node(parent, label, name_to_score.get(label, 0))
+        stack.extend((index, sublist) for sublist in reversed(sublists))
+    return root
+
+def random_array_toy_tree(branching, depth, low=0, high=100, seed=None) :
+    """Creates a uniform ArrayToyTree in which every internal node has
+    branching children and every leaf is at the given depth, with random
+    integer scores between low and high at every node (at the internal nodes,
+    for depth-limited searches to use as heuristic values)."""
+    rng = random.Random(seed)
+    root = ArrayToyTree(score=rng.randint(low, high))
+    tree = root.tree
+    level = [0]
+    for d in range(depth) :
+        next_level = []
+        for parent in level :
+            for _ in range(branching) :
+                next_level.append(tree.add_node(parent, None,
+                                                rng.randint(low, high)))
+        level = next_level
+    return root
+
+def arraytree_is_game_over(tree) :
+    return tree.is_leaf()
+
+def arraytree_generate_next_states(tree) :
+    return tree.get_children()
+
+def arraytree_endgame_score_fn(tree, is_current_player_maximizer) :
+    return tree.get_score()
+
+def arraytree_heuristic_fn(tree, is_current_player_maximizer) :
+    score = tree.get_score()
+    if score is None :
+        raise ValueError("Node " + str(tree.index) + " has no score to use "
+                         + "as its heuristic value.")
+    return score
+
+def wrapper_array_toytree(tree) :
+    "Returns an AbstractGameState for an ArrayToyTree."
+    return AbstractGameState(snapshot = tree,
+                             is_game_over_fn = arraytree_is_game_over,
+                             generate_next_states_fn = arraytree_generate_next_states,
+                             endgame_score_fn = arraytree_endgame_score_fn,
+                             in_place_moves = True)
+
+
+# Uncomment the lines below to build a random tree with about 2 million
+# nodes and search it with alpha-beta:
+
+# from lab3 import minimax_search_alphabeta
+# GAME_RANDOM = wrapper_array_toytree(random_array_toy_tree(6, 8, seed=6034))
+# print(minimax_search_alphabeta(GAME_RANDOM, depth_limit=8)[1:])
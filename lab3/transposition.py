@@ -0,0 +1,174 @@
+# MIT 6.034 Lab 3: Games
+
+# Zobrist hashing and a bounded transposition table, so that searches over
+# Connect Four can try the best move found for a position first when it comes
+# up again, whether through a different move order or in a later iteration
+# of progressive deepening.
+
+import random
+from game_api import ConnectFourBoard, is_class_instance, zobrist_keys
+
+# Bound types for table entries
+EXACT = 'exact'
+LOWERBOUND = 'lower'
+UPPERBOUND = 'upper'
+
+
+class ZobristHasher :
+    """Assigns a random 64-bit key to every (row, col, piece) combination, so
+    that a board's hash is the XOR of the keys of the pieces on it."""
+
+    def __init__(self, num_rows=ConnectFourBoard.num_rows,
+                 num_cols=ConnectFourBoard.num_cols, seed=6034) :
+        rng = random.Random(seed)
+        self.piece_keys = zobrist_keys(num_rows, num_cols, rng)
+        self.maximize_key = rng.getrandbits(64)
+        if self.piece_keys == ConnectFourBoard.piece_keys :
+            # Use the hash the boards keep up to date as pieces are added
+            self.piece_keys = ConnectFourBoard.piece_keys
+
+    def hash_board(self, board) :
+        """Returns the Zobrist hash of a ConnectFourBoard's pieces.  This is
+        O(1) if the hasher uses the boards' own keys (the default)."""
+        if self.piece_keys is board.piece_keys :
+            return board.get_zobrist_hash()
+        h = 0
+        for r, row in enumerate(board.board_array) :
+            for c, piece in enumerate(row) :
+                if piece :
+                    h ^= self.piece_keys[r][c][piece]
+        return h
+
+    def hash_state(self, state, maximize=True) :
+        """Returns the hash of an AbstractGameState, or None if the state's
+        snapshot is not a kind of game the hasher knows about.  Scores depend
+        on whether the maximizer is to move, so that is part of the key."""
+        snapshot = state.get_snapshot()
+        if not is_class_instance(snapshot, 'ConnectFourBoard') :
+            return None
+        h = self.hash_board(snapshot)
+        return h ^ self.maximize_key if maximize else h
+
+
+class TableEntry :
+    __slots__ = ('key', 'depth', 'score', 'bound', 'best_move', 'generation')
+
+    def __init__(self, key, depth, score, bound, best_move, generation) :
+        self.key = key
+        self.depth = depth
+        self.score = score
+        self.bound = bound
+        self.best_move = best_move
+        self.generation = generation
+
+    def __str__(self) :
+        return ("<TableEntry depth=%s score=%s bound=%s best_move=%s>"
+                % (self.depth, self.score, self.bound, self.best_move))
+    __repr__ = __str__
+
+
+class TranspositionTable :
+    """A fixed-size table of search results, indexed by Zobrist hash.
+
+    Each slot holds at most one entry.  When two positions collide, the new
+    entry replaces the old one if the old one is left over from an earlier
+    search, or if the new one was searched at least as deeply (depth-preferred
+    replacement).  A table is only valid for one heuristic function; use a
+    fresh table (or call clear) when switching heuristics."""
+
+    def __init__(self, capacity=2**16, hasher=None) :
+        if capacity < 1 :
+            raise ValueError("Transposition table capacity must be positive, got "
+                             + str(capacity))
+        self.capacity = capacity
+        self.hasher = hasher or ZobristHasher()
+        self.slots = [None] * capacity
+        self.generation = 0
+        self.size = 0
+        self.reset_stats()
+
+    def reset_stats(self) :
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+        self.rejections = 0
+
+    def clear(self) :
+        "Removes all entries from the table and resets its statistics."
+        self.slots = [None] * self.capacity
+        self.size = 0
+        self.reset_stats()
+        return self
+
+    def new_search(self) :
+        """Marks the start of a new search.  Entries from earlier searches are
+        kept, but may be replaced by any new entry."""
+        self.generation += 1
+        return self
+
+    def key(self, state, maximize=True) :
+        return self.hasher.hash_state(state, maximize)
+
+    def lookup(self, key) :
+        "Returns the entry for key, or None.  Does not count as a probe."
+        entry = self.slots[key % self.capacity]
+        return entry if entry is not None and entry.key == key else None
+
+    def probe(self, key) :
+        "Returns the entry for key, or None, and records a hit or miss."
+        self.probes += 1
+        entry = self.lookup(key)
+        if entry is not None :
+            self.hits += 1
+        return entry
+
+    def store(self, key, depth, score, bound, best_move=None) :
+        """Stores a search result, subject to the replacement policy.  Returns
+        True if the entry was written, otherwise False."""
+        index = key % self.capacity
+        old = self.slots[index]
+        if old is None :
+            self.size += 1
+        elif (old.key != key and old.generation == self.generation
+              and old.depth > depth) :
+            self.rejections += 1
+            return False
+        elif old.key != key :
+            self.replacements += 1
+        self.slots[index] = TableEntry(key, depth, score, bound, best_move,
+                                       self.generation)
+        self.stores += 1
+        return True
+
+    def hit_rate(self) :
+        "Returns the fraction of probes that found an entry."
+        return self.hits / self.probes if self.probes else 0.0
+
+    def get_stats(self) :
+        "Returns a dictionary of table statistics."
+        return {'capacity': self.capacity,
+                'size': self.size,
+                'probes': self.probes,
+                'hits': self.hits,
+                'hit_rate': self.hit_rate(),
+                'stores': self.stores,
+                'replacements': self.replacements,
+                'rejections': self.rejections}
+
+    def pretty_print(self) :
+        stats = self.get_stats()
+        print('*** Transposition table statistics ***')
+        print('Entries: %(size)i / %(capacity)i' % stats)
+        print('Probes: %(probes)i, hits: %(hits)i (%(hit_rate).1f%%)'
+              % dict(stats, hit_rate=100*stats['hit_rate']))
+        print('Stores: %(stores)i, replacements: %(replacements)i, rejected: %(rejections)i\n'
+              % stats)
+
+    def __len__(self) :
+        return self.size
+
+    def __str__(self) :
+        return ("<TranspositionTable with %i/%i entries, hit rate %.1f%%>"
+                % (self.size, self.capacity, 100*self.hit_rate()))
+    __repr__ = __str__
@@ -0,0 +1,147 @@
+# MIT 6.034 Lab 4: Constraint Satisfaction Problems
+
+# Arc consistency with a queue of arcs (AC-3), optionally remembering the last
+# support found for each value (AC-2001).  An arc (x, y) means "remove the
+# values of x that have no support in the domain of y".  The queue keeps a
+# set of the arcs in it, so checking whether an arc is already queued is O(1).
+# For compiled constraints (see compiled_constraints.py), a value has support
+# if its precomputed set of supporting values meets the domain.
+#
+# The propagators here have the same arguments as propagate in lab4.py,
+# including the enqueue condition, and reach the same domains, so they can be
+# passed to solve_constraint_generic as its propagate_fn.
+
+from collections import deque
+from constraint_api import *
+from compiled_constraints import CompiledConstraint
+
+
+class ArcQueue :
+    "A first-in, first-out queue of arcs with O(1) membership tests."
+
+    def __init__(self) :
+        self.arcs = deque()
+        self.members = set()
+
+    def push(self, arc) :
+        if arc not in self.members :
+            self.members.add(arc)
+            self.arcs.append(arc)
+
+    def pop(self) :
+        arc = self.arcs.popleft()
+        self.members.discard(arc)
+        return arc
+
+    def __len__(self) :
+        return len(self.arcs)
+
+    def __contains__(self, arc) :
+        return arc in self.members
+
+
+class ArcConsistency :
+    """Arc consistency for one call of propagation.  Domains only shrink during
+    a call, so a support found once stays a support until it is removed; with
+    last_supports=True (AC-2001), the search for a new support continues from
+    the old one instead of from the start of the domain."""
+
+    def __init__(self, csp, enqueue_condition_fn, last_supports=True) :
+        self.csp = csp
+        self.enqueue_condition_fn = enqueue_condition_fn
+        self.last_supports = last_supports
+        self.domain_sets = {}  # var -> set of the values in its domain
+        self.orders = {}       # var -> its domain when first needed, in order
+        self.last = {}         # (id of constraint, value) -> index in order
+        self.queue = ArcQueue()
+
+    def domain_set(self, var) :
+        if var not in self.domain_sets :
+            self.domain_sets[var] = set(self.csp.get_domain(var))
+        return self.domain_sets[var]
+
+    def order(self, var) :
+        if var not in self.orders :
+            self.orders[var] = self.csp.get_domain(var)[:]
+        return self.orders[var]
+
+    def enqueue_arcs_to(self, var) :
+        "Enqueues the arcs (neighbor, var) for each neighbor of var."
+        for neighbor in self.csp.get_neighbors(var) :
+            self.queue.push((neighbor, var))
+
+    def has_support(self, constraint, value, var) :
+        """Returns True if some value in the domain of var supports value,
+        where constraint is oriented from var to the variable of value."""
+        domain = self.domain_set(var)
+        if isinstance(constraint, CompiledConstraint) :
+            return constraint.has_support2(domain, value)
+        order = self.order(var)
+        start = 0
+        if self.last_supports :
+            key = (id(constraint), value)
+            last = self.last.get(key)
+            if last is not None :
+                if order[last] in domain :
+                    return True
+                start = last + 1
+        for index in range(start, len(order)) :
+            support = order[index]
+            if support in domain and constraint.check(support, value) :
+                if self.last_supports :
+                    self.last[key] = index
+                return True
+        return False
+
+    def revise(self, var, other) :
+        """Removes the values of var that have no support in the domain of
+        other, for each constraint between them.  Returns the number of values
+        removed, or None if the domain of var is now empty."""
+        removed = 0
+        for constraint in self.csp.constraints_between(other, var) :
+            for value in self.csp.get_domain(var)[:] :
+                if not self.has_support(constraint, value, other) :
+                    self.csp.eliminate(var, value)
+                    self.domain_set(var).discard(value)
+                    removed += 1
+            if self.csp.domain_size(var) == 0 :
+                return None
+        return removed
+
+    def propagate(self, queue=None) :
+        """Revises arcs until none are left in the queue, starting with the arcs
+        to each variable in queue (all variables if None).  Returns the list
+        of arcs (var, other) that were revised, or None if a domain becomes
+        empty."""
+        if queue is None :
+            queue = self.csp.get_all_variables()
+        for var in queue :
+            self.enqueue_arcs_to(var)
+        revised = []
+        while self.queue :
+            var, other = self.queue.pop()
+            revised.append((var, other))
+            removed = self.revise(var, other)
+            if removed is None :
+                return None
+            if removed and self.enqueue_condition_fn(self.csp, var) :
+                self.enqueue_arcs_to(var)
+        return revised
+
+
+def propagate_ac3(enqueue_condition_fn, csp, queue=None) :
+    """Like propagate, using an AC-3 queue of arcs.  Returns the list of arcs
+    (var, other) that were revised, or None if a domain becomes empty."""
+    return ArcConsistency(csp, enqueue_condition_fn, False).propagate(queue)
+
+def propagate_ac2001(enqueue_condition_fn, csp, queue=None) :
+    """Like propagate_ac3, remembering the last support found for each value
+    (AC-2001)."""
+    return ArcConsistency(csp, enqueue_condition_fn, True).propagate(queue)
+
+
+# Uncomment the lines below to solve the Pokemon problem with propagation
+# through reduced domains, using AC-2001:
+
+# from lab4 import get_pokemon_problem, solve_constraint_generic, condition_domain_reduction
+# print(solve_constraint_generic(get_pokemon_problem(), condition_domain_reduction, propagate_ac2001))
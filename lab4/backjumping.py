@@ -0,0 +1,217 @@
+# MIT 6.034 Lab 4: Constraint Satisfaction Problems
+
+# Conflict-directed backjumping with forward checking (FC-CBJ), and nogood
+# learning.  The other solvers backtrack chronologically: when a variable
+# runs out of values, they try the next value of the variable assigned just
+# before it, even if that variable had nothing to do with the failure.  Here
+# each value removed from a domain remembers the assigned variables that
+# removed it, so when a variable runs out of values, the solver knows which
+# earlier assignments caused it (its conflict set), and jumps straight back
+# to the most recent of them.
+#
+# The conflict set's assignments can't be part of any solution, so they are
+# also saved as a nogood.  Nogoods are checked during propagation: when all
+# but one assignment of a nogood hold, the last value is removed from its
+# variable's domain.  The nogoods are kept in a NogoodStore of bounded size,
+# which forgets the least recently used nogood when it is full.
+
+from collections import OrderedDict
+from constraint_api import *
+from lab4 import has_empty_domains, check_all_constraints
+
+
+class NogoodStore :
+    """A bounded set of nogoods.  A nogood is a frozenset of (var, val)
+    pairs that can't all hold in a solution.  Nogoods with more than
+    max_length pairs are not stored, since they rarely prune anything.  When
+    there are more than max_size nogoods, the least recently used one is
+    evicted."""
+
+    def __init__(self, max_size=1000, max_length=20) :
+        self.max_size = max_size
+        self.max_length = max_length
+        self.nogoods = OrderedDict()  # nogood -> True, least recently used first
+        self.watches = {}             # (var, val) -> set of nogoods containing it
+        self.learned = 0
+        self.evicted = 0
+
+    def add(self, nogood) :
+        "Stores nogood, if it isn't empty or too long.  Returns True if stored."
+        if not nogood or len(nogood) > self.max_length :
+            return False
+        if nogood in self.nogoods :
+            self.nogoods.move_to_end(nogood)
+            return True
+        self.nogoods[nogood] = True
+        for pair in nogood :
+            self.watches.setdefault(pair, set()).add(nogood)
+        self.learned += 1
+        while len(self.nogoods) > self.max_size :
+            old, _ = self.nogoods.popitem(last=False)
+            for pair in old :
+                self.watches[pair].discard(old)
+            self.evicted += 1
+        return True
+
+    def touch(self, nogood) :
+        "Marks nogood as used, so it is evicted last."
+        if nogood in self.nogoods :
+            self.nogoods.move_to_end(nogood)
+
+    def containing(self, var, val) :
+        "Returns a list of the stored nogoods that contain the pair (var, val)."
+        return list(self.watches.get((var, val), ()))
+
+    def __len__(self) :
+        return len(self.nogoods)
+
+    def __str__(self) :
+        return ('<NogoodStore with %i nogoods (%i learned, %i evicted)>'
+                % (len(self), self.learned, self.evicted))
+    __repr__ = __str__
+
+
+class Backjumping :
+    """One FC-CBJ search of a copy of problem.  select_var_fn and
+    order_values_fn are as in ordering.py; nogoods is the NogoodStore to learn
+    into (a new one if None)."""
+
+    def __init__(self, problem, select_var_fn=None, order_values_fn=None,
+                 nogoods=None) :
+        self.csp = problem.copy().start_trail()
+        self.select_var_fn = select_var_fn
+        self.order_values_fn = order_values_fn
+        self.record_failure = getattr(select_var_fn, 'record_failure', None)
+        self.nogoods = NogoodStore() if nogoods is None else nogoods
+        self.reasons = {}  # var -> a set of variables for each value removed from its domain
+        self.pruned = []   # the variables reasons were added to, in order, to undo
+        self.count = 0
+
+    def prune(self, var, val, reason) :
+        "Removes val from the domain of var, because of the variables in reason."
+        self.csp.eliminate(var, val)
+        self.reasons.setdefault(var, []).append(reason)
+        self.pruned.append(var)
+
+    def undo(self, mark, pruned_mark) :
+        self.csp.undo_to_mark(mark)
+        while len(self.pruned) > pruned_mark :
+            self.reasons[self.pruned.pop()].pop()
+
+    def explain(self, var) :
+        "Returns the set of variables whose assignments removed values of var."
+        return set().union(*self.reasons.get(var, []))
+
+    def propagate(self, var) :
+        """Checks the value just assigned to var, removes the values it rules
+        out from the domains of unassigned neighbors, and applies the nogoods
+        it makes unit.  Returns None if that succeeds, otherwise the conflict
+        set: the other assigned variables responsible for the failure."""
+        csp = self.csp
+        asgn = csp.assignments
+        val = asgn[var]
+        conflict = set()
+        failed = False
+        for constraint in csp.constraints_between(var) :
+            other = constraint.var2
+            if other in asgn and not constraint.check(val, asgn[other]) :
+                conflict.add(other)
+                failed = True
+        for constraint in csp.global_constraints :
+            if var in constraint.variables and not constraint.check_assignments(asgn) :
+                conflict.update(constraint.variables)
+                failed = True
+        if failed :
+            conflict.discard(var)
+            return conflict
+        for neighbor in csp.get_neighbors(var) :
+            if neighbor in asgn :
+                continue
+            for constraint in csp.constraints_between(neighbor, var) :
+                for other_val in csp.get_domain(neighbor)[:] :
+                    if not constraint.check(other_val, val) :
+                        self.prune(neighbor, other_val, {var})
+            if csp.domain_size(neighbor) == 0 :
+                return self.explain(neighbor) - {var}
+        for nogood in self.nogoods.containing(var, val) :
+            unit = None
+            for other, other_val in nogood :
+                if other in asgn :
+                    if asgn[other] != other_val :
+                        break
+                elif unit is None :
+                    unit = (other, other_val)
+                else :
+                    break
+            else :
+                self.nogoods.touch(nogood)
+                nogood_vars = set(other for other, other_val in nogood)
+                if unit is None :
+                    return nogood_vars - {var}
+                other, other_val = unit
+                if csp.has_value(other, other_val) :
+                    self.prune(other, other_val, nogood_vars - {other})
+                    if csp.domain_size(other) == 0 :
+                        return self.explain(other) - {var}
+        return None
+
+    def label(self) :
+        """Assigns the next variable and searches below it.  Returns
+        (solution, None), or (None, conflict set) if there is no solution
+        with the current assignments of the variables in the conflict set."""
+        csp = self.csp
+        var = csp.pop_next_unassigned_var(self.select_var_fn)
+        if var is None :
+            return (dict(csp.assignments), None)
+        values = (csp.get_domain(var)[:] if self.order_values_fn is None
+                  else self.order_values_fn(csp, var))
+        conflict = set()
+        for val in values :
+            mark, pruned_mark = csp.trail_mark(), len(self.pruned)
+            csp.set_assignment(var, val)
+            self.count += 1
+            failure = self.propagate(var)
+            if failure is None :
+                solution, failure = self.label()
+                if solution is not None :
+                    return (solution, None)
+                if var not in failure :
+                    # Changing var can't help: jump back past it
+                    self.undo(mark, pruned_mark)
+                    return (None, failure)
+                failure.discard(var)
+            elif self.record_failure is not None :
+                self.record_failure(csp)
+            self.undo(mark, pruned_mark)
+            conflict |= failure
+        conflict |= self.explain(var)
+        self.nogoods.add(frozenset((other, csp.assignments[other])
+                                   for other in conflict))
+        return (None, conflict)
+
+    def solve(self) :
+        "Same return type as solve_constraint_dfs."
+        csp = self.csp
+        self.count = 1
+        if has_empty_domains(csp) or not check_all_constraints(csp) :
+            return (None, self.count)
+        for var in list(csp.assignments) :
+            if self.propagate(var) is not None :
+                return (None, self.count)
+        return (self.label()[0], self.count)
+
+
+def solve_constraint_backjumping(problem, select_var_fn=None,
+                                 order_values_fn=None, nogoods=None) :
+    """Solves the problem with forward checking, conflict-directed
+    backjumping and nogood learning.  Same return type as
+    solve_constraint_dfs.  Does not change problem."""
+    return Backjumping(problem, select_var_fn, order_values_fn, nogoods).solve()
+
+
+# Uncomment the lines below to solve the Pokemon problem with backjumping,
+# and see how many nogoods were learned:
+
+# from lab4 import get_pokemon_problem
+# nogoods = NogoodStore()
+# print(solve_constraint_backjumping(get_pokemon_problem(), nogoods=nogoods), nogoods)
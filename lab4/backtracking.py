@@ -0,0 +1,98 @@
+# MIT 6.034 Lab 4: Constraint Satisfaction Problems
+
+# Backtracking solvers that change one problem in place instead of copying it
+# for every value they try.  The problem records each change to its domains
+# and assignments on a trail (see ConstraintSatisfactionProblem.start_trail),
+# and the solver undoes the changes when it backtracks.
+#
+# The solvers explore the same search tree, in the same order, as the agenda
+# solvers in lab4.py, so they return the same solutions and extension counts.
+
+from constraint_api import *
+from lab4 import (has_empty_domains, check_all_constraints, forward_check,
+                  domain_reduction, propagate)
+
+
+def check_new_assignment(csp, var) :
+    """Returns False if the value just assigned to var violates a constraint
+    with an assigned variable, otherwise True.  (If check_all_constraints was
+    True before var was assigned, this is the same as check_all_constraints.)"""
+    asgn = csp.assignments
+    for constr in csp.constraints_between(var) :
+        if constr.var2 in asgn :
+            if not constr.constraint_fn(asgn[var], asgn[constr.var2]) :
+                return False
+    for constr in csp.global_constraints :
+        if var in constr.variables and not constr.check_assignments(asgn) :
+            return False
+    return True
+
+def backtrack(problem, propagate_fn=None, select_var_fn=None,
+              order_values_fn=None) :
+    """Solves the problem by depth-first search, calling propagate_fn(csp, var)
+    after assigning each variable var, if given.  select_var_fn and
+    order_values_fn choose the variable to assign next and the order to try
+    its values in (see ordering.py).  Same return type as
+    solve_constraint_dfs.  Does not change problem."""
+    csp = problem.copy().start_trail()
+    count = 0
+    record_failure = getattr(select_var_fn, 'record_failure', None)
+
+    def search(var) :
+        # var is the variable just assigned, or None at the root
+        nonlocal count
+        count += 1
+        if has_empty_domains(csp) or not (check_all_constraints(csp) if var is None
+                                          else check_new_assignment(csp, var)) :
+            if record_failure is not None :
+                record_failure(csp)
+            return None
+        next_var = csp.pop_next_unassigned_var(select_var_fn)
+        if next_var is None :
+            return dict(csp.assignments)
+        values = (csp.get_domain(next_var)[:] if order_values_fn is None
+                  else order_values_fn(csp, next_var))
+        for val in values :
+            mark = csp.trail_mark()
+            csp.set_assignment(next_var, val)
+            if propagate_fn is not None :
+                propagate_fn(csp, next_var)
+            solution = search(next_var)
+            if solution is not None :
+                return solution
+            csp.undo_to_mark(mark)
+        return None
+
+    return (search(None), count)
+
+
+def solve_constraint_dfs_backtracking(problem, **ordering) :
+    """Like solve_constraint_dfs, without copying the problem.  Takes the
+    select_var_fn and order_values_fn arguments of backtrack."""
+    return backtrack(problem, None, **ordering)
+
+def solve_constraint_forward_checking_backtracking(problem, **ordering) :
+    "Like solve_constraint_forward_checking, without copying the problem."
+    return backtrack(problem, forward_check, **ordering)
+
+def solve_constraint_propagate_reduced_domains_backtracking(problem, **ordering) :
+    """Like solve_constraint_propagate_reduced_domains, without copying the
+    problem."""
+    return backtrack(problem, lambda csp, var : domain_reduction(csp, [var]),
+                     **ordering)
+
+def solve_constraint_backtracking(problem, enqueue_condition=None,
+                                  propagate_fn=propagate, select_var_fn=None,
+                                  order_values_fn=None) :
+    "Like solve_constraint_generic, without copying the problem."
+    propagate_var = None
+    if enqueue_condition is not None :
+        propagate_var = lambda csp, var : propagate_fn(enqueue_condition, csp, [var])
+    return backtrack(problem, propagate_var, select_var_fn, order_values_fn)
+
+
+# Uncomment the line below to solve the Pokemon problem with forward checking
+# and propagation through singleton domains, without copying the problem:
+
+# from lab4 import get_pokemon_problem, condition_singleton
+# print(solve_constraint_backtracking(get_pokemon_problem(), condition_singleton))
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+
+# MIT 6.034 Lab 4: Constraint Satisfaction Problems
+
+# Benchmarks the constraint solvers on generated problems: random binary
+# CSPs with a chosen number of variables n, domain size d, density (the
+# fraction of pairs of variables with a constraint) and tightness (the
+# fraction of pairs of values each constraint forbids), N-queens, graph
+# coloring and Sudoku.  For each solver and problem it reports the wall time,
+# the number of extensions, the number of constraint checks and the peak
+# memory, and can write the results as JSON to compare versions of the code.
+#
+# Run from your lab4 directory, for example:
+#     python3 benchmark.py --problems random queens --seeds 3 --output results.json
+
+import argparse
+import json
+import platform
+import random
+import sys
+import tracemalloc
+from copy import copy
+from time import perf_counter, strftime
+from constraint_api import *
+from lab4 import (solve_constraint_dfs, solve_constraint_forward_checking,
+                  solve_constraint_propagate_reduced_domains,
+                  solve_constraint_generic, condition_singleton,
+                  condition_domain_reduction, all_different)
+from backtracking import solve_constraint_backtracking
+from backjumping import solve_constraint_backjumping
+from ordering import DomWdeg
+
+SOLVERS = {
+    'dfs' : solve_constraint_dfs,
+    'forward_checking' : solve_constraint_forward_checking,
+    'propagate_reduced_domains' : solve_constraint_propagate_reduced_domains,
+    'generic_singleton' :
+        lambda csp : solve_constraint_generic(csp, condition_singleton),
+    'generic_domain_reduction' :
+        lambda csp : solve_constraint_generic(csp, condition_domain_reduction),
+    'backtracking_domain_reduction' :
+        lambda csp : solve_constraint_backtracking(csp, condition_domain_reduction),
+    'backjumping_dom_wdeg' :
+        lambda csp : solve_constraint_backjumping(csp, DomWdeg()),
+}
+
+# The solvers defined in lab4.py
+LAB4_SOLVERS = ['dfs', 'forward_checking', 'propagate_reduced_domains',
+                'generic_singleton', 'generic_domain_reduction']
+
+
+#### Problem generators ########################################################
+
+def relation(allowed) :
+    "Returns a constraint function that allows the pairs of values in allowed."
+    def constraint_fn(a, b) :
+        return (a, b) in allowed
+    return constraint_fn
+
+def random_binary_csp(n, d, density, tightness, seed) :
+    """Returns a random binary CSP (model B): n variables with domain
+    range(d), constraints between round(density * n(n-1)/2) random pairs of
+    variables, each forbidding round(tightness * d**2) random pairs of values."""
+    rng = random.Random(seed)
+    variables = ['V%03i' % i for i in range(n)]
+    csp = ConstraintSatisfactionProblem(variables)
+    for var in variables :
+        csp.set_domain(var, list(range(d)))
+    pairs = [(a, b) for i, a in enumerate(variables) for b in variables[i+1:]]
+    value_pairs = [(x, y) for x in range(d) for y in range(d)]
+    num_forbidden = int(round(tightness * len(value_pairs)))
+    for var1, var2 in rng.sample(pairs, int(round(density * len(pairs)))) :
+        forbidden = set(rng.sample(value_pairs, num_forbidden))
+        allowed = frozenset(p for p in value_pairs if p not in forbidden)
+        csp.add_constraint(var1, var2, relation(allowed))
+    return csp
+
+def queens_fn(distance) :
+    """Returns a constraint function for two queens in columns distance
+    apart: not in the same row or on the same diagonal."""
+    def constraint_fn(a, b) :
+        return a != b and abs(a - b) != distance
+    return constraint_fn
+
+def n_queens(n) :
+    "Returns the N-queens problem: one variable per column, the row of its queen."
+    variables = ['Q%03i' % i for i in range(n)]
+    csp = ConstraintSatisfactionProblem(variables)
+    for var in variables :
+        csp.set_domain(var, list(range(n)))
+    for i in range(n) :
+        for j in range(i + 1, n) :
+            csp.add_constraint(variables[i], variables[j], queens_fn(j - i))
+    return csp
+
+def graph_coloring(n, k, edge_probability, seed) :
+    """Returns the problem of coloring a random graph with n nodes, each pair
+    joined with probability edge_probability, in k colors."""
+    rng = random.Random(seed)
+    variables = ['N%03i' % i for i in range(n)]
+    csp = ConstraintSatisfactionProblem(variables)
+    for var in variables :
+        csp.set_domain(var, list(range(k)))
+    for i in range(n) :
+        for j in range(i + 1, n) :
+            if rng.random() < edge_probability :
+                csp.add_constraint(variables[i], variables[j], constraint_different)
+    return csp
+
+def sudoku(givens, seed) :
+    """Returns a random Sudoku with the given number of cells filled in, made
+    by shuffling a solved grid and emptying the other cells.  (It has a
+    solution, but it may have more than one.)"""
+    rng = random.Random(seed)
+    digits = list(range(1, 10))
+    rng.shuffle(digits)
+    bands = rng.sample(range(3), 3)
+    stacks = rng.sample(range(3), 3)
+    rows = [3 * band + r for band in bands for r in rng.sample(range(3), 3)]
+    cols = [3 * stack + c for stack in stacks for c in rng.sample(range(3), 3)]
+    grid = [[digits[(3 * (r % 3) + r // 3 + c) % 9] for c in cols] for r in rows]
+    cells = [(r, c) for r in range(9) for c in range(9)]
+    filled = set(rng.sample(cells, givens))
+    name = lambda r, c : 'R%iC%i' % (r + 1, c + 1)
+    csp = ConstraintSatisfactionProblem([name(r, c) for r, c in cells])
+    for r, c in cells :
+        csp.set_domain(name(r, c), [grid[r][c]] if (r, c) in filled else digits[:])
+    # One constraint for each pair of cells in the same row, column or box
+    # (cells in a row and a box together get only one).
+    units = ([[name(r, c) for c in range(9)] for r in range(9)]
+             + [[name(r, c) for r in range(9)] for c in range(9)]
+             + [[name(3 * br + r, 3 * bc + c) for r in range(3) for c in range(3)]
+                for br in range(3) for bc in range(3)])
+    pairs = set()
+    for unit in units :
+        for constraint in all_different(unit) :
+            pair = tuple(sorted((constraint.var1, constraint.var2)))
+            if pair not in pairs :
+                pairs.add(pair)
+                csp.add_constraint(pair[0], pair[1], constraint_different)
+    return csp
+
+def benchmark_problems(args) :
+    "Returns a list of (name, problem) for the problems chosen by args."
+    problems = []
+    for seed in range(args.seed, args.seed + args.seeds) :
+        if 'random' in args.problems :
+            problems.append(('random_n%i_d%i_p%g_q%g_s%i'
+                             % (args.n, args.d, args.density, args.tightness, seed),
+                             random_binary_csp(args.n, args.d, args.density,
+                                               args.tightness, seed)))
+        if 'coloring' in args.problems :
+            problems.append(('coloring_n%i_k%i_s%i' % (args.n, args.colors, seed),
+                             graph_coloring(args.n, args.colors,
+                                            args.edge_probability, seed)))
+        if 'sudoku' in args.problems :
+            problems.append(('sudoku_g%i_s%i' % (args.givens, seed),
+                             sudoku(args.givens, seed)))
+    if 'queens' in args.problems :
+        for n in args.queens :
+            problems.append(('queens_%i' % n, n_queens(n)))
+    return problems
+
+
+#### Measurements ##############################################################
+
+def count_checks(csp) :
+    """Replaces each constraint of csp with one whose function counts its
+    calls.  (Copies of a problem share its constraints, so they aren't
+    changed in place.)  Returns a one-element list holding the count."""
+    count = [0]
+    counted_constraints = []
+    for constraint in csp.get_all_constraints() :
+        def counted(a, b, constraint_fn=constraint.constraint_fn) :
+            count[0] += 1
+            return constraint_fn(a, b)
+        counted.__name__ = constraint.constraint_fn.__name__
+        constraint = copy(constraint)
+        constraint.constraint_fn = counted
+        counted_constraints.append(constraint)
+    csp.constraints = counted_constraints
+    csp.clear_arc_index()
+    return count
+
+def check_solution(problem, solution) :
+    "Returns True if solution assigns every variable a value satisfying every constraint."
+    return (set(solution) == set(problem.get_all_variables())
+            and all(solution[var] in problem.get_domain(var) for var in solution)
+            and all(c.check(solution[c.var1], solution[c.var2])
+                    for c in problem.get_all_constraints()))
+
+def run_solver(solver_name, problem, measure_memory=True) :
+    """Solves a copy of problem with one solver and returns a dictionary of
+    measurements.  Peak memory is measured in a second run, since tracing
+    allocations slows the solver down."""
+    solver = SOLVERS[solver_name]
+    csp = problem.copy()
+    checks = count_checks(csp)
+    start = perf_counter()
+    solution, extensions = solver(csp)
+    seconds = perf_counter() - start
+    measurement = {
+        'solver' : solver_name,
+        'solved' : solution is not None,
+        'correct' : solution is None or check_solution(problem, solution),
+        'seconds' : seconds,
+        'extensions' : extensions,
+        'constraint_checks' : checks[0],
+        'peak_memory_bytes' : None,
+    }
+    if measure_memory :
+        csp = problem.copy()
+        tracemalloc.start()
+        solver(csp)
+        measurement['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return measurement
+
+def run_benchmarks(problems, solvers, measure_memory=True, verbose=False) :
+    """Runs each solver on each (name, problem).  Returns a list of
+    measurement dictionaries."""
+    results = []
+    for problem_name, problem in problems :
+        for solver_name in solvers :
+            measurement = run_solver(solver_name, problem, measure_memory)
+            measurement['problem'] = problem_name
+            measurement['variables'] = len(problem.get_all_variables())
+            measurement['constraints'] = len(problem.get_all_constraints())
+            results.append(measurement)
+            if verbose :
+                print_measurement(measurement)
+    return results
+
+def print_measurement(m) :
+    memory = ('%9.1f KiB' % (m['peak_memory_bytes'] / 1024.0)
+              if m['peak_memory_bytes'] is not None else '%13s' % '-')
+    print('%-30s %-30s %-8s %9.4fs %9i ext %11i checks %s'
+          % (m['problem'], m['solver'],
+             ('solved' if m['solved'] else 'no soln') + ('' if m['correct'] else '!'),
+             m['seconds'], m['extensions'], m['constraint_checks'], memory))
+    sys.stdout.flush()
+
+def main(argv=None) :
+    parser = argparse.ArgumentParser(description='Benchmark the lab4 constraint solvers.')
+    parser.add_argument('--solvers', nargs='+', choices=sorted(SOLVERS),
+                        default=LAB4_SOLVERS, help='solvers to run')
+    parser.add_argument('--problems', nargs='+',
+                        choices=['random', 'queens', 'coloring', 'sudoku'],
+                        default=['random', 'queens', 'coloring', 'sudoku'],
+                        help='kinds of problems to generate')
+    parser.add_argument('--seeds', type=int, default=2,
+                        help='number of random problems of each kind')
+    parser.add_argument('--seed', type=int, default=6034,
+                        help='first random seed')
+    parser.add_argument('--n', type=int, default=12,
+                        help='number of variables of random and coloring problems')
+    parser.add_argument('--d', type=int, default=5,
+                        help='domain size of random problems')
+    parser.add_argument('--density', type=float, default=0.3,
+                        help='fraction of pairs of variables with a constraint')
+    parser.add_argument('--tightness', type=float, default=0.3,
+                        help='fraction of pairs of values each constraint forbids')
+    parser.add_argument('--queens', nargs='+', type=int, default=[6, 8],
+                        help='sizes of N-queens problems')
+    parser.add_argument('--colors', type=int, default=3,
+                        help='number of colors for coloring problems')
+    parser.add_argument('--edge-probability', type=float, default=0.2,
+                        help='probability of each edge of coloring problems')
+    parser.add_argument('--givens', type=int, default=70,
+                        help='number of filled cells of Sudoku problems')
+    parser.add_argument('--no-memory', action='store_true',
+                        help="don't measure peak memory (halves the run time)")
+    parser.add_argument('--output', metavar='FILE',
+                        help='write the results to FILE as JSON')
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON instead of a table')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(benchmark_problems(args), args.solvers,
+                             not args.no_memory, verbose=not args.json)
+    report = {
+        'date' : strftime('%Y-%m-%dT%H:%M:%S'),
+        'python' : platform.python_version(),
+        'platform' : platform.platform(),
+        'arguments' : vars(args),
+        'results' : results,
+    }
+    if args.output :
+        with open(args.output, 'w') as f :
+            json.dump(report, f, indent=2)
+    if args.json :
+        print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__' :
+    main()
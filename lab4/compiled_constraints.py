@@ -0,0 +1,122 @@
+# MIT 6.034 Lab 4: Constraint Satisfaction Problems
+
+# Compiled constraints.  A constraint whose function is pure (its result
+# depends only on its two arguments, like constraint_equal) can be computed
+# once for every pair of values in the domains of its variables, giving the
+# set of values of one variable that support each value of the other.
+# Checking the constraint is then a set lookup instead of a call to the
+# function, and whether a value has support in a domain is one set
+# intersection.  Domains only shrink while a problem is solved, so sets made
+# from the domains before solving cover every check; values outside them are
+# still checked by calling the function.
+
+from constraint_api import *
+from lab4 import constraint_adjacent, constraint_not_adjacent
+
+# The constraint functions that are known to be pure
+PURE_CONSTRAINT_FNS = [constraint_equal, constraint_different,
+                       constraint_adjacent, constraint_not_adjacent]
+
+MAX_PAIRS = 100000  # don't compile constraints with more pairs of values
+
+
+class CompiledConstraint(Constraint) :
+    """A Constraint with, for each value of one variable, the set of values of
+    the other variable compatible with it:
+        supports1[val1] : the values of var2 compatible with val1
+        supports2[val2] : the values of var1 compatible with val2
+    The sets never change once made, so copies share them, and the reverse
+    constraint just swaps them."""
+
+    def __init__(self, var1, var2, constraint_fn, supports1, supports2) :
+        Constraint.__init__(self, var1, var2, constraint_fn)
+        self.supports1 = supports1
+        self.supports2 = supports2
+        self.reversed = None
+
+    def check(self, val1, val2) :
+        "Returns True if values satisfy constraint_fn, otherwise False"
+        supports = self.supports1.get(val1)
+        if supports is None or val2 not in self.supports2 :
+            return bool(self.constraint_fn(val1, val2))
+        return val2 in supports
+
+    def has_support1(self, val1, values2) :
+        supports = self.supports1.get(val1)
+        if supports is None :
+            return Constraint.has_support1(self, val1, values2)
+        return (not supports.isdisjoint(values2)
+                or any(self.constraint_fn(val1, val2) for val2 in values2
+                       if val2 not in self.supports2))
+
+    def has_support2(self, values1, val2) :
+        supports = self.supports2.get(val2)
+        if supports is None :
+            return Constraint.has_support2(self, values1, val2)
+        return (not supports.isdisjoint(values1)
+                or any(self.constraint_fn(val1, val2) for val1 in values1
+                       if val1 not in self.supports1))
+
+    def reverse(self) :
+        if self.reversed is None :
+            self.reversed = CompiledConstraint(self.var2, self.var1,
+                                               lambda a,b: self.constraint_fn(b,a),
+                                               self.supports2, self.supports1)
+            self.reversed.reversed = self
+        return self.reversed
+
+    def __deepcopy__(self, memo) :
+        return self
+
+    def __getstate__(self) :
+        # The reversed constraint's function is a lambda, which can't be pickled
+        state = self.__dict__.copy()
+        state['reversed'] = None
+        return state
+
+
+def compile_constraint(constraint, values1, values2) :
+    """Returns a CompiledConstraint equivalent to constraint, with supports
+    for the values of var1 in values1 and of var2 in values2."""
+    supports1 = dict((val1, set()) for val1 in values1)
+    supports2 = dict((val2, set()) for val2 in values2)
+    for val1 in values1 :
+        for val2 in values2 :
+            if constraint.check(val1, val2) :
+                supports1[val1].add(val2)
+                supports2[val2].add(val1)
+    freeze = lambda supports : dict((val, frozenset(vals))
+                                    for val, vals in supports.items())
+    return CompiledConstraint(constraint.var1, constraint.var2,
+                              constraint.constraint_fn,
+                              freeze(supports1), freeze(supports2))
+
+def compile_problem(csp, pure_fns=None, max_pairs=MAX_PAIRS) :
+    """Replaces each constraint of csp whose function is in pure_fns
+    (PURE_CONSTRAINT_FNS if None) with a CompiledConstraint over the current
+    domains of its variables, unless the domains have more than max_pairs
+    pairs of values, or the values can't be used as keys.  Modifies and
+    returns csp."""
+    if pure_fns is None :
+        pure_fns = PURE_CONSTRAINT_FNS
+    compiled = []
+    for constraint in csp.get_all_constraints() :
+        values1 = csp.get_domain(constraint.var1)
+        values2 = csp.get_domain(constraint.var2)
+        if (not isinstance(constraint, CompiledConstraint)
+            and any(constraint.constraint_fn is fn for fn in pure_fns)
+            and len(values1) * len(values2) <= max_pairs) :
+            try :
+                constraint = compile_constraint(constraint, values1, values2)
+            except TypeError :  # unhashable values
+                pass
+        compiled.append(constraint)
+    csp.constraints = compiled
+    return csp
+
+
+# Uncomment the lines below to solve the Pokemon problem with compiled
+# constraints:
+
+# from lab4 import get_pokemon_problem, solve_constraint_generic, condition_domain_reduction
+# print(solve_constraint_generic(compile_problem(get_pokemon_problem()), condition_domain_reduction))
@@ -15,6 +15,14 @@ class Constraint :
         "Returns True if values satisfy constraint_fn, otherwise False"
         return bool(self.constraint_fn(val1, val2))
 
+    def has_support1(self, val1, values2) :
+        "Returns True if val1 satisfies constraint_fn with some value in values2"
+        return any(self.constraint_fn(val1, val2) for val2 in values2)
+
+    def has_support2(self, values1, val2) :
+        "Returns True if val2 satisfies constraint_fn with some value in values1"
+        return any(self.constraint_fn(val1, val2) for val1 in values1)
+
     def __str__(self):
         return 'Constraint(%s, %s, %s)' % (str(self.var1), str(self.var2),
                                            self.constraint_fn.__name__)
@@ -34,26 +42,144 @@ def constraint_different(a,b) :
     return a != b
 
 
+# Bitset domains.  A BitsetDomain stores a domain as the bits of an int, one
+# bit for each value of a fixed, sorted ValueUniverse, so that membership
+# tests and removals are O(1) and a copy of the domain is just an int.
+# See ConstraintSatisfactionProblem.use_bitset_domains.
+
+def popcount(bits) :
+    return bin(bits).count('1')
+
+class ValueUniverse :
+    "A sorted list of values, each with the index of its bit."
+
+    def __init__(self, values) :
+        self.values = sorted(set(values))
+        self.positions = dict((val, i) for i, val in enumerate(self.values))
+
+    def __len__(self) :
+        return len(self.values)
+
+    def __contains__(self, val) :
+        return val in self.positions
+
+    def __deepcopy__(self, memo) :
+        return self  # never changes, so copies can share it
+
+
+class BitsetDomain :
+    """A domain whose values all belong to a ValueUniverse.  Behaves like the
+    sorted list of its values for iteration, len, in and ==."""
+    __slots__ = ('universe', 'bits')
+
+    def __init__(self, universe, bits=0) :
+        self.universe = universe
+        self.bits = bits
+
+    @classmethod
+    def from_values(cls, universe, values) :
+        bits = 0
+        for val in values :
+            bits |= 1 << universe.positions[val]
+        return cls(universe, bits)
+
+    def __contains__(self, val) :
+        i = self.universe.positions.get(val)
+        return i is not None and (self.bits >> i) & 1 == 1
+
+    def discard(self, val) :
+        "Removes the value if present.  Returns True if it was present."
+        i = self.universe.positions.get(val)
+        if i is None or not (self.bits >> i) & 1 :
+            return False
+        self.bits &= ~(1 << i)
+        return True
+
+    def add(self, val) :
+        self.bits |= 1 << self.universe.positions[val]
+
+    def __len__(self) :
+        return popcount(self.bits)
+
+    def __iter__(self) :
+        values = self.universe.values
+        bits = self.bits
+        while bits :
+            low = bits & -bits
+            yield values[low.bit_length() - 1]
+            bits ^= low
+
+    def snapshot(self) :
+        "Returns the state of the domain, for restore."
+        return self.bits
+
+    def restore(self, bits) :
+        self.bits = bits
+
+    def copy(self) :
+        return BitsetDomain(self.universe, self.bits)
+
+    def __deepcopy__(self, memo) :
+        return self.copy()
+
+    def __eq__(self, other) :
+        if isinstance(other, BitsetDomain) :
+            return list(self) == list(other)
+        if isinstance(other, list) and not other :
+            return self.bits == 0
+        return isinstance(other, list) and list(self) == other
+
+    def __ne__(self, other) :
+        return not self == other
+
+    def __str__(self) :
+        return str(list(self))
+    __repr__ = __str__
+
+
 class ConstraintSatisfactionProblem :
     def __init__(self, variables, constraints=[]) :
         self.variables = sorted(variables[:])
-        self.constraints = deepcopy(constraints)
+        self.constraints = constraints[:]
         self.unassigned_vars = self.variables[:]
         self.domains = deepcopy({})
         self.assignments = deepcopy({})
+        self.global_constraints = []
+        self.shared_domains = set()  # variables whose domain a copy may share
+        self.trail = None
+        self.clear_arc_index()
 
     def get_domain(self, var) :
-        "Returns the list of values in the variable's domain."
+        """Returns the list of values in the variable's domain.  Don't change
+        the list: copies of a problem share it until one of them changes the
+        domain, which must be done with set_domain, eliminate or
+        set_assignment.  (A BitsetDomain is returned as a new list; use
+        domain_size and has_value to check it without making one.)"""
         if var not in self.variables :
             raise KeyError(str(var) + " is not a variable in this problem." + str(self.variables))
-        return self.domains.get(var, [])
+        domain = self.domains.get(var, [])
+        return list(domain) if isinstance(domain, BitsetDomain) else domain
+
+    def domain_size(self, var) :
+        "Returns the number of values in the variable's domain."
+        return len(self.domains.get(var, []))
+
+    def has_value(self, var, val) :
+        "Returns True if the value is in the variable's domain."
+        return val in self.domains.get(var, [])
 
     def set_domain(self, var, domain) :
         """Sets the domain of the variable to the specified list of values,
         sorted alphabetically/numerically."""
         if var not in self.variables :
             raise KeyError(str(var) + " is not a variable in this problem.")
-        self.domains[var] = sorted(domain[:])
+        self.record_domain(var)
+        self.shared_domains.discard(var)
+        old = self.domains.get(var)
+        if isinstance(old, BitsetDomain) :
+            self.domains[var] = self.make_bitset_domain(domain, old.universe)
+        else :
+            self.domains[var] = sorted(domain[:])
         return self
 
     def set_all_domains(self, domains_dict) :
@@ -62,7 +188,10 @@ class ConstraintSatisfactionProblem :
         if not set(domains_dict.keys()) <= set(self.variables):
             invalid_vars = [v for v in list(domains_dict.keys()) if v not in self.variables]
             raise KeyError(str(invalid_vars) + " are not variables in this problem.")
+        if self.trail is not None :
+            self.trail.append(('domains', self.domains))
         self.domains = deepcopy(domains_dict)
+        self.shared_domains = set()
         return self
 
     def get_all_variables(self):
@@ -77,8 +206,19 @@ class ConstraintSatisfactionProblem :
         """Removes the value from variable's domain.  Returns True if
         the domain contained the value when this function was
         called; False if the domain didn't contain the value."""
+        if var in self.shared_domains :
+            self.own_domain(var)
         values = self.domains.get(var, [])
+        if isinstance(values, BitsetDomain) :
+            if self.trail is not None :
+                self.trail.append(('bits', var, values.bits))
+            return values.discard(val)
         found = val in values
+        if self.trail is not None :
+            if var not in self.domains :
+                self.record_domain(var)
+            elif found :
+                self.trail.append(('remove', var, values.index(val), val))
         if found:
             values.remove(val)
         self.domains[var] = values
@@ -99,9 +239,19 @@ class ConstraintSatisfactionProblem :
             raise AttributeError("Can't assign variable " + str(var) + " to value " + str(val) + ": var has already been assigned value " + str(self.assignments.get(var)) +".")
         elif val not in self.get_domain(var) :
             raise KeyError("The domain of " + str(var) + " does not contain the value " + str(val) + ".")
-        self.domains[var] = [val]
+        self.record_domain(var)
+        self.shared_domains.discard(var)
+        domain = self.domains[var]
+        if isinstance(domain, BitsetDomain) :
+            self.domains[var] = BitsetDomain.from_values(domain.universe, [val])
+        else :
+            self.domains[var] = [val]
+        if self.trail is not None :
+            self.trail.append(('assign', var))
         self.assignments[var] = val
         if var in self.unassigned_vars:
+            if self.trail is not None :
+                self.trail.append(('unassigned', self.unassigned_vars.index(var), var))
             self.unassigned_vars.remove(var)
         return self
 
@@ -109,22 +259,96 @@ class ConstraintSatisfactionProblem :
         list(map(lambda p: self.set_assignment(*p), var_val_pairs))
         return self
 
-    def pop_next_unassigned_var(self):
+    def pop_next_unassigned_var(self, select_var_fn=None):
         """Returns first unassigned variable, or None if all variables are
-        assigned.  Modifies unassigned_vars list."""
-        return self.unassigned_vars.pop(0) if self.unassigned_vars else None
+        assigned.  Modifies unassigned_vars list.  If select_var_fn is given,
+        returns the unassigned variable select_var_fn(csp) chooses instead."""
+        if not self.unassigned_vars :
+            return None
+        index = 0
+        if select_var_fn is not None :
+            index = self.unassigned_vars.index(select_var_fn(self))
+        if self.trail is not None :
+            self.trail.append(('unassigned', index, self.unassigned_vars[index]))
+        return self.unassigned_vars.pop(index)
 
     def add_constraint(self, var1, var2, constraint_fn) :
         """Given two variables and a function to act as a constraint between
         them, creates a Constraint and adds it to the list of constraints"""
-        self.constraints.append(Constraint(var1, var2, constraint_fn))
+        self.add_to_constraint_list([Constraint(var1, var2, constraint_fn)])
         return self
 
     def add_constraints(self, constraint_list):
         "Adds all of the specified constraints to the problem"
-        self.constraints.extend(deepcopy(constraint_list))
+        self.add_to_constraint_list(constraint_list[:])
         return self
 
+    def add_global_constraint(self, constraint) :
+        """Adds a constraint on any number of variables, such as the ones in
+        global_constraints.py.  It must have a list of variables and a method
+        check_assignments(assignments), and can be filtered with
+        propagate_with_globals."""
+        for var in constraint.variables :
+            if var not in self.variables :
+                raise KeyError(str(var) + " is not a variable in this problem.")
+        self.global_constraints.append(constraint)
+        return self
+
+    def add_to_constraint_list(self, constraints) :
+        "Appends the constraints to the list, keeping the arc index up to date."
+        index_is_current = self.arc_index_is_current() and not self.arc_index_shared
+        self.constraints.extend(constraints)
+        if index_is_current :
+            for constraint in constraints :
+                self.index_constraint(constraint)
+            self.arc_index_size = len(self.constraints)
+
+    # The arc index sends each variable to a dictionary sending each neighbor
+    # to the list of constraints between them, oriented so that the variable
+    # comes first (reversed once, when indexed).  It is rebuilt whenever the
+    # constraints list has been replaced or added to directly, without
+    # add_constraint(s).  Copies share the index until either adds a
+    # constraint, which makes it rebuild its own.
+
+    def clear_arc_index(self) :
+        "Forgets the arc index; it is rebuilt the next time it is needed."
+        self.arc_index = None
+        self.arc_list = None
+        self.arc_index_source = None
+        self.arc_index_size = 0
+        self.arc_index_shared = False
+        return self
+
+    def arc_index_is_current(self) :
+        return (self.arc_index is not None
+                and self.arc_index_source is self.constraints
+                and self.arc_index_size == len(self.constraints))
+
+    def build_arc_index(self) :
+        self.arc_index = {}
+        self.arc_list = {}  # var -> oriented constraints, in list order
+        self.arc_index_source = self.constraints
+        self.arc_index_size = len(self.constraints)
+        self.arc_index_shared = False
+        for constraint in self.constraints :
+            self.index_constraint(constraint)
+        return self
+
+    def index_constraint(self, constraint) :
+        var1, var2 = constraint.var1, constraint.var2
+        self.arc_index.setdefault(var1, {}).setdefault(var2, []).append(constraint)
+        self.arc_list.setdefault(var1, []).append(constraint)
+        if var1 != var2 :
+            reverse = constraint.reverse()
+            self.arc_index.setdefault(var2, {}).setdefault(var1, []).append(reverse)
+            self.arc_list.setdefault(var2, []).append(reverse)
+
+    def get_arc_index(self) :
+        "Returns the arc index, (re)building it if necessary."
+        if not self.arc_index_is_current() :
+            self.build_arc_index()
+        return self.arc_index
+
     def constraints_between(self, var1=None, var2=None) :
         """Returns a list of constraints in the problem. If either
         variable is provided, returns only variables that start/end
@@ -133,6 +357,12 @@ class ConstraintSatisfactionProblem :
         # The returned constraints will be transformed so that var1
         # comes first and var2 comes second, as requested.
 
+        if var1 is not None :
+            index = self.get_arc_index()
+            if var2 is None :
+                return self.arc_list.get(var1, [])[:]
+            return index.get(var1, {}).get(var2, [])[:]
+
         pred1 =  lambda node : (var1 is None) or (node == var1)
         pred2 =  lambda node : (var2 is None) or (node == var2)
 
@@ -144,7 +374,7 @@ class ConstraintSatisfactionProblem :
 
     def get_neighbors(self, var):
         "Returns a list of variables that share constraints with var"
-        return sorted(set([c.var2 for c in self.constraints_between(var)]))
+        return sorted(self.get_arc_index().get(var, {}))
 
     def set_unassigned_vars_order(self, unassigned_vars_ordered) :
         """Given an ordered list of unassigned variables, sets the list of
@@ -156,12 +386,154 @@ class ConstraintSatisfactionProblem :
         if any([var in list(self.assignments.keys()) for var in unassigned_vars_ordered]):
             raise AttributeError("unassigned_vars_ordered contains variables "
                                  +"that are already assigned")
+        if self.trail is not None :
+            self.trail.append(('unassigned_vars', self.unassigned_vars))
         self.unassigned_vars = unassigned_vars_ordered[:]
         return self
 
+    def use_bitset_domains(self) :
+        """Stores each domain as a BitsetDomain over the values it has now.
+        get_domain still returns a list, and set_domain still takes one."""
+        for var, domain in list(self.domains.items()) :
+            if not isinstance(domain, BitsetDomain) :
+                self.record_domain(var)
+                self.shared_domains.discard(var)
+                self.domains[var] = self.make_bitset_domain(domain)
+        return self
+
+    def use_list_domains(self) :
+        "Stores each domain as a sorted list again."
+        for var, domain in list(self.domains.items()) :
+            if isinstance(domain, BitsetDomain) :
+                self.record_domain(var)
+                self.shared_domains.discard(var)
+                self.domains[var] = list(domain)
+        return self
+
+    def make_bitset_domain(self, values, universe=None) :
+        """Returns a BitsetDomain holding the values, over universe if it
+        contains them all, else over a new universe of just the values."""
+        if universe is None or not all(val in universe for val in values) :
+            universe = ValueUniverse(values)
+        return BitsetDomain.from_values(universe, values)
+
+    def snapshot_domains(self) :
+        """Returns a copy of all the domains, for restore_domains.  This is
+        cheap for bitset domains: one int per variable."""
+        return dict((var, domain.copy() if isinstance(domain, BitsetDomain)
+                     else domain[:]) for var, domain in self.domains.items())
+
+    def restore_domains(self, snapshot) :
+        "Restores the domains saved by snapshot_domains."
+        self.set_all_domains(snapshot)
+        return self
+
+    # The trail.  While a trail is kept, every change to the domains,
+    # assignments and unassigned variables made through the methods above is
+    # recorded, so that backtracking solvers can change one problem in place
+    # and undo the changes instead of copying the problem at every step.
+
+    def start_trail(self) :
+        """Starts recording changes.  Returns this problem.  Domains shared
+        with copies are copied first, since undoing changes the domains in
+        place."""
+        for var in list(self.shared_domains) :
+            self.own_domain(var)
+        self.trail = []
+        return self
+
+    def stop_trail(self) :
+        "Stops recording changes and forgets the recorded ones."
+        self.trail = None
+        return self
+
+    def trail_mark(self) :
+        "Returns a mark to undo_to_mark, to undo the changes made after now."
+        return len(self.trail)
+
+    def record_domain(self, var) :
+        "Records the current domain of var, which is about to be replaced."
+        if self.trail is not None :
+            self.trail.append(('domain', var, self.domains.get(var)))
+
+    def undo_to_mark(self, mark) :
+        "Undoes the changes recorded since trail_mark returned mark."
+        trail = self.trail
+        while len(trail) > mark :
+            entry = trail.pop()
+            kind = entry[0]
+            if kind == 'remove' :
+                self.domains[entry[1]].insert(entry[2], entry[3])
+            elif kind == 'domain' :
+                if entry[2] is None :
+                    self.domains.pop(entry[1], None)
+                else :
+                    self.domains[entry[1]] = entry[2]
+            elif kind == 'assign' :
+                del self.assignments[entry[1]]
+            elif kind == 'unassigned' :
+                self.unassigned_vars.insert(entry[1], entry[2])
+            elif kind == 'unassigned_vars' :
+                self.unassigned_vars = entry[1]
+            elif kind == 'domains' :
+                self.domains = entry[1]
+            elif kind == 'bits' :
+                self.domains[entry[1]].bits = entry[2]
+        return self
+
+    # Copying.  The variables and constraints never change once made, so
+    # copies share them (and the arc index), and copy only the lists holding
+    # them.  The domains are copied on write: a copy and its original share
+    # each domain until one of them removes a value from it, and the one that
+    # does copies it first.  Domains that are replaced rather than changed in
+    # place are never copied.
+
+    def own_domain(self, var) :
+        "Copies the domain of var, if it may be shared with a copy of this problem."
+        if var in self.shared_domains :
+            self.shared_domains.discard(var)
+            domain = self.domains.get(var)
+            if domain is not None :
+                self.domains[var] = (domain.copy() if isinstance(domain, BitsetDomain)
+                                     else domain[:])
+        return self
+
     def copy(self) :
-        "Return a (deep) copy of this problem."
-        return deepcopy(self)
+        """Return a copy of this problem, which can be changed without changing
+        this one.  Much cheaper than a deep copy: only the domains that
+        either problem changes later are copied."""
+        other = object.__new__(self.__class__)
+        other.__dict__.update(self.__dict__)
+        other.constraints = self.constraints[:]
+        other.global_constraints = self.global_constraints[:]
+        other.unassigned_vars = self.unassigned_vars[:]
+        other.assignments = self.assignments.copy()
+        other.trail = None
+        if self.trail is None :
+            other.domains = self.domains.copy()
+            self.shared_domains = set(self.domains)
+            other.shared_domains = set(self.domains)
+        else :
+            # The trail undoes changes in place, so don't share with it
+            other.domains = self.snapshot_domains()
+            other.shared_domains = set()
+        if self.arc_index_is_current() :
+            other.arc_index_source = other.constraints
+            self.arc_index_shared = other.arc_index_shared = True
+        else :
+            other.clear_arc_index()
+        return other
+
+    def __getstate__(self) :
+        # Deep copies and pickles leave out the arc index, which refers to the
+        # original constraints (it is rebuilt when needed), and the trail.
+        state = self.__dict__.copy()
+        for name in ('arc_index', 'arc_list', 'arc_index_source', 'trail') :
+            state[name] = None
+        state['arc_index_size'] = 0
+        state['arc_index_shared'] = False
+        state['shared_domains'] = set()
+        return state
 
     def __str__(self):
         len_and_str = lambda x: tuple([fn(x) for fn in (len, str)])
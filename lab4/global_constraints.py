@@ -0,0 +1,352 @@
+# MIT 6.034 Lab 4: Constraint Satisfaction Problems
+
+# Global constraints: constraints on any number of variables, each with its
+# own filtering algorithm, instead of many binary constraints.
+#
+#   AllDifferent(variables) : no two variables have the same value.  Filtered
+#       with Regin's algorithm, which removes every value that can't be part
+#       of a matching of the variables to different values.
+#   LinearSum(variables, coefficients, operator, total) : the sum of
+#       coefficient * value is <=, >= or == total.  Filtered on the bounds of
+#       the domains.
+#   Table(variables, tuples) : the values of the variables are one of the
+#       tuples.  Filtered like compact-table, with one bitmask of tuples for
+#       each value.
+#
+# Add them to a problem with csp.add_global_constraint, and solve it with
+# propagate_with_globals as the propagate_fn, for example:
+#     solve_constraint_generic(csp, condition_forward_checking, propagate_with_globals)
+# Each filter method returns the list of variables whose domains it reduced,
+# or empties a domain and returns None if the constraint can't be satisfied.
+
+from constraint_api import *
+from lab4 import propagate
+
+
+class GlobalConstraint :
+    """A constraint on a list of variables.  Each kind of global constraint
+    subclasses this and adds two methods: check(values), which returns True
+    if the values of the variables, in order, satisfy the constraint, and
+    filter(csp), which removes the values the constraint rules out from the
+    domains of its variables in csp, as described above.  Copies of a
+    problem (and the processes of a portfolio) share its global constraints,
+    so a constraint must not change after it is made."""
+
+    def __init__(self, variables) :
+        self.variables = list(variables)
+
+    def check_assignments(self, assignments) :
+        """Returns False if all the variables are assigned and their values
+        violate the constraint, otherwise True."""
+        if all(var in assignments for var in self.variables) :
+            return self.check([assignments[var] for var in self.variables])
+        return True
+
+    def fail(self, csp) :
+        "Empties the domain of the first variable, to show the problem has no solution."
+        csp.set_domain(self.variables[0], [])
+        return None
+
+    def __deepcopy__(self, memo) :
+        return self
+
+    def __str__(self) :
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(map(str, self.variables)))
+
+
+class AllDifferent(GlobalConstraint) :
+    "All the variables have different values."
+
+    def check(self, values) :
+        return len(set(values)) == len(values)
+
+    def find_matching(self, domains) :
+        """Returns a dict matching each variable to a different value of its
+        domain, or None if there is no such matching.  Starts by greedily
+        matching each variable to the first free value of its domain, and adds
+        each variable left unmatched with a breadth-first search for an
+        augmenting path."""
+        var_of = {}   # value -> variable matched to it
+        val_of = {}   # variable -> value matched to it
+        for var in self.variables :
+            for val in domains[var] :
+                if val not in var_of :
+                    var_of[val] = var
+                    val_of[var] = val
+                    break
+        for root in self.variables :
+            if root in val_of :
+                continue
+            parent = {}  # value -> variable it was reached from
+            frontier = [root]
+            free_val = None
+            while frontier and free_val is None :
+                next_frontier = []
+                for var in frontier :
+                    for val in domains[var] :
+                        if val in parent :
+                            continue
+                        parent[val] = var
+                        if val not in var_of :
+                            free_val = val
+                            break
+                        next_frontier.append(var_of[val])
+                    if free_val is not None :
+                        break
+                frontier = next_frontier
+            if free_val is None :
+                return None
+            val = free_val
+            while True :
+                var = parent[val]
+                previous = val_of.get(var)
+                var_of[val] = var
+                val_of[var] = val
+                if var == root :
+                    break
+                val = previous
+        return val_of
+
+    def filter(self, csp) :
+        domains = dict((var, csp.get_domain(var)[:]) for var in self.variables)
+        matching = self.find_matching(domains)
+        if matching is None :
+            return self.fail(csp)
+        # Orient the edges: variable -> its matched value, and value -> each
+        # other variable with it in its domain.  An unmatched edge (var, val)
+        # is in some maximum matching if var and val are in the same strongly
+        # connected component, or val can be reached from an unmatched value.
+        matched_vals = set(matching.values())
+        edges = {}
+        for var in self.variables :
+            edges[(0, var)] = [(1, matching[var])]
+            for val in domains[var] :
+                if val != matching[var] :
+                    edges.setdefault((1, val), []).append((0, var))
+        reachable = set()
+        stack = [(1, val) for val in set().union(*domains.values())
+                 if val not in matched_vals]
+        while stack :
+            node = stack.pop()
+            if node not in reachable :
+                reachable.add(node)
+                stack.extend(edges.get(node, []))
+        component = strongly_connected_components(edges)
+        reduced = []
+        for var in self.variables :
+            for val in domains[var] :
+                if (val != matching[var] and (1, val) not in reachable
+                    and component[(0, var)] != component.get((1, val))) :
+                    csp.eliminate(var, val)
+                    if not reduced or reduced[-1] != var :
+                        reduced.append(var)
+        return reduced
+
+
+def strongly_connected_components(edges) :
+    """Returns a dict mapping each node of the directed graph edges (a dict
+    from each node to a list of the nodes it points to) to the number of its
+    strongly connected component.  (Tarjan's algorithm, without recursion.)"""
+    index = {}
+    low = {}
+    component = {}
+    components = []  # the first node found in each component
+    stack = []
+    on_stack = set()
+    nodes = set(edges)
+    for targets in edges.values() :
+        nodes.update(targets)
+    for start in nodes :
+        if start in index :
+            continue
+        work = [(start, iter(edges.get(start, [])))]
+        index[start] = low[start] = len(index)
+        stack.append(start)
+        on_stack.add(start)
+        while work :
+            node, targets = work[-1]
+            for target in targets :
+                if target not in index :
+                    index[target] = low[target] = len(index)
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, iter(edges.get(target, []))))
+                    break
+                if target in on_stack :
+                    low[node] = min(low[node], index[target])
+            else :
+                work.pop()
+                if work :
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node] :
+                    number = len(components)
+                    components.append(node)
+                    while True :
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component[member] = number
+                        if member == node :
+                            break
+    return component
+
+
+class LinearSum(GlobalConstraint) :
+    """The sum of coefficient * value over the variables is <=, >= or ==
+    total (operator is '<=', '>=' or '==').  The values must be numbers."""
+
+    def __init__(self, variables, coefficients=None, operator='==', total=0) :
+        GlobalConstraint.__init__(self, variables)
+        if coefficients is None :
+            coefficients = [1] * len(self.variables)
+        if len(coefficients) != len(self.variables) :
+            raise ValueError("LinearSum needs one coefficient for each variable")
+        if operator not in ('<=', '>=', '==') :
+            raise ValueError("LinearSum operator must be '<=', '>=' or '=='")
+        self.coefficients = list(coefficients)
+        self.operator = operator
+        self.total = total
+
+    def check(self, values) :
+        total = sum(c * v for c, v in zip(self.coefficients, values))
+        if self.operator == '<=' :
+            return total <= self.total
+        if self.operator == '>=' :
+            return total >= self.total
+        return total == self.total
+
+    def filter_at_most(self, csp, coefficients, total, reduced) :
+        """Removes the values that would make sum(coefficients * values) more
+        than total, whatever the other variables are.  Returns True if any
+        values were removed, or None if a domain becomes empty."""
+        lows = [min(c * val for val in csp.get_domain(var))
+                for c, var in zip(coefficients, self.variables)]
+        least = sum(lows)
+        if least > total :
+            return self.fail(csp)
+        changed = False
+        for c, var, low in zip(coefficients, self.variables, lows) :
+            limit = total - (least - low)
+            for val in csp.get_domain(var)[:] :
+                if c * val > limit :
+                    csp.eliminate(var, val)
+                    changed = True
+                    if var not in reduced :
+                        reduced.append(var)
+        return changed
+
+    def filter(self, csp) :
+        for var in self.variables :
+            if csp.domain_size(var) == 0 :
+                return self.fail(csp)
+        negated = [-c for c in self.coefficients]
+        reduced = []
+        changed = True
+        while changed :
+            changed = False
+            if self.operator in ('<=', '==') :
+                result = self.filter_at_most(csp, self.coefficients, self.total, reduced)
+                if result is None :
+                    return None
+                changed = changed or result
+            if self.operator in ('>=', '==') :
+                result = self.filter_at_most(csp, negated, -self.total, reduced)
+                if result is None :
+                    return None
+                changed = changed or result
+            # Bounds of <= or >= alone don't move when values are removed.
+            changed = changed and self.operator == '=='
+        return reduced
+
+
+class Table(GlobalConstraint) :
+    """The values of the variables, in order, are one of the tuples.  Keeps a
+    bitmask for each value of each variable, of the tuples with that value,
+    so that the tuples still possible are found by ANDing the OR of the
+    masks of each domain, and a value is supported if its mask meets them."""
+
+    def __init__(self, variables, tuples) :
+        GlobalConstraint.__init__(self, variables)
+        self.tuples = [tuple(t) for t in tuples]
+        self.allowed = set(self.tuples)
+        self.masks = [{} for var in self.variables]
+        for i, t in enumerate(self.tuples) :
+            if len(t) != len(self.variables) :
+                raise ValueError("Table tuple " + str(t) + " has the wrong length")
+            for masks, val in zip(self.masks, t) :
+                masks[val] = masks.get(val, 0) | (1 << i)
+
+    def check(self, values) :
+        return tuple(values) in self.allowed
+
+    def filter(self, csp) :
+        current = (1 << len(self.tuples)) - 1
+        for masks, var in zip(self.masks, self.variables) :
+            valid = 0
+            for val in csp.get_domain(var) :
+                valid |= masks.get(val, 0)
+            current &= valid
+            if not current :
+                return self.fail(csp)
+        # Removing values without a supported tuple leaves current the same,
+        # so one pass reaches the fixed point.
+        reduced = []
+        for masks, var in zip(self.masks, self.variables) :
+            for val in csp.get_domain(var)[:] :
+                if not masks.get(val, 0) & current :
+                    csp.eliminate(var, val)
+                    if not reduced or reduced[-1] != var :
+                        reduced.append(var)
+        return reduced
+
+
+def propagate_with_globals(enqueue_condition_fn, csp, queue=None,
+                           binary_propagate_fn=propagate) :
+    """Like propagate, also filtering the global constraints of csp.  Runs
+    binary_propagate_fn on the binary constraints, then filters each global
+    constraint on a variable that was dequeued or reduced, until nothing
+    changes.  Global constraints are filtered whenever one of their variables
+    is reduced; variables they reduce are enqueued for the binary constraints
+    if enqueue_condition_fn says so.  Same return type as propagate."""
+    if queue is None :
+        queue = csp.get_all_variables()[:]
+    watched = set()
+    for constraint in csp.global_constraints :
+        watched.update(constraint.variables)
+    popped = []
+    touched = set(queue)
+    while True :
+        sizes = dict((var, csp.domain_size(var)) for var in watched)
+        result = binary_propagate_fn(enqueue_condition_fn, csp, queue)
+        if result is None :
+            return None
+        popped.extend(result)
+        touched.update(var for var in watched
+                       if csp.domain_size(var) != sizes[var])
+        queue = []
+        while touched :
+            reduced = set()
+            for constraint in csp.global_constraints :
+                if touched.isdisjoint(constraint.variables) :
+                    continue
+                result = constraint.filter(csp)
+                if result is None :
+                    return None
+                reduced.update(result)
+            touched = reduced
+            queue.extend(var for var in sorted(reduced)
+                         if var not in queue and enqueue_condition_fn(csp, var))
+        if not queue :
+            return popped
+
+
+# Uncomment the lines below to solve a small scheduling problem: four talks in
+# three time slots, talks A and B in different slots from C, and the slots of
+# A, B and D adding up to 6.
+
+# from lab4 import solve_constraint_generic, condition_forward_checking
+# csp = ConstraintSatisfactionProblem(list('ABCD'))
+# csp.set_all_domains(dict((var, [1, 2, 3]) for var in 'ABCD'))
+# csp.add_global_constraint(AllDifferent(['A', 'C'])).add_global_constraint(AllDifferent(['B', 'C']))
+# csp.add_global_constraint(LinearSum(['A', 'B', 'D'], [1, 1, 1], '==', 6))
+# print(solve_constraint_generic(csp, condition_forward_checking, propagate_with_globals))
@@ -20,6 +20,9 @@ def check_all_constraints(csp) :
         if (constr.var1 in asgn) and (constr.var2 in asgn):
             if not constr.constraint_fn(asgn[constr.var1], asgn[constr.var2]):
                 return False
+    for constr in csp.global_constraints:
+        if not constr.check_assignments(asgn):
+            return False
     return True
 
 
@@ -74,7 +77,6 @@ def eliminate_from_neighbors(csp, var) :
     If a domain is reduced to size 0, quits immediately and returns None.
     """
     dom = dict()
-    csp2 = csp.copy()
     for nb in csp.get_neighbors(var):
         c = csp.constraints_between(nb, var)
         if len(c) > 1:
@@ -82,14 +84,12 @@ def eliminate_from_neighbors(csp, var) :
             return None
         else:
             for val1 in csp.get_domain(nb):
-                count = 0
-                for val2 in csp.get_domain(var):
-                    if not c[0].check(val1,val2):
-                        count += 1
-                if count == len(csp.get_domain(var)):
-                    csp2.eliminate(nb,val1)
-                    csp.set_domain(nb,csp2.get_domain(nb))
-                    if len(csp.get_domain(nb)) == 0:
+                if not c[0].has_support1(val1, csp.get_domain(var)):
+                    # set_domain replaces the list being iterated over
+                    remaining = csp.get_domain(nb)[:]
+                    remaining.remove(val1)
+                    csp.set_domain(nb,remaining)
+                    if csp.domain_size(nb) == 0:
                         return None
                     dom.setdefault(nb)
     return sorted(dom.keys())
@@ -211,18 +211,13 @@ def propagate(enqueue_condition_fn, csp, queue=None) :
     while queue:
         var = queue.pop(0)
         popped.append(var)
-        for v in csp.variables:
+        for v in csp.get_neighbors(var):
             for constr in csp.constraints_between(var, v):
                 v_domain = csp.get_domain(v)[:]
                 for v_val in v_domain:
-                    num_var_values = len(csp.get_domain(var))
-                    count = 0
-                    for val in csp.get_domain(var):
-                        if not constr.check(val, v_val):
-                            count += 1
-                    if count is num_var_values:
+                    if not constr.has_support2(csp.get_domain(var), v_val):
                         csp.eliminate(v, v_val)
-                        if len(csp.get_domain(v)) is 0:
+                        if csp.domain_size(v) == 0:
                             return None
                         if not v in queue:
                             if enqueue_condition_fn(csp, v):
@@ -238,7 +233,7 @@ def condition_domain_reduction(csp, var) :
 def condition_singleton(csp, var) :
     """Returns True if var should be enqueued under the singleton-domains
     condition, otherwise False"""
-    return len(csp.get_domain(var)) == 1
+    return csp.domain_size(var) == 1
 
 def condition_forward_checking(csp, var) :
     """Returns True if var should be enqueued under the forward-checking
@@ -248,11 +243,16 @@ def condition_forward_checking(csp, var) :
 
 #### Part 5B: Generic Constraint Solver ########################################
 
-def solve_constraint_generic(problem, enqueue_condition=None) :
+def solve_constraint_generic(problem, enqueue_condition=None, propagate_fn=propagate,
+                             select_var_fn=None, order_values_fn=None) :
     """
     Solves the problem, calling propagate with the specified enqueue
     condition (a function). If enqueue_condition is None, uses DFS only.
     Same return type as solve_constraint_dfs.
+    propagate_fn may be another function with the same arguments as
+    propagate, such as propagate_ac2001 from arc_consistency.py.
+    select_var_fn and order_values_fn choose the variable to assign next and
+    the order to try its values in (see ordering.py).
     """
     if has_empty_domains(problem):
         return (None, 1)
@@ -262,17 +262,20 @@ def solve_constraint_generic(problem, enqueue_condition=None) :
         p = agenda.pop(0)
         count += 1
         if not has_empty_domains(p) and check_all_constraints(p):
-            uns = p.pop_next_unassigned_var()
+            uns = p.pop_next_unassigned_var(select_var_fn)
             if uns is None:
                 return (p.assignments,count)
             cop = list()
-            for val in p.get_domain(uns):
+            values = p.get_domain(uns) if order_values_fn is None else order_values_fn(p, uns)
+            for val in values:
                 csp = p.copy().set_assignment(uns,val)
                 if enqueue_condition != None:
-                    propagate(enqueue_condition, csp,[uns])
+                    propagate_fn(enqueue_condition, csp,[uns])
                 cop.append(csp)
             cop.extend(agenda)
             agenda = cop
+        elif hasattr(select_var_fn, 'record_failure'):
+            select_var_fn.record_failure(p)
     return (None,count)
 
 # QUESTION 5: How many extensions does it take to solve the Pokemon problem
@@ -0,0 +1,130 @@
+# MIT 6.034 Lab 4: Constraint Satisfaction Problems
+
+# Variable and value ordering heuristics.  By default the solvers assign the
+# first unassigned variable (in alphabetical order, unless the problem says
+# otherwise) and try its values in domain order.  The solvers in lab4.py and
+# backtracking.py also accept:
+#
+#   select_var_fn(csp) : returns the unassigned variable to assign next
+#   order_values_fn(csp, var) : returns the values of var in the order to try
+#
+# A select_var_fn may also have a method record_failure(csp), which the
+# solvers call on each problem that fails (has an empty domain or violates a
+# constraint).  dom/wdeg uses it to learn which constraints are hard.
+
+from constraint_api import *
+
+INF = float('inf')
+
+
+def unassigned_degree(csp, var) :
+    "Returns the number of unassigned variables that share a constraint with var."
+    return sum(1 for neighbor in csp.get_neighbors(var)
+               if neighbor not in csp.assignments)
+
+def select_mrv(csp) :
+    """Minimum remaining values: returns the unassigned variable with the
+    smallest domain, breaking ties by the largest number of constraints with
+    other unassigned variables (the degree heuristic), then by the order of
+    the unassigned variables."""
+    return min(csp.unassigned_vars,
+               key=lambda var : (csp.domain_size(var),
+                                 -unassigned_degree(csp, var)))
+
+class DomWdeg :
+    """dom/wdeg: returns the unassigned variable with the smallest ratio of
+    domain size to the total weight of its constraints with unassigned
+    variables.  Each constraint starts with weight 1, and record_failure adds
+    1 to the weight of the constraints blamed for a failure, so the search
+    turns to the variables involved in earlier failures.  The weights are kept
+    across the whole search, so use a new DomWdeg for each problem."""
+
+    def __init__(self) :
+        self.weights = {}  # (var1, var2), in sorted order -> weight
+
+    def weight(self, var1, var2) :
+        return self.weights.get(tuple(sorted((var1, var2))), 1)
+
+    def bump(self, var1, var2) :
+        key = tuple(sorted((var1, var2)))
+        self.weights[key] = self.weights.get(key, 1) + 1
+
+    def weighted_degree(self, csp, var) :
+        return sum(self.weight(var, neighbor)
+                   for neighbor in csp.get_neighbors(var)
+                   if neighbor not in csp.assignments)
+
+    def __call__(self, csp) :
+        def ratio(var) :
+            wdeg = self.weighted_degree(csp, var)
+            return csp.domain_size(var) / wdeg if wdeg else INF
+        return min(csp.unassigned_vars, key=ratio)
+
+    def record_failure(self, csp) :
+        """Blames the constraints that caused csp to fail: the constraints
+        violated by its assignments, and the constraints between each variable
+        with an empty domain and the assigned variables that emptied it (or
+        all of its constraints, if none of its neighbors is assigned)."""
+        asgn = csp.assignments
+        for constraint in csp.get_all_constraints() :
+            var1, var2 = constraint.var1, constraint.var2
+            if (var1 in asgn and var2 in asgn
+                and not constraint.check(asgn[var1], asgn[var2])) :
+                self.bump(var1, var2)
+        for var in csp.get_all_variables() :
+            if csp.domain_size(var) == 0 :
+                neighbors = csp.get_neighbors(var)
+                blamed = [n for n in neighbors if n in asgn] or neighbors
+                for neighbor in blamed :
+                    self.bump(var, neighbor)
+
+
+def order_lcv(csp, var) :
+    """Least constraining value: returns the values of var, ordered by how
+    many values they would rule out in the domains of the unassigned
+    neighbors of var, fewest first (ties keep domain order)."""
+    neighbors = [(neighbor, csp.constraints_between(var, neighbor))
+                 for neighbor in csp.get_neighbors(var)
+                 if neighbor not in csp.assignments]
+
+    def ruled_out(val) :
+        count = 0
+        for neighbor, constraints in neighbors :
+            for other in csp.get_domain(neighbor) :
+                if not all(c.check(val, other) for c in constraints) :
+                    count += 1
+        return count
+    return sorted(csp.get_domain(var), key=ruled_out)
+
+
+# Named orderings, as functions returning (select_var_fn, order_values_fn),
+# since some heuristics keep state during a search.
+ORDERINGS = {
+    'static' : lambda : (None, None),
+    'mrv' : lambda : (select_mrv, None),
+    'lcv' : lambda : (None, order_lcv),
+    'mrv+lcv' : lambda : (select_mrv, order_lcv),
+    'dom/wdeg' : lambda : (DomWdeg(), None),
+    'dom/wdeg+lcv' : lambda : (DomWdeg(), order_lcv),
+}
+
+def compare_orderings(problem, solver, orderings=None, **solver_args) :
+    """Solves problem with solver(problem, select_var_fn=...,
+    order_values_fn=..., **solver_args) once for each named ordering in
+    orderings (all of ORDERINGS if None), on a new copy of problem each
+    time.  Returns a list of (name, solution, number of extensions)."""
+    results = []
+    for name in (orderings or sorted(ORDERINGS)) :
+        select_var_fn, order_values_fn = ORDERINGS[name]()
+        solution, count = solver(problem.copy(), select_var_fn=select_var_fn,
+                                 order_values_fn=order_values_fn, **solver_args)
+        results.append((name, solution, count))
+    return results
+
+
+# Uncomment the lines below to compare the number of extensions each ordering
+# needs to solve the Pokemon problem with forward checking:
+
+# from lab4 import get_pokemon_problem, solve_constraint_generic, condition_forward_checking
+# for name, solution, count in compare_orderings(get_pokemon_problem(), solve_constraint_generic, enqueue_condition=condition_forward_checking) :
+#     print(name, count)
@@ -0,0 +1,178 @@
+# MIT 6.034 Lab 4: Constraint Satisfaction Problems
+
+# Portfolio solving.  No one combination of propagation and ordering is best
+# for every problem, and on hard problems the time a solver takes varies a
+# lot with the order it tries things in.  solve_portfolio runs several solver
+# configurations on the same problem at once, each in its own process, and
+# returns the answer of whichever finishes first, stopping the others.
+
+import multiprocessing
+import os
+import queue
+import random
+from collections import namedtuple
+from time import time
+
+from constraint_api import *
+from lab4 import (propagate, condition_forward_checking, condition_singleton,
+                  condition_domain_reduction)
+from backtracking import solve_constraint_backtracking
+from arc_consistency import propagate_ac3, propagate_ac2001
+from global_constraints import propagate_with_globals
+from ordering import ORDERINGS
+
+# Configurations name their parts, so that they can be sent to other processes
+CONDITIONS = {
+    'dfs' : None,
+    'forward_checking' : condition_forward_checking,
+    'singleton' : condition_singleton,
+    'domain_reduction' : condition_domain_reduction,
+}
+
+PROPAGATORS = {
+    'propagate' : propagate,
+    'ac3' : propagate_ac3,
+    'ac2001' : propagate_ac2001,
+    'globals' : propagate_with_globals,
+}
+
+
+class Configuration(namedtuple('Configuration',
+                               'condition ordering propagator seed')) :
+    """A solver configuration: the names of an enqueue condition in
+    CONDITIONS, an ordering in ORDERINGS and a propagator in PROPAGATORS, and
+    a random seed.  If seed is not None, the order of the unassigned
+    variables is shuffled with it before solving, which changes how ties
+    between variables are broken, and so is the order values are tried in,
+    unless the ordering orders values itself (like 'lcv')."""
+
+    def __new__(cls, condition='forward_checking', ordering='static',
+                propagator='propagate', seed=None) :
+        for name, names in ((condition, CONDITIONS), (ordering, ORDERINGS),
+                            (propagator, PROPAGATORS)) :
+            if name not in names :
+                raise KeyError(str(name) + " is not one of " + str(sorted(names)))
+        return super(Configuration, cls).__new__(cls, condition, ordering,
+                                                 propagator, seed)
+
+    def __str__(self) :
+        name = '%s, %s, %s' % (self.condition, self.ordering, self.propagator)
+        if self.seed is not None :
+            name += ', seed %s' % self.seed
+        return name
+
+
+def default_portfolio(size) :
+    """Returns size configurations: first different propagation levels and
+    orderings, then the best of them again with different random seeds."""
+    configurations = [
+        Configuration('forward_checking', 'dom/wdeg'),
+        Configuration('domain_reduction', 'mrv', 'ac2001'),
+        Configuration('forward_checking', 'mrv+lcv'),
+        Configuration('singleton', 'dom/wdeg'),
+        Configuration('domain_reduction', 'dom/wdeg', 'ac2001'),
+        Configuration('forward_checking', 'static'),
+    ]
+    seed = 0
+    while len(configurations) < size :
+        configurations.append(Configuration('forward_checking', 'dom/wdeg',
+                                            seed=seed))
+        seed += 1
+    return configurations[:size]
+
+def randomize(csp, seed) :
+    """Shuffles the order of the unassigned variables of csp, and returns an
+    order_values_fn that tries the values of each variable in a random order.
+    (Shuffling the domains themselves wouldn't do, since set_domain sorts
+    them.)"""
+    rng = random.Random(seed)
+    order = csp.unassigned_vars[:]
+    rng.shuffle(order)
+    csp.set_unassigned_vars_order(order)
+    ranks = {}
+    for var in csp.get_all_variables() :
+        domain = csp.get_domain(var)[:]
+        rng.shuffle(domain)
+        ranks[var] = dict((val, i) for i, val in enumerate(domain))
+
+    def order_values_fn(csp, var) :
+        return sorted(csp.get_domain(var), key=ranks[var].__getitem__)
+    return order_values_fn
+
+def solve_configuration(problem, configuration) :
+    """Solves problem with one configuration.  Same return type as
+    solve_constraint_dfs.  Does not change problem."""
+    csp = problem.copy()
+    select_var_fn, order_values_fn = ORDERINGS[configuration.ordering]()
+    if configuration.seed is not None :
+        shuffled_values_fn = randomize(csp, configuration.seed)
+        if order_values_fn is None :
+            order_values_fn = shuffled_values_fn
+    return solve_constraint_backtracking(csp, CONDITIONS[configuration.condition],
+                                         PROPAGATORS[configuration.propagator],
+                                         select_var_fn, order_values_fn)
+
+def portfolio_worker(problem, configuration, index, results) :
+    """Solves problem with configuration in a worker process, and puts
+    (index, solution, number of extensions, error) on the results queue."""
+    try :
+        solution, count = solve_configuration(problem, configuration)
+        results.put((index, solution, count, None))
+    except Exception as e :
+        results.put((index, None, None, repr(e)))
+
+def get_context() :
+    """Returns the multiprocessing context for the workers.  Forked workers
+    get a copy of the problem without pickling it, so problems whose
+    constraints are lambdas work too; where fork isn't available, the problem
+    must be picklable."""
+    if 'fork' in multiprocessing.get_all_start_methods() :
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+def solve_portfolio(problem, configurations=None, time_limit=None) :
+    """Solves problem with each configuration (default_portfolio with one
+    configuration per CPU if None) in a separate process, and stops them all
+    as soon as one finishes.  Returns (solution, number of extensions,
+    winning configuration), where solution is None if the problem has no
+    solution, or (None, None, None) if time_limit seconds pass first.
+    Raises RuntimeError if every configuration fails with an error."""
+    if configurations is None :
+        configurations = default_portfolio(max(os.cpu_count() or 1, 2))
+    context = get_context()
+    results = context.Queue()
+    workers = [context.Process(target=portfolio_worker,
+                               args=(problem, configuration, index, results),
+                               daemon=True)
+               for index, configuration in enumerate(configurations)]
+    deadline = None if time_limit is None else time() + time_limit
+    errors = []
+    try :
+        for worker in workers :
+            worker.start()
+        while len(errors) < len(workers) :
+            if deadline is not None and time() >= deadline :
+                return (None, None, None)
+            try :
+                index, solution, count, error = results.get(timeout=0.05)
+            except queue.Empty :
+                if not any(worker.is_alive() for worker in workers) and results.empty() :
+                    break
+                continue
+            if error is None :
+                return (solution, count, configurations[index])
+            errors.append('%s: %s' % (configurations[index], error))
+    finally :
+        for worker in workers :
+            if worker.is_alive() :
+                worker.terminate()
+        for worker in workers :
+            worker.join()
+    raise RuntimeError("Every configuration failed:\n" + '\n'.join(errors))
+
+
+# Uncomment the lines below to solve the Pokemon problem with a portfolio of
+# four configurations:
+
+# from lab4 import get_pokemon_problem
+# print(solve_portfolio(get_pokemon_problem(), default_portfolio(4)))
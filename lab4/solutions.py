@@ -0,0 +1,132 @@
+# MIT 6.034 Lab 4: Constraint Satisfaction Problems
+
+# Finding every solution.  iter_solutions is a generator: it searches one
+# copy of the problem in place, undoing its changes on the trail, and yields
+# each solution as it finds it, so memory doesn't grow with the number of
+# solutions.  count_solutions counts them without listing them: whenever the
+# unassigned variables fall into groups with no constraints between them,
+# it counts the solutions of each group separately and multiplies the counts.
+
+from constraint_api import *
+from lab4 import (has_empty_domains, check_all_constraints, propagate,
+                  condition_forward_checking)
+from backtracking import check_new_assignment
+
+
+def assign(csp, var, val, enqueue_condition, propagate_fn) :
+    """Assigns val to var and propagates.  Returns False if that leaves an
+    empty domain or violates a constraint, otherwise True."""
+    csp.set_assignment(var, val)
+    if enqueue_condition is not None :
+        propagate_fn(enqueue_condition, csp, [var])
+    return not has_empty_domains(csp) and check_new_assignment(csp, var)
+
+def iter_solutions(problem, enqueue_condition=condition_forward_checking,
+                   propagate_fn=propagate, select_var_fn=None,
+                   order_values_fn=None) :
+    """Yields each solution of the problem (a dictionary mapping variables to
+    values) once, in the order depth-first search finds them.  The arguments
+    are as for solve_constraint_backtracking; propagation only removes values
+    that are in no solution, so it changes how fast the solutions are found,
+    not which.  Does not change problem."""
+    csp = problem.copy().start_trail()
+    if has_empty_domains(csp) or not check_all_constraints(csp) :
+        return
+
+    def search() :
+        var = csp.pop_next_unassigned_var(select_var_fn)
+        if var is None :
+            yield dict(csp.assignments)
+            return
+        values = (csp.get_domain(var)[:] if order_values_fn is None
+                  else order_values_fn(csp, var))
+        for val in values :
+            mark = csp.trail_mark()
+            if assign(csp, var, val, enqueue_condition, propagate_fn) :
+                for solution in search() :
+                    yield solution
+            csp.undo_to_mark(mark)
+
+    for solution in search() :
+        yield solution
+
+
+def constraint_graph(csp) :
+    """Returns a dict mapping each variable to the set of variables it shares
+    a constraint with, including global constraints."""
+    graph = dict((var, set(csp.get_neighbors(var))) for var in csp.get_all_variables())
+    for constraint in csp.global_constraints :
+        for var in constraint.variables :
+            graph[var].update(constraint.variables)
+    for var in graph :
+        graph[var].discard(var)
+    return graph
+
+def connected_components(graph, variables) :
+    """Returns the connected components of the variables in the graph, not
+    following edges to variables outside variables, as lists in the order of
+    variables."""
+    remaining = set(variables)
+    components = []
+    for start in variables :
+        if start not in remaining :
+            continue
+        remaining.discard(start)
+        component = set([start])
+        stack = [start]
+        while stack :
+            for neighbor in graph[stack.pop()] :
+                if neighbor in remaining :
+                    remaining.discard(neighbor)
+                    component.add(neighbor)
+                    stack.append(neighbor)
+        components.append([var for var in variables if var in component])
+    return components
+
+def count_solutions(problem, enqueue_condition=condition_forward_checking,
+                    propagate_fn=propagate) :
+    """Returns the number of solutions of the problem, the number
+    iter_solutions would yield.  Splits the unassigned variables into
+    connected components of the constraint graph, before searching and again
+    after each assignment, and multiplies the counts of the components.
+    Within a component, assigns the variable with the most unassigned
+    neighbors first (the fewest values, if tied), since removing it is the
+    most likely to split the component.  Does not change problem."""
+    csp = problem.copy().start_trail()
+    if has_empty_domains(csp) or not check_all_constraints(csp) :
+        return 0
+    graph = constraint_graph(csp)
+
+    def unassigned_degree(var) :
+        return sum(1 for neighbor in graph[var] if neighbor not in csp.assignments)
+
+    def count(variables) :
+        total = 1
+        for component in connected_components(graph, variables) :
+            total *= count_connected(component)
+            if total == 0 :
+                break
+        return total
+
+    def count_connected(variables) :
+        var = min(variables, key=lambda var : (-unassigned_degree(var),
+                                               csp.domain_size(var)))
+        rest = [other for other in variables if other != var]
+        total = 0
+        for val in csp.get_domain(var)[:] :
+            mark = csp.trail_mark()
+            if assign(csp, var, val, enqueue_condition, propagate_fn) :
+                total += count(rest) if rest else 1
+            csp.undo_to_mark(mark)
+        return total
+
+    return count(csp.unassigned_vars[:])
+
+
+# Uncomment the lines below to list the solutions of the Pokemon problem,
+# and count them:
+
+# from lab4 import get_pokemon_problem
+# for solution in iter_solutions(get_pokemon_problem()) :
+#     print(solution)
+# print(count_solutions(get_pokemon_problem()))
@@ -2,6 +2,8 @@
 
 from tester import make_test, get_tests
 from test_problems import *
+from backtracking import solve_constraint_backtracking
+from copy import deepcopy
 from random import randint, random
 lab_number = 4
 
@@ -449,10 +451,30 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'domain_reduction')
 
 
+# Copies share domains until they change them, so reducing the domains of a
+# copy must leave the original problem and its other copies unchanged.
+domain_reduction_8_original = CSP_almost_stuck.copy()
+domain_reduction_8_unchanged = deepcopy(domain_reduction_8_original)
+domain_reduction_8_input_csp = domain_reduction_8_original.copy()
+domain_reduction_8_sibling = domain_reduction_8_original.copy()
+def domain_reduction_8_getargs() :  #TEST 35
+    return [domain_reduction_8_input_csp, ['A']]
+def domain_reduction_8_testanswer(val, original_val = None) :
+    return (val == None and domain_reduction_8_input_csp == CSP_now_stuck
+            and domain_reduction_8_original == domain_reduction_8_unchanged
+            and domain_reduction_8_sibling == domain_reduction_8_unchanged)
+make_test(type = 'FUNCTION_ENCODED_ARGS',
+          getargs = domain_reduction_8_getargs,
+          testanswer = domain_reduction_8_testanswer,
+          expected_val = ("None (with domains reduced in the copy passed in, "
+                          +"and not in the problem it was copied from)"),
+          name = 'domain_reduction')
+
+
 ## solve_constraint_propagate_reduced_domains
 #triangle problem
 solve_constraint_propany_0_expected = (triangle_problem_soln.assignments, 5)
-def solve_constraint_propany_0_getargs() :  #TEST 35
+def solve_constraint_propany_0_getargs() :  #TEST 36
     return [triangle_problem.copy()]
 def solve_constraint_propany_0_testanswer(val, original_val = None) :
     return val == solve_constraint_propany_0_expected
@@ -465,7 +487,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 #pokemon problem
 solve_constraint_propany_2_expected = ({'Q1':'B', 'Q3':'D', 'Q2':'B', 'Q5':'C',
                                         'Q4':'C'}, 7)
-def solve_constraint_propany_2_getargs() :  #TEST 36
+def solve_constraint_propany_2_getargs() :  #TEST 37
     return [get_pokemon_problem()]
 def solve_constraint_propany_2_testanswer(val, original_val = None) :
     return val == solve_constraint_propany_2_expected
@@ -479,7 +501,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 #This test checks that only newly reduced domains get propagated
 # (ignore existing singletons, even if they've never been propagated)
 solve_constraint_propany_7_expected = ({'A':2, 'B':2, 'C':2}, 5)
-def solve_constraint_propany_7_getargs() :  #TEST 37
+def solve_constraint_propany_7_getargs() :  #TEST 38
     return [CSP_no_prop.copy()]
 def solve_constraint_propany_7_testanswer(val, original_val = None) :
     return val == solve_constraint_propany_7_expected
@@ -491,7 +513,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 
 #This test checks that singletons get propagated
 solve_constraint_propany_8_expected = ({'A':2, 'B':2, 'C':2}, 4)
-def solve_constraint_propany_8_getargs() :  #TEST 38
+def solve_constraint_propany_8_getargs() :  #TEST 39
     return [CSP_propany_and_prop1.copy()]
 def solve_constraint_propany_8_testanswer(val, original_val = None) :
     return val == solve_constraint_propany_8_expected
@@ -503,7 +525,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 
 #This test checks that newly reduced non-singletons DO get propagated
 solve_constraint_propany_9_expected = ({'A':2, 'B':3, 'C':3}, 4)
-def solve_constraint_propany_9_getargs() :  #TEST 39
+def solve_constraint_propany_9_getargs() :  #TEST 40
     return [CSP_propany_not_prop1.copy()]
 def solve_constraint_propany_9_testanswer(val, original_val = None) :
     return val == solve_constraint_propany_9_expected
@@ -521,7 +543,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 #This test differentiates b/w full reduction/singletons/FC
 propagate_0_input_csp = CSP_singleton_differentiate.copy()
 propagate_0_expected = ['A']
-def propagate_0_getargs() :  #TEST 40
+def propagate_0_getargs() :  #TEST 41
     return [lambda p,v: False, propagate_0_input_csp, ['A']]
 def propagate_0_testanswer(val, original_val = None) :
     return (val == propagate_0_expected
@@ -537,7 +559,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 #This test differentiates b/w full reduction/singletons/FC
 propagate_1_input_csp = CSP_singleton_differentiate.copy()
 propagate_1_expected = list('AC')
-def propagate_1_getargs() :  #TEST 41
+def propagate_1_getargs() :  #TEST 42
     return [lambda p,v: len(p.get_domain(v))==1, propagate_1_input_csp, ['A']]
 def propagate_1_testanswer(val, original_val = None) :
     return (val == propagate_1_expected
@@ -553,7 +575,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 #This test differentiates b/w full reduction/singletons/FC
 propagate_2_input_csp = CSP_singleton_differentiate.copy()
 propagate_2_expected = list('ABC')
-def propagate_2_getargs() :  #TEST 42
+def propagate_2_getargs() :  #TEST 43
     return [lambda p,v: True, propagate_2_input_csp, ['A']]
 def propagate_2_testanswer(val, original_val = None) :
     return (val == propagate_2_expected
@@ -568,7 +590,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 #test with lambda var = "B" (because why not have an arbitrary enqueue condition)
 propagate_3_input_csp = CSP_singleton_differentiate.copy()
 propagate_3_expected = list('AB')
-def propagate_3_getargs() :  #TEST 43
+def propagate_3_getargs() :  #TEST 44
     return [lambda p,v: v=='B', propagate_3_input_csp, ['A']]
 def propagate_3_testanswer(val, original_val = None) :
     return (val == propagate_3_expected
@@ -584,7 +606,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 
 #queue=[A], neighbor's domain gets reduced to 0 -> None; modify csp
 propagate_5_input_csp = CSP_almost_stuck.copy()
-def propagate_5_getargs() :  #TEST 44
+def propagate_5_getargs() :  #TEST 45
     return [lambda p,v: len(p.get_domain(v))==1, propagate_5_input_csp, ['A']]
 def propagate_5_testanswer(val, original_val = None) :
     return (val == None
@@ -600,7 +622,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 #queue=None, but no reduction -> add all vars to queue, pop each once; no change to csp
 propagate_6_input_csp = CSP_one_var_assigned_unconstrained.copy()
 propagate_6_expected = list('ABC')
-def propagate_6_getargs() :  #TEST 45
+def propagate_6_getargs() :  #TEST 46
     return [lambda p,v: len(p.get_domain(v))==1, propagate_6_input_csp]
 def propagate_6_testanswer(val, original_val = None) :
     return (val == propagate_6_expected
@@ -615,7 +637,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 #queue=[B,A], reduction and propagation -> [B, A, C, A, B] #same as non-singleton
 propagate_7_input_csp = triangle_problem_modified.copy()
 propagate_7_expected = list('BACAB')
-def propagate_7_getargs() :  #TEST 46
+def propagate_7_getargs() :  #TEST 47
     return [lambda p,v: len(p.get_domain(v))==1, propagate_7_input_csp, ['B', 'A']]
 def propagate_7_testanswer(val, original_val = None) :
     return (val == propagate_7_expected
@@ -630,7 +652,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 #queue=[] -> [] (don't propagate anything) #same as non-singleton
 #This test checks that vars are being propagated only when specified
 propagate_8_input_csp = CSP_almost_stuck_singletons.copy()
-def propagate_8_getargs() :  #TEST 47
+def propagate_8_getargs() :  #TEST 48
     return [lambda p,v: len(p.get_domain(v))==1, propagate_8_input_csp, []]
 def propagate_8_testanswer(val, original_val = None) :
     return (val == [] and propagate_8_input_csp == CSP_almost_stuck_singletons)
@@ -643,7 +665,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 #This test checks that the entire queue doesn't get sorted (only new variables added should be sorted)
 propagate_9_input_csp = CSP_do_not_sort_queue.copy()
 propagate_9_expected = list('ABCA')
-def propagate_9_getargs() :  #TEST 48
+def propagate_9_getargs() :  #TEST 49
     return [lambda p,v: len(p.get_domain(v))==1, propagate_9_input_csp]
 def propagate_9_testanswer(val, original_val = None) :
     return (val == propagate_9_expected
@@ -658,7 +680,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 
 ## condition_domain_reduction
 #nonsense input -> True
-def condition_domain_reduction_0_getargs() :  #TEST 49
+def condition_domain_reduction_0_getargs() :  #TEST 50
     return [CSP([3]), 3]
 def condition_domain_reduction_0_testanswer(val, original_val = None) :
     return val == True
@@ -668,7 +690,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           expected_val = "True",
           name = 'condition_domain_reduction')
 
-def condition_domain_reduction_1_getargs() :  #TEST 50
+def condition_domain_reduction_1_getargs() :  #TEST 51
     return [None, None]
 def condition_domain_reduction_1_testanswer(val, original_val = None) :
     return val == True
@@ -681,7 +703,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 
 ## condition_singleton
 #var is singleton, assigned val -> True
-def condition_singleton_0_getargs() :  #TEST 51
+def condition_singleton_0_getargs() :  #TEST 52
     return [CSP_one_var_assigned.copy(), 'A']
 def condition_singleton_0_testanswer(val, original_val = None) :
     return val == True
@@ -692,7 +714,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'condition_singleton')
 
 #var is singleton, not assigned -> True
-def condition_singleton_3_getargs() :  #TEST 52
+def condition_singleton_3_getargs() :  #TEST 53
     return [CSP_singleton.copy(), 'C']
 def condition_singleton_3_testanswer(val, original_val = None) :
     return val == True
@@ -703,7 +725,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'condition_singleton')
 
 #var has multiple values in domain -> False
-def condition_singleton_1_getargs() :  #TEST 53
+def condition_singleton_1_getargs() :  #TEST 54
     return [triangle_problem.copy(), 'A']
 def condition_singleton_1_testanswer(val, original_val = None) :
     return val == False
@@ -714,7 +736,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'condition_singleton')
 
 #var has no values in domain -> False
-def condition_singleton_2_getargs() :  #TEST 54
+def condition_singleton_2_getargs() :  #TEST 55
     return [CSP_empty_domain.copy(), 'B']
 def condition_singleton_2_testanswer(val, original_val = None) :
     return val == False
@@ -727,7 +749,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 
 ## condition_forward_checking
 #nonsense input -> False
-def condition_forward_checking_0_getargs() :  #TEST 55
+def condition_forward_checking_0_getargs() :  #TEST 56
     return [CSP(['any variable']), 'any variable']
 def condition_forward_checking_0_testanswer(val, original_val = None) :
     return val == False
@@ -737,7 +759,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           expected_val = "False",
           name = 'condition_forward_checking')
 
-def condition_forward_checking_1_getargs() :  #TEST 56
+def condition_forward_checking_1_getargs() :  #TEST 57
     return [None, None]
 def condition_forward_checking_1_testanswer(val, original_val = None) :
     return val == False
@@ -751,7 +773,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 #### PART 5B
 
 ## solve_constraint_generic
-#triangle problem DFS  #TEST 57
+#triangle problem DFS  #TEST 58
 solve_constraint_generic_01_expected = (triangle_problem_soln.assignments, 15)
 def solve_constraint_generic_01_getargs() :
     return [triangle_problem.copy(), None]
@@ -763,7 +785,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           expected_val = str(solve_constraint_generic_01_expected),
           name = 'solve_constraint_generic')
 
-#triangle problem DFS+FC  #TEST 58
+#triangle problem DFS+FC  #TEST 59
 solve_constraint_generic_02_expected = (triangle_problem_soln.assignments, 7)
 def solve_constraint_generic_02_getargs() :
     return [triangle_problem.copy(), lambda p,v: False]
@@ -775,7 +797,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           expected_val = str(solve_constraint_generic_02_expected),
           name = 'solve_constraint_generic')
 
-#triangle problem DFS+FC+PROP-1  #TEST 59
+#triangle problem DFS+FC+PROP-1  #TEST 60
 solve_constraint_generic_03_expected = (triangle_problem_soln.assignments, 5)
 def solve_constraint_generic_03_getargs() :
     return [triangle_problem.copy(), lambda p,v: len(p.get_domain(v))==1]
@@ -787,7 +809,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           expected_val = str(solve_constraint_generic_03_expected),
           name = 'solve_constraint_generic')
 
-#triangle problem DFS+FC+PROP-ANY  #TEST 60
+#triangle problem DFS+FC+PROP-ANY  #TEST 61
 solve_constraint_generic_04_expected = (triangle_problem_soln.assignments, 5)
 def solve_constraint_generic_04_getargs() :
     return [triangle_problem.copy(), lambda p,v: True]
@@ -800,7 +822,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'solve_constraint_generic')
 
 
-#pokemon problem DFS  #TEST 61
+#pokemon problem DFS  #TEST 62
 solve_constraint_generic_21_expected = ({'Q1':'B', 'Q3':'D', 'Q2':'B', 'Q5':'C',
                                         'Q4':'C'}, 20)
 def solve_constraint_generic_21_getargs() :
@@ -814,7 +836,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
                           + " (Note: This is the Pokemon problem.)"),
           name = 'solve_constraint_generic')
 
-#pokemon problem DFS+FC  #TEST 62
+#pokemon problem DFS+FC  #TEST 63
 solve_constraint_generic_22_expected = ({'Q1':'B', 'Q3':'D', 'Q2':'B', 'Q5':'C',
                                         'Q4':'C'}, 9)
 def solve_constraint_generic_22_getargs() :
@@ -828,7 +850,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
                           + " (Note: This is the Pokemon problem.)"),
           name = 'solve_constraint_generic')
 
-#pokemon problem DFS+FC+PROP-1  #TEST 63
+#pokemon problem DFS+FC+PROP-1  #TEST 64
 solve_constraint_generic_23_expected = ({'Q1':'B', 'Q3':'D', 'Q2':'B', 'Q5':'C',
                                         'Q4':'C'}, 8)
 def solve_constraint_generic_23_getargs() :
@@ -842,7 +864,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
                           + " (Note: This is the Pokemon problem.)"),
           name = 'solve_constraint_generic')
 
-#pokemon problem DFS+FC+PROP-ANY  #TEST 64
+#pokemon problem DFS+FC+PROP-ANY  #TEST 65
 solve_constraint_generic_24_expected = ({'Q1':'B', 'Q3':'D', 'Q2':'B', 'Q5':'C',
                                         'Q4':'C'}, 7)
 def solve_constraint_generic_24_getargs() :
@@ -865,7 +887,7 @@ def solve_constraint_generic_25_getargs() :
     return [CSP_no_prop.copy(), lambda p,v: len(p.get_domain(v))==1]
 def solve_constraint_generic_25_testanswer(val, original_val = None) :
     return val == solve_constraint_generic_25_expected
-make_test(type = 'FUNCTION_ENCODED_ARGS',  #TEST 65
+make_test(type = 'FUNCTION_ENCODED_ARGS',  #TEST 66
           getargs = solve_constraint_generic_25_getargs,
           testanswer = solve_constraint_generic_25_testanswer,
           expected_val = (str(solve_constraint_generic_25_expected) 
@@ -878,7 +900,7 @@ def solve_constraint_generic_26_getargs() :
     return [CSP_propany_and_prop1.copy(), lambda p,v: len(p.get_domain(v))==1]
 def solve_constraint_generic_26_testanswer(val, original_val = None) :
     return val == solve_constraint_generic_26_expected
-make_test(type = 'FUNCTION_ENCODED_ARGS',  #TEST 66
+make_test(type = 'FUNCTION_ENCODED_ARGS',  #TEST 67
           getargs = solve_constraint_generic_26_getargs,
           testanswer = solve_constraint_generic_26_testanswer,
           expected_val = (str(solve_constraint_generic_26_expected) 
@@ -891,7 +913,7 @@ def solve_constraint_generic_27_getargs() :
     return [CSP_propany_not_prop1.copy(), lambda p,v: len(p.get_domain(v))==1]
 def solve_constraint_generic_27_testanswer(val, original_val = None) :
     return val == solve_constraint_generic_27_expected
-make_test(type = 'FUNCTION_ENCODED_ARGS',  #TEST 67
+make_test(type = 'FUNCTION_ENCODED_ARGS',  #TEST 68
           getargs = solve_constraint_generic_27_getargs,
           testanswer = solve_constraint_generic_27_testanswer,
           expected_val = (str(solve_constraint_generic_27_expected) 
@@ -899,11 +921,32 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',  #TEST 67
           name = 'solve_constraint_generic')
 
 
+# Solving without copying the problem (undoing changes with a trail) must
+# assign the same values with the same number of extensions.
+solve_constraint_generic_28_conditions = [None, lambda p,v: False,
+                                          lambda p,v: len(p.get_domain(v))==1,
+                                          lambda p,v: True]
+def solve_constraint_generic_28_getargs() :  #TEST 69
+    return [[get_pokemon_problem(), condition]
+            for condition in solve_constraint_generic_28_conditions]
+def solve_constraint_generic_28_testanswer(val, original_val = None) :
+    return val == [solve_constraint_backtracking(get_pokemon_problem(), condition)
+                   for condition in solve_constraint_generic_28_conditions]
+make_test(type = 'MULTIFUNCTION',
+          getargs = solve_constraint_generic_28_getargs,
+          testanswer = solve_constraint_generic_28_testanswer,
+          expected_val = ("list of (assignments, extension_count) for the "
+                          +"Pokemon problem with DFS, DFS+FC, DFS+FC+PROP-1 "
+                          +"and DFS+FC+PROP-ANY, the same as "
+                          +"solve_constraint_backtracking returns"),
+          name = 'solve_constraint_generic')
+
+
 #### PART 6
 
 ## constraint_adjacent
 #randint a, a+1 -> True
-def constraint_adjacent_0_getargs() :  #TEST 68
+def constraint_adjacent_0_getargs() :  #TEST 70
     a = randint(-100, 100)
     return [a, a+1]
 def constraint_adjacent_0_testanswer(val, original_val = None) :
@@ -915,7 +958,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'constraint_adjacent')
 
 #randint a, a-1 -> True
-def constraint_adjacent_1_getargs() :  #TEST 69
+def constraint_adjacent_1_getargs() :  #TEST 71
     a = randint(-100, 100)
     return [a, a-1]
 def constraint_adjacent_1_testanswer(val, original_val = None) :
@@ -927,7 +970,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'constraint_adjacent')
 
 #randint a, a -> False
-def constraint_adjacent_2_getargs() :  #TEST 70
+def constraint_adjacent_2_getargs() :  #TEST 72
     return [randint(-42, 42)]*2
 def constraint_adjacent_2_testanswer(val, original_val = None) :
     return val == False
@@ -938,7 +981,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'constraint_adjacent')
 
 #randint a, a+b (b>1) -> False
-def constraint_adjacent_3_getargs() :  #TEST 71
+def constraint_adjacent_3_getargs() :  #TEST 73
     a = randint(-60, 60)
     return [a, a+randint(2,10)]
 def constraint_adjacent_3_testanswer(val, original_val = None) :
@@ -953,7 +996,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 ## constraint_not_adjacent
 #(same tests as constraint_adjacent, but opposite)
 #randint a, a+1 -> False
-def constraint_not_adjacent_0_getargs() :  #TEST 72
+def constraint_not_adjacent_0_getargs() :  #TEST 74
     a = randint(-100, 100)
     return [a, a+1]
 def constraint_not_adjacent_0_testanswer(val, original_val = None) :
@@ -965,7 +1008,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'constraint_not_adjacent')
 
 #randint a, a-1 -> False
-def constraint_not_adjacent_1_getargs() :  #TEST 73
+def constraint_not_adjacent_1_getargs() :  #TEST 75
     a = randint(-100, 100)
     return [a, a-1]
 def constraint_not_adjacent_1_testanswer(val, original_val = None) :
@@ -977,7 +1020,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'constraint_not_adjacent')
 
 #randint a, a -> True
-def constraint_not_adjacent_2_getargs() :  #TEST 74
+def constraint_not_adjacent_2_getargs() :  #TEST 76
     return [randint(-42, 42)]*2
 def constraint_not_adjacent_2_testanswer(val, original_val = None) :
     return val == True
@@ -988,7 +1031,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'constraint_not_adjacent')
 
 #randint a, a+b (b>1) -> True
-def constraint_not_adjacent_3_getargs() :  #TEST 75
+def constraint_not_adjacent_3_getargs() :  #TEST 77
     a = randint(-60, 60)
     return [a, a+randint(2,10)]
 def constraint_not_adjacent_3_testanswer(val, original_val = None) :
@@ -1002,7 +1045,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 
 ## all_different
 #no variables -> []
-def all_different_0_getargs() :  #TEST 76
+def all_different_0_getargs() :  #TEST 78
     return [[]]
 def all_different_0_testanswer(val, original_val = None) :
     return val == []
@@ -1013,7 +1056,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'all_different')
 
 #one variable -> []
-def all_different_1_getargs() :  #TEST 77
+def all_different_1_getargs() :  #TEST 79
     return [['var1']]
 def all_different_1_testanswer(val, original_val = None) :
     return val == []
@@ -1046,7 +1089,7 @@ def is_difference_constraint(constraint):
             and not check('abc','abc') and not check('x','x'))
 
 #two vars -> [(one constraint b/w A,B OR b/w B,A)]
-def all_different_2_getargs() :  #TEST 78
+def all_different_2_getargs() :  #TEST 80
     return [['A','B']]
 def all_different_2_testanswer(val, original_val = None) :
     return (isinstance(val, (list, tuple)) and len(val) == 1
@@ -1060,7 +1103,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
           name = 'all_different')
 
 #lots of vars -> [(constraints b/w all pairs)]
-def all_different_3_getargs() :  #TEST 79
+def all_different_3_getargs() :  #TEST 81
     return [list('CBAD')]
 
 def all_different_3_testanswer(val, original_val = None) :
@@ -1083,7 +1126,7 @@ make_test(type = 'FUNCTION_ENCODED_ARGS',
 #### Tests for ANSWER_i questions ##############################################
 
 ## ANSWER_1
-ANSWER_1_getargs = 'ANSWER_1'  #TEST 80
+ANSWER_1_getargs = 'ANSWER_1'  #TEST 82
 def ANSWER_1_testanswer(val, original_val = None):
     if val == None:
         raise NotImplementedError
@@ -1096,7 +1139,7 @@ make_test(type = 'VALUE',
           name = ANSWER_1_getargs)
 
 ## ANSWER_2
-ANSWER_2_getargs = 'ANSWER_2'  #TEST 81
+ANSWER_2_getargs = 'ANSWER_2'  #TEST 83
 def ANSWER_2_testanswer(val, original_val = None):
     if val == None:
         raise NotImplementedError
@@ -1109,7 +1152,7 @@ make_test(type = 'VALUE',
           name = ANSWER_2_getargs)
 
 ## ANSWER_3
-ANSWER_3_getargs = 'ANSWER_3'  #TEST 82
+ANSWER_3_getargs = 'ANSWER_3'  #TEST 84
 def ANSWER_3_testanswer(val, original_val = None):
     if val == None:
         raise NotImplementedError
@@ -1122,7 +1165,7 @@ make_test(type = 'VALUE',
           name = ANSWER_3_getargs)
 
 ## ANSWER_4
-ANSWER_4_getargs = 'ANSWER_4'  #TEST 83
+ANSWER_4_getargs = 'ANSWER_4'  #TEST 85
 def ANSWER_4_testanswer(val, original_val = None):
     if val == None:
         raise NotImplementedError
@@ -1135,7 +1178,7 @@ make_test(type = 'VALUE',
           name = ANSWER_4_getargs)
 
 ## ANSWER_5
-ANSWER_5_getargs = 'ANSWER_5'  #TEST 84
+ANSWER_5_getargs = 'ANSWER_5'  #TEST 86
 def ANSWER_5_testanswer(val, original_val = None):
     if val == None:
         raise NotImplementedError